@@ -1,4 +1,11 @@
-from . import panels, operators
+try:
+    import bpy
+except ImportError:
+    # Imported by a worker process of the batch import, outside of Blender
+    bpy = None
+
+if bpy is not None:
+    from . import panels, operators
 
 bl_info = {
     "name" : "Citography - Beta",
@@ -0,0 +1,77 @@
+import hashlib
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image #CHECK IF INSTALLED
+
+# Where one image sits in the atlases: atlas index, UV rectangle and the aspect ratio of the image
+AtlasTile = namedtuple("AtlasTile", ["atlas", "u0", "v0", "u1", "v1", "aspect"])
+
+MAX_ATLAS_SIZE = 8192
+
+def atlas_key(img_paths, tile_size):
+    """Hash of the inputs of a packing, so unchanged folders reuse their atlases."""
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(str(tile_size).encode("utf-8"))
+    for path in img_paths:
+        st = os.stat(path)
+        digest.update(f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}".encode("utf-8"))
+    return digest.hexdigest()
+
+def load_tile(img_path, tile_size):
+    """Open an image downscaled to fit into one tile, None if it cannot be read."""
+    try:
+        with Image.open(img_path) as image:
+            image.draft('RGB', (tile_size, tile_size))
+            image = image.convert('RGB')
+            image.thumbnail((tile_size, tile_size))
+            return image
+    except OSError as e:
+        print(f"Error reading {img_path}: {e}")
+        return None
+
+def pack_atlases(img_paths, cache_dir, tile_size=256, atlas_size=MAX_ATLAS_SIZE, max_workers=None):
+    """Pack the images into as few atlas textures as possible.
+
+    Returns the atlas files and one AtlasTile per image (None for unreadable images).
+    """
+    columns = max(1, atlas_size // tile_size)
+    per_atlas = columns * columns
+    key = atlas_key(img_paths, tile_size)
+    atlas_count = (len(img_paths) + per_atlas - 1) // per_atlas
+    atlas_files = [os.path.join(cache_dir, f"atlas_{key}_{i}.png") for i in range(atlas_count)]
+    layout_file = os.path.join(cache_dir, f"atlas_{key}.json")
+
+    # Unchanged inputs reuse the atlases packed before
+    if os.path.exists(layout_file) and all(os.path.exists(path) for path in atlas_files):
+        with open(layout_file) as f:
+            tiles = [AtlasTile(*tile) if tile is not None else None for tile in json.load(f)]
+        return atlas_files, tiles
+
+    tiles = [None] * len(img_paths)
+    os.makedirs(cache_dir, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for a in range(atlas_count):
+            batch = range(a * per_atlas, min(len(img_paths), (a + 1) * per_atlas))
+            rows = (len(batch) + columns - 1) // columns
+            width = min(len(batch), columns) * tile_size
+            height = rows * tile_size
+            canvas = Image.new('RGB', (width, height))
+
+            images = executor.map(load_tile, [img_paths[i] for i in batch], [tile_size] * len(batch))
+            for slot, (i, image) in enumerate(zip(batch, images)):
+                if image is None:
+                    continue
+                w, h = image.size
+                x = (slot % columns) * tile_size
+                y = (slot // columns) * tile_size
+                canvas.paste(image, (x, y))
+                # UVs start at the bottom left corner, image rows at the top
+                tiles[i] = AtlasTile(a, x / width, 1 - (y + h) / height, (x + w) / width, 1 - y / height, w / h)
+
+            canvas.save(atlas_files[a], format="PNG", compress_level=1)
+
+    with open(layout_file, "w") as f:
+        json.dump(tiles, f)
+    return atlas_files, tiles
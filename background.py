@@ -0,0 +1,64 @@
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Loads of the modal operators run here, never touching bpy
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="citography")
+
+class Cancelled(Exception):
+    pass
+
+class Progress:
+    """Progress of a background load, written by its thread and read by the modal operator."""
+
+    def __init__(self):
+        self.fraction = 0.0
+        self.message = ""
+        self._cancel = threading.Event()
+
+    def update(self, done, total, message=None):
+        self.check()
+        self.fraction = done / total if total else 1.0
+        if message is not None:
+            self.message = message
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check(self):
+        """Stop the load at this point when the user pressed Esc."""
+        if self._cancel.is_set():
+            raise Cancelled()
+
+class ProgressFile(io.RawIOBase):
+    """Binary file reporting how much of it was read, so streaming parsers show progress."""
+
+    def __init__(self, path, progress, message=None):
+        self._file = open(path, "rb")
+        self._size = max(1, self._file.seek(0, io.SEEK_END))
+        self._file.seek(0)
+        self._progress = progress
+        self._message = message
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self._file.readinto(buffer)
+        self._progress.update(self._file.tell(), self._size, self._message)
+        return count
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+def submit(func, *args):
+    return _executor.submit(func, *args)
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
@@ -0,0 +1,253 @@
+"""Headless batch import of GPX, CSV and photo folders into .blend files.
+
+    blender -b [georeferenced.blend] --python <add-on folder>/batch.py -- manifest.json [--workers N] [--track-cache DIR]
+
+The manifest is a JSON file:
+
+    {
+        "origin": {"crs": "EPSG:3857", "x": 1490000.0, "y": 6890000.0},
+        "track_cache": "/cache/citography/tracks",
+        "jobs": [
+            {
+                "output": "/nightly/2024-05-01.blend",
+                "inputs": [
+                    {"type": "gpx", "path": "/drops/ride.gpx", "curve": true},
+                    {"type": "csv", "path": "/drops/logger.csv"},
+                    {"type": "csv", "path": "/drops/logger.parquet"},
+                    {"type": "fit", "path": "/drops/ride.fit.gz"},
+                    {"type": "archive", "path": "/drops/export_123.zip"},
+                    {"type": "photos", "path": "/drops/photos"}
+                ]
+            }
+        ]
+    }
+
+An "archive" input imports every GPX, TCX and FIT file (also gzipped) of a .zip
+export, streamed out of it without extracting.
+Tracks are imported as points like the importers do by default, "curve": true
+also connects them and adds the polyline, like the Path option of the panel.
+"origin" can be left out when the opened .blend is georeferenced by BlenderGIS.
+"track_cache" (or --track-cache) is optional: tracks projected before are mapped
+from that folder, which can be the importers' track cache, instead of parsed again.
+Parsing and projection of all inputs run on a process pool, the scenes are built
+through bpy.data and each job is written to its own .blend file.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+PHOTO_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# Sibling modules are imported inside the functions: when Blender runs this file as
+# a script, or a worker process re-imports it, only the package version may use them.
+
+def load_input(item, origin_args, cache_dir=None):
+    """Parse and project one manifest input. Runs in a worker process, without bpy.
+
+    Tracks can carry "bbox" and "time_range" filters; with cache_dir they go
+    through the same track cache as the importers.
+    """
+    import numpy as np
+    from .projection import SceneOrigin
+    from .readers import read_track_chunks, read_archive_track
+    from .exif import scan_geo_photos
+    from .track_cache import TrackCache, load_projected_track
+
+    start = time.perf_counter()
+    origin = SceneOrigin(*origin_args)
+    kind = item["type"]
+    path = item["path"]
+    result = {"type": kind, "path": path}
+
+    if kind in ("gpx", "tcx", "fit", "csv"):
+        bbox = tuple(item["bbox"]) if item.get("bbox") else None
+        time_range = tuple(item["time_range"]) if item.get("time_range") else None
+        cache = TrackCache(cache_dir) if cache_dir else None
+        member = item.get("member")
+        if member:
+            result["member"] = member
+            # One track of a .zip archive, the cache key is the archive plus the member name
+            track = load_projected_track(
+                path, origin, lambda source: read_archive_track(source, member, bbox, time_range),
+                cache=cache, options=(member, bbox, time_range),
+            )
+        elif kind != "csv":
+            track = load_projected_track(
+                path, origin, lambda source: read_track_chunks(source, bbox, time_range),
+                cache=cache, options=(bbox, time_range),
+            )
+        else:
+            # Convert altitude from feet to meters, same as ImportCSVFile
+            track = load_projected_track(
+                path, origin, lambda source: read_track_chunks(source, bbox, time_range), altitude_scale=0.3048,
+                cache=cache, options=(bbox, time_range),
+            )
+        # Memory-mapped cache entries are copied here, they cannot cross the process boundary as maps
+        result["positions"] = np.asarray(track.positions)
+        result["times"] = np.asarray(track.time)
+        result["segments"] = np.asarray(track.segment)
+        result["attributes"] = {name: np.asarray(values) for name, values in track.attributes.items()}
+        result["curve"] = bool(item.get("curve", False))
+    elif kind == "photos":
+        img_paths = [
+            os.path.join(path, name) for name in sorted(os.listdir(path))
+            if os.path.splitext(name)[1].lower() in PHOTO_EXTENSIONS
+        ]
+        photos = [photo for photo in scan_geo_photos(img_paths) if photo is not None]
+        result["photos"] = photos
+        result["positions"] = origin.project(
+            [photo.longitude for photo in photos],
+            [photo.latitude for photo in photos],
+            [photo.altitude for photo in photos],
+        )
+    else:
+        raise ValueError(f"Unknown input type: {kind}")
+
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+def build_job_scene(name, results, origin):
+    """Create a new georeferenced scene holding the imported inputs of one job."""
+    import bpy
+    import numpy as np
+    from .builders import build_geo_image_planes, build_poly_curve, tag_citography
+    from .tracks import track_edges
+    from .utilities import set_mesh_vertices, set_point_attributes
+
+    scene = bpy.data.scenes.new(name)
+    scene["SRID"] = origin.crs
+    scene["crs x"] = origin.x
+    scene["crs y"] = origin.y
+
+    for result in results:
+        if result is None:
+            continue
+        if result["type"] == "photos":
+            build_geo_image_planes(result["photos"], result["positions"], scene.collection)
+            continue
+
+        # Same objects as a manual import with the same options
+        positions = result["positions"]
+        new_mesh = bpy.data.meshes.new(name='data')
+        new_object = bpy.data.objects.new('data_graph', new_mesh)
+        scene.collection.objects.link(new_object)
+        edges = track_edges(len(positions), result["segments"]) if result["curve"] else None
+        set_mesh_vertices(new_mesh, positions, edges)
+        set_point_attributes(new_mesh, result["attributes"])
+        new_object["citography_source"] = (
+            os.path.join(result["path"], result["member"]) if result.get("member") else result["path"]
+        )
+        tag_citography(new_object, "track")
+        if result["curve"] and len(positions):
+            curve_object = build_poly_curve('data_graph_curve', positions, scene.collection, segments=result["segments"])
+            tag_citography(curve_object, "track_curve")
+        valid = result["times"][np.isfinite(result["times"])]
+        if len(valid):
+            new_object["citography_time_start"] = float(valid[0])
+    return scene
+
+def remove_scene(scene):
+    """Remove a written scene and the data only it was using."""
+    import bpy
+    objects = list(scene.collection.all_objects)
+    data = {obj.data for obj in objects if obj.data is not None}
+    bpy.data.scenes.remove(scene)
+    bpy.data.batch_remove(objects)
+    bpy.data.batch_remove([block for block in data if block.users == 0])
+
+def manifest_origin(manifest):
+    """Origin from the manifest, or from the opened .blend when it is georeferenced."""
+    import bpy
+    from .projection import SceneOrigin, WEB_MERCATOR, is_georeferenced
+
+    if "origin" in manifest:
+        origin = manifest["origin"]
+        return SceneOrigin(origin.get("crs", WEB_MERCATOR), origin.get("x", 0.0), origin.get("y", 0.0))
+    if is_georeferenced(bpy.context.scene):
+        return SceneOrigin.from_scene(bpy.context.scene)
+    raise ValueError("The manifest has no origin and the opened scene is not georeferenced")
+
+def expand_archives(inputs):
+    """Replace every "archive" input by one input per track inside the .zip."""
+    from .readers import archive_members, track_format
+
+    expanded = []
+    for item in inputs:
+        if item["type"] != "archive":
+            expanded.append(item)
+            continue
+        for member in archive_members(item["path"]):
+            expanded.append(dict(item, type=track_format(member)[1:], member=member))
+    return expanded
+
+def main(argv=None):
+    import bpy
+
+    if argv is None:
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(prog="blender -b --python batch.py --", description="Citography batch import")
+    parser.add_argument("manifest", help="JSON manifest listing the jobs")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("--track-cache", default=None, help="Track cache folder, overrides the manifest's track_cache")
+    args = parser.parse_args(argv)
+
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+    origin = manifest_origin(manifest)
+    origin_args = (origin.crs, origin.x, origin.y)
+    cache_dir = args.track_cache or manifest.get("track_cache")
+    jobs = manifest["jobs"]
+    for job in jobs:
+        job["inputs"] = expand_archives(job["inputs"])
+    results = [[None] * len(job["inputs"]) for job in jobs]
+    failures = 0
+
+    # Fan all inputs of all jobs out at once, workers are fresh Python processes without bpy
+    started = time.perf_counter()
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context) as executor:
+        futures = {
+            executor.submit(load_input, item, origin_args, cache_dir): (j, i)
+            for j, job in enumerate(jobs)
+            for i, item in enumerate(job["inputs"])
+        }
+        for future in as_completed(futures):
+            j, i = futures[future]
+            item = jobs[j]["inputs"][i]
+            try:
+                result = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"FAILED {item.get('path')}: {e}")
+                continue
+            results[j][i] = result
+            count = len(result["positions"])
+            seconds = result["seconds"]
+            rate = count / seconds if seconds > 0 else 0.0
+            source = os.path.join(result["path"], item["member"]) if item.get("member") else result["path"]
+            print(f"{result['type']:6} {source}: {count} points in {seconds:.2f}s ({rate:,.0f} points/s)")
+
+    for j, job in enumerate(jobs):
+        job_started = time.perf_counter()
+        output = os.path.abspath(job["output"])
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        scene = build_job_scene(os.path.splitext(os.path.basename(output))[0], results[j], origin)
+        bpy.data.libraries.write(output, {scene}, fake_user=True)
+        remove_scene(scene)
+        print(f"wrote {output} in {time.perf_counter() - job_started:.2f}s")
+
+    print(f"{len(jobs)} jobs, {sum(len(job['inputs']) for job in jobs)} inputs, "
+          f"{failures} failed, {time.perf_counter() - started:.2f}s total")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    # Started with `blender -b --python batch.py`: import the add-on package and run its copy
+    import importlib
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, os.path.dirname(package_dir))
+    batch = importlib.import_module(os.path.basename(package_dir) + ".batch")
+    sys.exit(batch.main())
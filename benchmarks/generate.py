@@ -0,0 +1,121 @@
+"""Reproducible synthetic inputs for the benchmarks: GPX and CSV tracks and geotagged JPEGs."""
+import os
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd #CHECK IF INSTALLED
+from PIL import Image #CHECK IF INSTALLED
+from PIL.TiffImagePlugin import IFDRational
+
+# Around the Krakow market square, at a walking pace of one point per second
+CENTER = (50.0617, 19.9373)
+START_TIME = datetime(2024, 5, 1, 8, 0, tzinfo=timezone.utc).timestamp()
+SEGMENT_LENGTH = 50000
+CSV_CHUNK_SIZE = 500000
+
+GPX_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<gpx version="1.1" creator="citography-benchmarks" xmlns="http://www.topografix.com/GPX/1/1">\n'
+    '<trk><name>synthetic</name>\n'
+)
+
+def synthetic_track(count, seed=0):
+    """Random walk of count points: latitude, longitude, elevation in meters and epoch seconds."""
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, 2e-5, size=(count, 2))
+    latitude = CENTER[0] + np.cumsum(steps[:, 0])
+    longitude = CENTER[1] + np.cumsum(steps[:, 1])
+    elevation = 220 + np.cumsum(rng.normal(0, 0.2, size=count))
+    time = START_TIME + np.arange(count, dtype=np.float64)
+    return latitude, longitude, elevation, time
+
+def write_gpx(path, count, seed=0):
+    """GPX 1.1 file with one track, split into a new segment every SEGMENT_LENGTH points."""
+    latitude, longitude, elevation, time = synthetic_track(count, seed)
+    stamps = np.datetime_as_string(time.astype('datetime64[s]'), unit='s')
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(GPX_HEADER)
+        for start in range(0, count, SEGMENT_LENGTH):
+            stop = min(count, start + SEGMENT_LENGTH)
+            f.write('<trkseg>\n')
+            f.writelines(
+                f'<trkpt lat="{latitude[i]:.7f}" lon="{longitude[i]:.7f}"><ele>{elevation[i]:.1f}</ele><time>{stamps[i]}Z</time></trkpt>\n'
+                for i in range(start, stop)
+            )
+            f.write('</trkseg>\n')
+        f.write('</trk>\n</gpx>\n')
+    return path
+
+def write_csv(path, count, seed=0):
+    """CSV in the layout ImportCSVFile reads, altitude in feet and epoch seconds as time."""
+    latitude, longitude, elevation, time = synthetic_track(count, seed)
+    for start in range(0, max(count, 1), CSV_CHUNK_SIZE):
+        stop = min(count, start + CSV_CHUNK_SIZE)
+        pd.DataFrame({
+            'latitude': latitude[start:stop],
+            'longitude': longitude[start:stop],
+            'altitude': elevation[start:stop] / 0.3048,
+            'time': time[start:stop],
+        }).to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False, float_format='%.7f')
+    return path
+
+def to_dms(degrees):
+    degrees = abs(degrees)
+    whole = int(degrees)
+    minutes = int((degrees - whole) * 60)
+    seconds = round(((degrees - whole) * 60 - minutes) * 60 * 10000)
+    return (IFDRational(whole, 1), IFDRational(minutes, 1), IFDRational(seconds, 10000))
+
+def write_photo(path, latitude, longitude, altitude, direction, timestamp, size, color):
+    exif = Image.Exif()
+    gps = exif.get_ifd(0x8825)
+    moment = datetime.fromtimestamp(timestamp, timezone.utc)
+    gps[1] = 'N' if latitude >= 0 else 'S'
+    gps[2] = to_dms(latitude)
+    gps[3] = 'E' if longitude >= 0 else 'W'
+    gps[4] = to_dms(longitude)
+    gps[5] = b'\x00'
+    gps[6] = IFDRational(round(altitude * 10), 10)
+    gps[7] = (IFDRational(moment.hour, 1), IFDRational(moment.minute, 1), IFDRational(moment.second, 1))
+    gps[17] = IFDRational(round(direction * 100), 100)
+    gps[29] = moment.strftime("%Y:%m:%d")
+    image = Image.new('RGB', (size, size * 3 // 4), color)
+    image.save(path, format='JPEG', quality=85, exif=exif)
+
+def write_photos(directory, count, size=1024, seed=0):
+    """Folder of count geotagged JPEGs, size pixels wide, placed along a synthetic track."""
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    latitude, longitude, elevation, time = synthetic_track(max(count, 1) * 30, seed)
+    paths = []
+    for i in range(count):
+        j = i * 30
+        path = os.path.join(directory, f"photo_{i:06d}.jpg")
+        color = tuple(int(c) for c in rng.integers(0, 256, size=3))
+        write_photo(path, latitude[j], longitude[j], elevation[j], rng.uniform(0, 360), time[j], size, color)
+        paths.append(path)
+    return paths
+
+def ensure_inputs(data_dir, track_sizes, photo_count, photo_size, seed=0):
+    """Generate the benchmark inputs once, later runs reuse the files already on disk."""
+    os.makedirs(data_dir, exist_ok=True)
+    inputs = {"gpx": {}, "csv": {}, "photos": None}
+    for count in track_sizes:
+        gpx_path = os.path.join(data_dir, f"track_{count}_{seed}.gpx")
+        if not os.path.exists(gpx_path):
+            write_gpx(gpx_path + ".part", count, seed)
+            os.replace(gpx_path + ".part", gpx_path)
+        inputs["gpx"][count] = gpx_path
+
+        csv_path = os.path.join(data_dir, f"track_{count}_{seed}.csv")
+        if not os.path.exists(csv_path):
+            write_csv(csv_path + ".part", count, seed)
+            os.replace(csv_path + ".part", csv_path)
+        inputs["csv"][count] = csv_path
+
+    if photo_count:
+        photo_dir = os.path.join(data_dir, f"photos_{photo_count}_{photo_size}_{seed}")
+        existing = os.listdir(photo_dir) if os.path.isdir(photo_dir) else []
+        if len(existing) != photo_count:
+            write_photos(photo_dir, photo_count, photo_size, seed)
+        inputs["photos"] = photo_dir
+    return inputs
@@ -0,0 +1,271 @@
+"""Benchmarks of the Citography importers and layouts, compared against stored baselines.
+
+    blender -b --factory-startup --python <add-on folder>/benchmarks/run.py -- [options]
+    python <add-on folder>/benchmarks/run.py [options]
+
+Under Blender every importer and layout operator is timed end to end on a fresh
+georeferenced scene, next to its bpy-free stages (parsing, EXIF reading, projection),
+so the difference is the time spent building datablocks. Plain Python runs the
+bpy-free stages only.
+
+Inputs are generated once into --data and reused. Each case keeps the best of
+--repeat runs and the peak of the Python allocations (tracemalloc, numpy included)
+of one extra run. With --save the results become the new baseline, otherwise every
+case slower or bigger than its baseline by more than --tolerance is reported and
+the exit status is 1.
+"""
+import argparse
+import atexit
+import gc
+import importlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+DEFAULT_SIZES = [1000, 100000, 1000000]
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+# Differences below this are timer noise on small inputs
+MIN_SECONDS_DELTA = 0.005
+
+# Datablocks the operators create, removed again after every run
+ID_COLLECTIONS = ("objects", "meshes", "curves", "materials", "images", "node_groups")
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+def import_addon():
+    """Import the add-on package this folder belongs to."""
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, os.path.dirname(package_dir))
+    name = os.path.basename(package_dir)
+    return importlib.import_module(name), importlib.import_module(name + ".benchmarks.generate")
+
+def measure(func, repeat):
+    """Best wall time of repeat runs and the peak of the Python allocations of one more run."""
+    best = None
+    items = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        items = func()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": best, "peak_mb": peak / 2 ** 20, "items": items}
+
+def stage_cases(addon, inputs):
+    """Cases for the bpy-free stages, runnable in plain Python."""
+    readers = importlib.import_module(addon.__name__ + ".readers")
+    projection = importlib.import_module(addon.__name__ + ".projection")
+    exif = importlib.import_module(addon.__name__ + ".exif")
+    origin = projection.SceneOrigin(projection.WEB_MERCATOR, 2219000.0, 6456000.0)
+    cases = {}
+
+    for count, path in inputs["gpx"].items():
+        def parse_gpx(path=path):
+            return len(readers.read_gpx(path).latitude)
+        cases[f"parse_gpx[{count}]"] = parse_gpx
+
+    for count, path in inputs["csv"].items():
+        def parse_csv(path=path):
+            return len(readers.read_csv_track(path).latitude)
+        cases[f"parse_csv[{count}]"] = parse_csv
+
+    # Cache hits come from a cache of the benchmark's own, the user's track cache is never touched
+    track_cache = importlib.import_module(addon.__name__ + ".track_cache")
+    cache = track_cache.TrackCache(tempfile.mkdtemp(prefix="citography_bench_"))
+    atexit.register(shutil.rmtree, cache.cache_dir, True)
+    for count, path in inputs["gpx"].items():
+        track_cache.load_projected_track(path, origin, readers.read_track_chunks, cache=cache)
+        def track_cache_hit(path=path):
+            return len(track_cache.load_projected_track(path, origin, readers.read_track_chunks, cache=cache).positions)
+        cases[f"track_cache_hit[{count}]"] = track_cache_hit
+
+    for count, path in inputs["gpx"].items():
+        track = readers.read_gpx(path)
+        def project(track=track):
+            return len(origin.project(track.longitude, track.latitude, track.elevation))
+        cases[f"project[{count}]"] = project
+
+    if inputs["photos"]:
+        photo_dir = inputs["photos"]
+        img_paths = [os.path.join(photo_dir, name) for name in sorted(os.listdir(photo_dir))]
+        def exif_scan():
+            return sum(photo is not None for photo in exif.scan_geo_photos(img_paths))
+        cases[f"exif_scan[{len(img_paths)}]"] = exif_scan
+    return cases
+
+def new_datablocks(before):
+    return [
+        block for name in ID_COLLECTIONS
+        for block in getattr(bpy.data, name) if block.as_pointer() not in before
+    ]
+
+def operator_case(operator, setup, count):
+    """Run an operator on the scene and remove everything it created afterwards."""
+    def run():
+        scene = bpy.context.scene
+        setup(scene)
+        before = {block.as_pointer() for name in ID_COLLECTIONS for block in getattr(bpy.data, name)}
+        result = operator()
+        bpy.context.view_layer.update()
+        if result != {'FINISHED'}:
+            raise RuntimeError(f"{operator} returned {result}")
+        bpy.data.batch_remove(new_datablocks(before))
+        return count
+    return run
+
+def blender_cases(inputs):
+    """Cases for the operators, each one runs like the button in the panel."""
+    cases = {}
+
+    def track_setup(path):
+        def setup(scene):
+            scene.path3 = path
+            scene.import_as_curve = False
+            # Every run parses and projects, track_cache_hit times the cache on its own
+            scene.use_track_cache = False
+        return setup
+
+    for count, path in inputs["gpx"].items():
+        cases[f"import_gpx[{count}]"] = operator_case(bpy.ops.some_data.gpx_file, track_setup(path), count)
+    for count, path in inputs["csv"].items():
+        cases[f"import_csv[{count}]"] = operator_case(bpy.ops.some_data.csv_file, track_setup(path), count)
+
+    if inputs["photos"]:
+        photo_dir = inputs["photos"]
+        count = len(os.listdir(photo_dir))
+
+        def photo_setup(atlas=False):
+            def setup(scene):
+                scene.path1 = photo_dir
+                scene.path2 = photo_dir
+                scene.use_photo_cache = False
+                scene.use_proxies = False
+                scene.grid_atlas = atlas
+            return setup
+
+        cases[f"import_geo_images[{count}]"] = operator_case(bpy.ops.object.geo_images_import, photo_setup(), count)
+        cases[f"images_grid[{count}]"] = operator_case(bpy.ops.object.images_grid, photo_setup(), count)
+        cases[f"images_grid_atlas[{count}]"] = operator_case(bpy.ops.object.images_grid, photo_setup(True), count)
+    return cases
+
+def prepare_blender(addon):
+    """Register the add-on when it is not enabled and georeference the scene."""
+    if not hasattr(bpy.types.Scene, "path3"):
+        addon.register()
+    scene = bpy.context.scene
+    scene["SRID"] = "EPSG:3857"
+    scene["crs x"] = 2219000.0
+    scene["crs y"] = 6456000.0
+
+def compare(results, baseline, tolerance):
+    """Print every case next to its baseline, return the names of the regressed cases."""
+    regressions = []
+    print(f"{'case':32} {'seconds':>10} {'baseline':>10} {'peak MB':>10} {'baseline':>10}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        line = f"{name:32} {result['seconds']:10.3f} "
+        line += f"{base['seconds']:10.3f} " if base else f"{'-':>10} "
+        line += f"{result['peak_mb']:10.1f} "
+        line += f"{base['peak_mb']:10.1f}" if base else f"{'-':>10}"
+        if base:
+            slower = result['seconds'] > base['seconds'] * (1 + tolerance) and \
+                result['seconds'] - base['seconds'] > MIN_SECONDS_DELTA
+            bigger = result['peak_mb'] > base['peak_mb'] * (1 + tolerance) and \
+                result['peak_mb'] - base['peak_mb'] > 1
+            if slower or bigger:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line)
+    return regressions
+
+def max_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2 ** 20 if sys.platform == "darwin" else 2 ** 10)
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    parser = argparse.ArgumentParser(description="Citography benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Track sizes in points")
+    parser.add_argument("--photos", type=int, default=200, help="Number of geotagged photos")
+    parser.add_argument("--photo-size", type=int, default=1024, help="Photo width in pixels")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--filter", default="", help="Only run the cases containing this text")
+    parser.add_argument("--data", default=DEFAULT_DATA_DIR, help="Folder of the generated inputs")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown, 0.25 is 25%%")
+    parser.add_argument("--save", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    addon, generate = import_addon()
+    print("Generating inputs...")
+    inputs = generate.ensure_inputs(args.data, args.sizes, args.photos, args.photo_size, args.seed)
+
+    cases = stage_cases(addon, inputs)
+    if bpy is not None:
+        prepare_blender(addon)
+        cases.update(blender_cases(inputs))
+
+    results = {}
+    for name, func in cases.items():
+        if args.filter in name:
+            results[name] = measure(func, args.repeat)
+            print(f"{name}: {results[name]['seconds']:.3f}s")
+
+    report = {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "blender": bpy.app.version_string if bpy is not None else None,
+        "max_rss_mb": max_rss_mb(),
+        "cases": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["cases"]
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save:
+        # Cases left out by --filter or --sizes keep their stored baseline
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(dict(report, cases=baseline), f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} regressions: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
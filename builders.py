@@ -0,0 +1,301 @@
+import os
+import math
+import bpy
+import bmesh
+import numpy as np
+from PIL import Image #CHECK IF INSTALLED
+from .profiling import stage
+
+PLANE_MESH_NAME = "Citography_Plane"
+SPHERE_MESH_NAME = "Citography_Sphere"
+SPHERE_SHADER_NAME = "Citography_SphereShader"
+
+# Custom property marking datablocks created by Citography, the value tells what it is
+CITOGRAPHY_TAG = "citography"
+
+def tag_citography(idblock, kind):
+    idblock[CITOGRAPHY_TAG] = kind
+    return idblock
+
+def image_aspect(img_path):
+    """Width / height of an image, read from the file header only."""
+    try:
+        with Image.open(img_path) as image:
+            width, height = image.size
+    except OSError:
+        return 1.0
+    return width / height if height else 1.0
+
+def load_image(img_path, source_path=None):
+    """Load an image (or the proxy of source_path) once, remembering the original file."""
+    with stage("texture load"):
+        image = bpy.data.images.load(img_path, check_existing=True)
+    image["citography_source"] = source_path or img_path
+    return tag_citography(image, "image")
+
+def get_unit_plane():
+    """Return the 1x1 plane mesh that every image plane shares."""
+    mesh = bpy.data.meshes.get(PLANE_MESH_NAME)
+    if mesh is None:
+        mesh = bpy.data.meshes.new(PLANE_MESH_NAME)
+        mesh.from_pydata([(-0.5, -0.5, 0), (0.5, -0.5, 0), (0.5, 0.5, 0), (-0.5, 0.5, 0)], [], [(0, 1, 2, 3)])
+        uv_layer = mesh.uv_layers.new(name="UVMap")
+        uv_layer.data.foreach_set("uv", (0, 0, 1, 0, 1, 1, 0, 1))
+        # One empty slot, each object links its own material to it
+        mesh.materials.append(None)
+        mesh.update()
+        tag_citography(mesh, "plane")
+    return mesh
+
+def get_image_material(image):
+    """Return the material showing an image, created once per image."""
+    name = f"Citography_{image.name}"
+    material = bpy.data.materials.get(name)
+    if material is not None:
+        return material
+
+    material = bpy.data.materials.new(name=name)
+    material.use_nodes = True
+    material.blend_method = 'BLEND'
+    nodes = material.node_tree.nodes
+    principled = nodes.get("Principled BSDF")
+
+    image_texture = nodes.new(type='ShaderNodeTexImage')
+    image_texture.image = image
+    image_texture.location = (-400, 0)
+
+    noodle = material.node_tree.links.new
+    noodle(image_texture.outputs["Color"], principled.inputs["Base Color"])
+    noodle(image_texture.outputs["Alpha"], principled.inputs["Alpha"])
+    return tag_citography(material, "image")
+
+def build_image_planes(img_paths, locations, collection, rotations=None, scale=1.0, aspects=None, texture_paths=None, kind="image_plane"):
+    """Create one image plane per path through bpy.data, all sharing a single unit plane mesh.
+
+    texture_paths optionally replaces the textures (e.g. by proxies) while the planes keep the originals as source.
+    kind is the tag of the planes, layouts tag theirs so a folder sync only finds its own planes.
+    """
+    plane = get_unit_plane()
+    objects = []
+    for i, img_path in enumerate(img_paths):
+        image = load_image(texture_paths[i] if texture_paths is not None else img_path, img_path)
+        aspect = aspects[i] if aspects is not None else image_aspect(img_path)
+
+        obj = bpy.data.objects.new(os.path.splitext(os.path.basename(img_path))[0], plane)
+        obj.material_slots[0].link = 'OBJECT'
+        obj.material_slots[0].material = get_image_material(image)
+
+        # The shared mesh is 1x1, the aspect ratio of the image lives in the object scale
+        obj.location = locations[i]
+        if rotations is not None:
+            obj.rotation_euler = rotations[i]
+        obj.scale = (scale * aspect, scale, scale)
+
+        obj["citography_source"] = img_path
+        tag_citography(obj, kind)
+        objects.append(obj)
+
+    # Link all objects in one batch
+    with stage("link"):
+        for obj in objects:
+            collection.objects.link(obj)
+    return objects
+
+def build_geo_image_planes(geo_photos, locations, collection, scale_factor=45, texture_paths=None):
+    """Create the planes of geotagged photos at their projected locations, facing their GPS direction."""
+    # Rotate the images towards the direction they were taken in
+    rotations = [(math.radians(85), 0, math.radians(photo.direction)) for photo in geo_photos]
+    aspects = [photo.width / photo.height if photo.height else 1.0 for photo in geo_photos]
+
+    # Scale up the images by the scale factor
+    objects = build_image_planes(
+        [photo.path for photo in geo_photos],
+        [tuple(location) for location in locations],
+        collection,
+        rotations=rotations,
+        scale=scale_factor,
+        aspects=aspects,
+        texture_paths=texture_paths,
+    )
+
+    # Save original position and rotation
+    for obj in objects:
+        obj["original_location"] = obj.location[:]
+        obj["original_rotation"] = obj.rotation_euler[:]
+        tag_citography(obj, "geo_image")
+    return objects
+
+def set_mesh_faces(mesh, coordinates, faces):
+    """Fill an empty mesh with vertices and an (F, 4) array of quads through bulk foreach_set calls."""
+    faces = np.ascontiguousarray(faces, dtype=np.int32)
+    face_count = len(faces)
+    mesh.vertices.add(len(coordinates))
+    mesh.vertices.foreach_set("co", np.ascontiguousarray(coordinates, dtype=np.float32).ravel())
+    mesh.loops.add(faces.size)
+    mesh.loops.foreach_set("vertex_index", faces.ravel())
+    mesh.polygons.add(face_count)
+    mesh.polygons.foreach_set("loop_start", np.arange(0, faces.size, faces.shape[1], dtype=np.int32))
+    # Blender 4 derives loop_total from loop_start, older versions need it set
+    if not mesh.polygons.bl_rna.properties["loop_total"].is_readonly:
+        mesh.polygons.foreach_set("loop_total", np.full(face_count, faces.shape[1], dtype=np.int32))
+    mesh.update(calc_edges=True)
+
+def build_atlas_grid(name, locations, tiles, atlas_files, collection, scale=1.0):
+    """Create a single object holding one textured quad per atlas tile, one material per atlas."""
+    placed = [(location, tile) for location, tile in zip(locations, tiles) if tile is not None]
+    count = len(placed)
+    centers = np.array([location for location, _ in placed], dtype=np.float32).reshape(count, 3)
+    rects = np.array([tile[:6] for _, tile in placed], dtype=np.float32).reshape(count, 6)
+
+    # Quads are 1 unit high and as wide as their image, same as the single planes
+    half_width = rects[:, 5] * scale / 2
+    half_height = np.full(count, scale / 2, dtype=np.float32)
+    corners_x = np.array([-1, 1, 1, -1], dtype=np.float32)
+    corners_y = np.array([-1, -1, 1, 1], dtype=np.float32)
+    coordinates = np.empty((count, 4, 3), dtype=np.float32)
+    coordinates[:, :, 0] = centers[:, None, 0] + corners_x * half_width[:, None]
+    coordinates[:, :, 1] = centers[:, None, 1] + corners_y * half_height[:, None]
+    coordinates[:, :, 2] = centers[:, None, 2]
+
+    uvs = np.empty((count, 4, 2), dtype=np.float32)
+    uvs[:, :, 0] = np.where(corners_x < 0, rects[:, None, 1], rects[:, None, 3])
+    uvs[:, :, 1] = np.where(corners_y < 0, rects[:, None, 2], rects[:, None, 4])
+
+    mesh = bpy.data.meshes.new(name)
+    faces = np.arange(count * 4, dtype=np.int32).reshape(count, 4)
+    set_mesh_faces(mesh, coordinates.reshape(-1, 3), faces)
+    uv_layer = mesh.uv_layers.new(name="UVMap")
+    uv_layer.data.foreach_set("uv", uvs.ravel())
+
+    for atlas_file in atlas_files:
+        mesh.materials.append(get_image_material(load_image(atlas_file)))
+    mesh.polygons.foreach_set("material_index", rects[:, 0].astype(np.int32))
+    mesh.update()
+    tag_citography(mesh, "atlas_grid")
+
+    obj = bpy.data.objects.new(name, mesh)
+    tag_citography(obj, "atlas_grid")
+    collection.objects.link(obj)
+    return obj
+
+def new_group_socket(group, in_out, socket_type, name):
+    """Add an input or output socket to a node group in Blender 3.x and 4.x."""
+    if hasattr(group, "interface"):
+        return group.interface.new_socket(name, in_out=in_out, socket_type=socket_type)
+    sockets = group.inputs if in_out == 'INPUT' else group.outputs
+    return sockets.new(socket_type, name)
+
+def get_unit_sphere():
+    """Return the sphere mesh that every image sphere shares."""
+    mesh = bpy.data.meshes.get(SPHERE_MESH_NAME)
+    if mesh is None:
+        mesh = bpy.data.meshes.new(SPHERE_MESH_NAME)
+        bm = bmesh.new()
+        bmesh.ops.create_uvsphere(bm, u_segments=32, v_segments=16, radius=1, calc_uvs=True)
+        bm.to_mesh(mesh)
+        bm.free()
+        mesh.materials.append(None)
+        tag_citography(mesh, "sphere")
+    return mesh
+
+def get_sphere_shader():
+    """Return the node group shared by all sphere materials: Shader to RGB -> Emission."""
+    group = bpy.data.node_groups.get(SPHERE_SHADER_NAME)
+    if group is not None:
+        return group
+
+    group = bpy.data.node_groups.new(SPHERE_SHADER_NAME, 'ShaderNodeTree')
+    new_group_socket(group, 'INPUT', 'NodeSocketColor', "Color")
+    new_group_socket(group, 'OUTPUT', 'NodeSocketShader', "Shader")
+    nodes = group.nodes
+
+    group_input = nodes.new(type='NodeGroupInput')
+    group_input.location = (-200, 0)
+    shader_to_rgb = nodes.new(type='ShaderNodeShaderToRGB')
+    shader_to_rgb.location = (0, 0)
+    emission = nodes.new(type='ShaderNodeEmission')
+    emission.location = (200, 0)
+    group_output = nodes.new(type='NodeGroupOutput')
+    group_output.location = (400, 0)
+
+    noodle = group.links.new
+    noodle(group_input.outputs["Color"], shader_to_rgb.inputs[0])
+    noodle(shader_to_rgb.outputs["Color"], emission.inputs["Color"])
+    noodle(emission.outputs["Emission"], group_output.inputs["Shader"])
+    return tag_citography(group, "sphere")
+
+def get_sphere_material(image):
+    """Return the sphere material of an image, only the image texture differs between them."""
+    name = f"Citography_Sphere_{image.name}"
+    material = bpy.data.materials.get(name)
+    if material is not None:
+        return material
+
+    material = bpy.data.materials.new(name=name)
+    material.use_nodes = True
+    nodes = material.node_tree.nodes
+    for node in nodes:
+        nodes.remove(node)
+
+    image_texture = nodes.new(type='ShaderNodeTexImage')
+    image_texture.image = image
+    image_texture.location = (-200, 0)
+    shader = nodes.new(type='ShaderNodeGroup')
+    shader.node_tree = get_sphere_shader()
+    shader.location = (0, 0)
+    material_output = nodes.new(type='ShaderNodeOutputMaterial')
+    material_output.location = (200, 0)
+
+    noodle = material.node_tree.links.new
+    noodle(image_texture.outputs["Color"], shader.inputs["Color"])
+    noodle(shader.outputs["Shader"], material_output.inputs["Surface"])
+    return tag_citography(material, "sphere")
+
+def build_image_spheres(img_paths, locations, collection, texture_paths=None):
+    """Create one sphere per image through bpy.data, all sharing one sphere mesh and shader group."""
+    sphere = get_unit_sphere()
+    objects = []
+    for i, img_path in enumerate(img_paths):
+        image = load_image(texture_paths[i] if texture_paths is not None else img_path, img_path)
+
+        obj = bpy.data.objects.new("Sphere", sphere)
+        obj.material_slots[0].link = 'OBJECT'
+        obj.material_slots[0].material = get_sphere_material(image)
+        obj.location = locations[i]
+
+        obj["citography_source"] = img_path
+        tag_citography(obj, "image_sphere")
+        objects.append(obj)
+
+    # Link all objects in one batch
+    with stage("link"):
+        for obj in objects:
+            collection.objects.link(obj)
+    return objects
+
+def build_poly_curve(name, coordinates, collection, resolution=10, segments=None):
+    """Create a POLY curve object through the given (N, 3) points, one bulk foreach_set per spline.
+
+    segments optionally holds a segment index per point, every segment becomes its own spline.
+    """
+    coordinates = np.asarray(coordinates, dtype=np.float32).reshape(-1, 3)
+    curve_data = bpy.data.curves.new(name, type='CURVE')
+    curve_data.dimensions = '3D'
+    curve_data.resolution_u = resolution
+
+    points = np.ones((len(coordinates), 4), dtype=np.float32)
+    points[:, :3] = coordinates
+    if segments is None:
+        bounds = [0, len(coordinates)]
+    else:
+        bounds = np.r_[0, np.flatnonzero(np.diff(segments)) + 1, len(coordinates)]
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if end - start < 1:
+            continue
+        polyline = curve_data.splines.new('POLY')
+        polyline.points.add(end - start - 1)
+        polyline.points.foreach_set("co", points[start:end].ravel())
+
+    curve_object = bpy.data.objects.new(name, curve_data)
+    collection.objects.link(curve_object)
+    return curve_object
@@ -0,0 +1,90 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from PIL import Image #CHECK IF INSTALLED
+
+# EXIF tags read from the image header
+TAG_ORIENTATION = 0x0112
+TAG_EXIF_IFD = 0x8769
+TAG_GPS_IFD = 0x8825
+TAG_DATETIME_ORIGINAL = 0x9003
+
+GPS_LATITUDE_REF = 1
+GPS_LATITUDE = 2
+GPS_LONGITUDE_REF = 3
+GPS_LONGITUDE = 4
+GPS_ALTITUDE_REF = 5
+GPS_ALTITUDE = 6
+GPS_TIMESTAMP = 7
+GPS_IMG_DIRECTION = 17
+GPS_DATESTAMP = 29
+
+# All GPS fields of one photo, read in a single pass; timestamp in UTC epoch seconds or None
+GeoPhoto = namedtuple("GeoPhoto", [
+    "path", "latitude", "longitude", "altitude", "direction",
+    "timestamp", "orientation", "width", "height",
+])
+
+def dms_to_degrees(dms, ref):
+    """Convert an EXIF (degrees, minutes, seconds) triple to signed decimal degrees."""
+    degrees = float(dms[0]) + float(dms[1]) / 60 + float(dms[2]) / 3600
+    if ref in ('S', 'W'):
+        degrees = -degrees
+    return degrees
+
+def exif_timestamp(gps, exif_ifd):
+    """Prefer the UTC GPS date/time, fall back to DateTimeOriginal."""
+    try:
+        if GPS_DATESTAMP in gps and GPS_TIMESTAMP in gps:
+            hours, minutes, seconds = (float(v) for v in gps[GPS_TIMESTAMP])
+            day = datetime.strptime(gps[GPS_DATESTAMP], "%Y:%m:%d").replace(tzinfo=timezone.utc)
+            return day.timestamp() + hours * 3600 + minutes * 60 + seconds
+        original = exif_ifd.get(TAG_DATETIME_ORIGINAL)
+        if original:
+            moment = datetime.strptime(original, "%Y:%m:%d %H:%M:%S").replace(tzinfo=timezone.utc)
+            return moment.timestamp()
+    except (ValueError, TypeError):
+        pass
+    return None
+
+def read_geo_photo(img_path, raise_errors=False):
+    """Read the GPS fields of one image from its metadata only, None if it has no GPS position.
+
+    With raise_errors an OSError while reading the file is raised instead of returning None,
+    so a locked or unreachable file is not taken for a photo without GPS.
+    """
+    try:
+        # Image.open only parses the header, pixel data is never decoded here
+        with Image.open(img_path) as image:
+            width, height = image.size
+            exif = image.getexif()
+            gps = exif.get_ifd(TAG_GPS_IFD)
+            if GPS_LATITUDE not in gps or GPS_LONGITUDE not in gps:
+                return None
+            exif_ifd = exif.get_ifd(TAG_EXIF_IFD)
+
+            altitude = float(gps.get(GPS_ALTITUDE, 0))
+            if gps.get(GPS_ALTITUDE_REF) in (1, b'\x01'):
+                altitude = -altitude
+
+            return GeoPhoto(
+                path=img_path,
+                latitude=dms_to_degrees(gps[GPS_LATITUDE], gps.get(GPS_LATITUDE_REF)),
+                longitude=dms_to_degrees(gps[GPS_LONGITUDE], gps.get(GPS_LONGITUDE_REF)),
+                altitude=altitude,
+                direction=float(gps.get(GPS_IMG_DIRECTION, 0)),
+                timestamp=exif_timestamp(gps, exif_ifd),
+                orientation=int(exif.get(TAG_ORIENTATION, 1)),
+                width=width,
+                height=height,
+            )
+    except (OSError, ValueError, TypeError, ZeroDivisionError) as e:
+        if raise_errors and isinstance(e, OSError):
+            raise
+        print(f"Error reading EXIF of {img_path}: {e}")
+        return None
+
+def scan_geo_photos(img_paths, max_workers=None):
+    """Read the GPS fields of many images on a thread pool, results keep the order of img_paths."""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(read_geo_photo, img_paths))
@@ -0,0 +1,85 @@
+import hashlib
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# Only the head and tail of a file are hashed, enough to recognise a moved photo
+HASH_BLOCK = 1 << 20
+
+# What a folder sync has to do. new and changed are file paths, moved are (old source, new path)
+# pairs, unchanged and missing are the sources of already imported objects
+SyncPlan = namedtuple("SyncPlan", ["new", "changed", "moved", "unchanged", "missing", "signatures", "hashes"])
+
+def file_signature(path):
+    """Size and modification time of a file as one string, custom properties cannot hold 64 bit ints."""
+    st = os.stat(path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+def content_hash(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        digest.update(str(size).encode("utf-8"))
+        f.seek(0)
+        digest.update(f.read(HASH_BLOCK))
+        if size > HASH_BLOCK:
+            f.seek(max(HASH_BLOCK, size - HASH_BLOCK))
+            digest.update(f.read(HASH_BLOCK))
+    return digest.hexdigest()
+
+def if_present(read):
+    """Wrap a file reader to return None for a file that was deleted after the folder was listed."""
+    def wrapper(path):
+        try:
+            return read(path)
+        except FileNotFoundError:
+            return None
+    return wrapper
+
+def plan_sync(paths, imported, max_workers=None):
+    """Compare the files of a folder with what was imported from it.
+
+    imported maps the source path of every imported object to its recorded
+    (signature, hash); either may be None for objects imported before syncing existed,
+    those count as unchanged. Only new and changed files are hashed. Files that
+    vanish while the folder is compared count as not being in it.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        signatures = {
+            path: signature for path, signature in zip(paths, executor.map(if_present(file_signature), paths))
+            if signature is not None
+        }
+        paths = [path for path in paths if path in signatures]
+
+        new, changed, unchanged = [], [], []
+        for path in paths:
+            if path not in imported:
+                new.append(path)
+            elif imported[path][0] in (None, signatures[path]):
+                unchanged.append(path)
+            else:
+                changed.append(path)
+
+        present = set(paths)
+        missing = [source for source in imported if source not in present]
+        hashes = dict(zip(new + changed, executor.map(if_present(content_hash), new + changed)))
+        vanished_now = {path for path, digest in hashes.items() if digest is None}
+        if vanished_now:
+            hashes = {path: digest for path, digest in hashes.items() if digest is not None}
+            new = [path for path in new if path not in vanished_now]
+            changed = [path for path in changed if path not in vanished_now]
+            missing += [path for path in vanished_now if path in imported]
+
+    # A new file with the content of a vanished one was moved or renamed
+    vanished = {imported[source][1]: source for source in missing if imported[source][1] is not None}
+    moved = []
+    added = []
+    for path in new:
+        source = vanished.pop(hashes[path], None)
+        if source is None:
+            added.append(path)
+        else:
+            moved.append((source, path))
+    moved_sources = {source for source, _ in moved}
+    missing = [source for source in missing if source not in moved_sources]
+    return SyncPlan(added, changed, moved, unchanged, missing, signatures, hashes)
@@ -0,0 +1,105 @@
+import math
+import uuid
+import bpy
+from bpy.app.handlers import persistent
+from mathutils import Vector
+from .builders import build_poly_curve, tag_citography
+from .simplify import simplify_levels
+
+# Object names of every LOD group, so the handlers never have to walk all objects of the scene
+_lod_groups = {}
+
+def build_lod_curves(name, coordinates, collection, tolerance, levels, method, resolution=10):
+    """Create one POLY curve per level of detail, level 0 holds the full track."""
+    # Groups are keyed by an id of their own, simplifying the same mesh again makes a second group
+    group = uuid.uuid4().hex
+    objects = []
+    for level, indices in enumerate(simplify_levels(coordinates, tolerance, levels, method)):
+        curve_object = build_poly_curve(f"{name}_LOD{level}", coordinates[indices], collection, resolution)
+        curve_object["citography_lod_group"] = group
+        curve_object["citography_lod"] = level
+        tag_citography(curve_object, "track_curve")
+        objects.append(curve_object)
+    _lod_groups[group] = [obj.name for obj in objects]
+    return objects
+
+def register_lod_groups():
+    """Rebuild the LOD registry from the objects of the open file."""
+    _lod_groups.clear()
+    for obj in bpy.data.objects:
+        group = obj.get("citography_lod_group")
+        if group is not None:
+            _lod_groups.setdefault(group, []).append(obj.name)
+
+def lod_groups(scene):
+    """The objects of every registered LOD group in a scene, removed objects are dropped from the registry."""
+    groups = {}
+    for group, names in list(_lod_groups.items()):
+        alive = [name for name in names if name in bpy.data.objects]
+        if not alive:
+            del _lod_groups[group]
+            continue
+        _lod_groups[group] = alive
+        objects = [scene.objects.get(name) for name in alive]
+        objects = [obj for obj in objects if obj is not None]
+        if objects:
+            groups[group] = objects
+    return groups
+
+def lod_level_for_distance(distance, lod_distance, levels):
+    """Full detail below lod_distance, one level coarser each time the distance doubles."""
+    if distance < lod_distance:
+        return 0
+    return min(levels - 1, int(math.log2(distance / lod_distance)) + 1)
+
+def apply_lod(scene):
+    """Show one level of detail of every LOD group, picked by the panel setting or the camera."""
+    groups = lod_groups(scene)
+    camera = scene.camera
+    for objects in groups.values():
+        levels = max(obj["citography_lod"] for obj in objects) + 1
+        if scene.lod_mode == 'CAMERA' and camera is not None:
+            # Distance to the center of the full detail bounds
+            full = min(objects, key=lambda obj: obj["citography_lod"])
+            center = sum((Vector(corner) for corner in full.bound_box), Vector()) / 8
+            center = full.matrix_world @ center
+            distance = (camera.matrix_world.translation - center).length
+            level = lod_level_for_distance(distance, scene.lod_distance, levels)
+        else:
+            level = min(scene.track_lod, levels - 1)
+
+        for obj in objects:
+            hidden = obj["citography_lod"] != level
+            # Only write when it changes, so the handler does not trigger itself again
+            if obj.hide_viewport != hidden:
+                obj.hide_viewport = hidden
+            if obj.hide_render != hidden:
+                obj.hide_render = hidden
+
+@persistent
+def lod_update_handler(scene, depsgraph=None):
+    """Pick the levels again when the camera, a LOD curve or the scene settings changed."""
+    if scene.lod_mode != 'CAMERA' or not _lod_groups:
+        return
+    if depsgraph is not None:
+        watched = {name for names in _lod_groups.values() for name in names}
+        if scene.camera is not None:
+            watched.add(scene.camera.name)
+        if not any(
+            isinstance(update.id, bpy.types.Scene)
+            or (update.is_updated_transform and isinstance(update.id, bpy.types.Object) and update.id.name in watched)
+            for update in depsgraph.updates
+        ):
+            return
+    apply_lod(scene)
+
+@persistent
+def lod_frame_handler(scene, depsgraph=None):
+    # An animated camera moves without showing up in the updates of the frame change
+    if scene.lod_mode == 'CAMERA' and _lod_groups:
+        apply_lod(scene)
+
+@persistent
+def lod_load_handler(*args):
+    # Also after undo and redo, which bring back curves dropped from the registry
+    register_lod_groups()
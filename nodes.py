@@ -0,0 +1,153 @@
+import bpy
+from .builders import new_group_socket, tag_citography
+
+POINT_MARKERS_NAME = "Citography_PointMarkers"
+REVEAL_BY_TIME_NAME = "Citography_RevealByTime"
+
+def set_modifier_input(modifier, name, value):
+    """Set an input of a geometry nodes modifier by its socket name."""
+    group = modifier.node_group
+    if hasattr(group, "interface"):
+        identifier = next(
+            item.identifier for item in group.interface.items_tree
+            if item.item_type == 'SOCKET' and item.in_out == 'INPUT' and item.name == name
+        )
+    else:
+        identifier = group.inputs[name].identifier
+    modifier[identifier] = value
+
+def get_point_markers_group():
+    """Return the node group instancing a marker on every point, scaled by a point attribute."""
+    group = bpy.data.node_groups.get(POINT_MARKERS_NAME)
+    if group is not None:
+        return group
+
+    group = bpy.data.node_groups.new(POINT_MARKERS_NAME, 'GeometryNodeTree')
+    new_group_socket(group, 'INPUT', 'NodeSocketGeometry', "Geometry")
+    new_group_socket(group, 'INPUT', 'NodeSocketString', "Attribute")
+    new_group_socket(group, 'INPUT', 'NodeSocketFloat', "Marker Size")
+    new_group_socket(group, 'INPUT', 'NodeSocketFloat', "Min Scale")
+    new_group_socket(group, 'INPUT', 'NodeSocketFloat', "Max Scale")
+    new_group_socket(group, 'OUTPUT', 'NodeSocketGeometry', "Geometry")
+    nodes = group.nodes
+    noodle = group.links.new
+
+    group_input = nodes.new(type='NodeGroupInput')
+    group_input.location = (-800, 0)
+
+    # Read the attribute and normalize it over the whole track
+    named_attribute = nodes.new(type='GeometryNodeInputNamedAttribute')
+    named_attribute.data_type = 'FLOAT'
+    named_attribute.location = (-600, -200)
+    statistic = nodes.new(type='GeometryNodeAttributeStatistic')
+    statistic.data_type = 'FLOAT'
+    statistic.domain = 'POINT'
+    statistic.location = (-400, -100)
+    map_range = nodes.new(type='ShaderNodeMapRange')
+    map_range.location = (-200, -200)
+    # Keeps the range open when every point has the same value (or the attribute is missing)
+    widen = nodes.new(type='ShaderNodeMath')
+    widen.operation = 'ADD'
+    widen.inputs[1].default_value = 1e-6
+    widen.location = (-400, -300)
+    multiply = nodes.new(type='ShaderNodeMath')
+    multiply.operation = 'MULTIPLY'
+    multiply.location = (0, -200)
+
+    marker = nodes.new(type='GeometryNodeMeshIcoSphere')
+    marker.inputs["Radius"].default_value = 1.0
+    marker.inputs["Subdivisions"].default_value = 1
+    marker.location = (0, 0)
+    instance_on_points = nodes.new(type='GeometryNodeInstanceOnPoints')
+    instance_on_points.location = (200, 0)
+    group_output = nodes.new(type='NodeGroupOutput')
+    group_output.location = (400, 0)
+
+    noodle(group_input.outputs["Attribute"], named_attribute.inputs["Name"])
+    noodle(group_input.outputs["Geometry"], statistic.inputs["Geometry"])
+    noodle(named_attribute.outputs["Attribute"], statistic.inputs[2])
+    noodle(named_attribute.outputs["Attribute"], map_range.inputs[0])
+    noodle(statistic.outputs["Min"], map_range.inputs[1])
+    noodle(statistic.outputs["Max"], widen.inputs[0])
+    noodle(widen.outputs[0], map_range.inputs[2])
+    noodle(group_input.outputs["Min Scale"], map_range.inputs[3])
+    noodle(group_input.outputs["Max Scale"], map_range.inputs[4])
+    noodle(map_range.outputs[0], multiply.inputs[0])
+    noodle(group_input.outputs["Marker Size"], multiply.inputs[1])
+
+    noodle(group_input.outputs["Geometry"], instance_on_points.inputs["Points"])
+    noodle(marker.outputs["Mesh"], instance_on_points.inputs["Instance"])
+    noodle(multiply.outputs[0], instance_on_points.inputs["Scale"])
+    noodle(instance_on_points.outputs["Instances"], group_output.inputs["Geometry"])
+    return tag_citography(group, "point_markers")
+
+def add_point_markers(obj, attribute, marker_size, min_scale=0.5, max_scale=2.0):
+    """Instance a marker on every vertex of obj with a geometry nodes modifier."""
+    modifier = obj.modifiers.new("Citography Markers", 'NODES')
+    modifier.node_group = get_point_markers_group()
+    set_modifier_input(modifier, "Attribute", attribute)
+    set_modifier_input(modifier, "Marker Size", marker_size)
+    set_modifier_input(modifier, "Min Scale", min_scale)
+    set_modifier_input(modifier, "Max Scale", max_scale)
+    return modifier
+
+def get_reveal_group():
+    """Return the node group hiding every point recorded after the current scene time."""
+    group = bpy.data.node_groups.get(REVEAL_BY_TIME_NAME)
+    if group is not None:
+        return group
+
+    group = bpy.data.node_groups.new(REVEAL_BY_TIME_NAME, 'GeometryNodeTree')
+    new_group_socket(group, 'INPUT', 'NodeSocketGeometry', "Geometry")
+    new_group_socket(group, 'INPUT', 'NodeSocketFloat', "Speed-up")
+    new_group_socket(group, 'INPUT', 'NodeSocketFloat', "Offset")
+    new_group_socket(group, 'OUTPUT', 'NodeSocketGeometry', "Geometry")
+    nodes = group.nodes
+    noodle = group.links.new
+
+    group_input = nodes.new(type='NodeGroupInput')
+    group_input.location = (-800, 0)
+    scene_time = nodes.new(type='GeometryNodeInputSceneTime')
+    scene_time.location = (-800, -200)
+
+    # Track time shown at this frame: seconds * speed-up - offset
+    multiply = nodes.new(type='ShaderNodeMath')
+    multiply.operation = 'MULTIPLY'
+    multiply.location = (-600, -200)
+    subtract = nodes.new(type='ShaderNodeMath')
+    subtract.operation = 'SUBTRACT'
+    subtract.location = (-400, -200)
+
+    point_time = nodes.new(type='GeometryNodeInputNamedAttribute')
+    point_time.data_type = 'FLOAT'
+    point_time.inputs["Name"].default_value = "time"
+    point_time.location = (-400, -400)
+    compare = nodes.new(type='FunctionNodeCompare')
+    compare.data_type = 'FLOAT'
+    compare.operation = 'GREATER_THAN'
+    compare.location = (-200, -300)
+
+    delete = nodes.new(type='GeometryNodeDeleteGeometry')
+    delete.domain = 'POINT'
+    delete.location = (0, 0)
+    group_output = nodes.new(type='NodeGroupOutput')
+    group_output.location = (200, 0)
+
+    noodle(scene_time.outputs["Seconds"], multiply.inputs[0])
+    noodle(group_input.outputs["Speed-up"], multiply.inputs[1])
+    noodle(multiply.outputs[0], subtract.inputs[0])
+    noodle(group_input.outputs["Offset"], subtract.inputs[1])
+    noodle(point_time.outputs["Attribute"], compare.inputs[0])
+    noodle(subtract.outputs[0], compare.inputs[1])
+    noodle(group_input.outputs["Geometry"], delete.inputs["Geometry"])
+    noodle(compare.outputs["Result"], delete.inputs["Selection"])
+    noodle(delete.outputs["Geometry"], group_output.inputs["Geometry"])
+    return tag_citography(group, "reveal")
+
+def add_reveal_by_time(obj, speedup, offset=0.0):
+    """Grow the track with the scene frame, driven only by its time attribute."""
+    modifier = obj.modifiers.new("Citography Reveal", 'NODES')
+    modifier.node_group = get_reveal_group()
+    set_modifier_input(modifier, "Speed-up", speedup)
+    set_modifier_input(modifier, "Offset", offset)
+    return modifier
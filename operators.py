@@ -1,18 +1,37 @@
 import os
+import glob
 import math
+import multiprocessing
+import zipfile
 import random
-import pandas as pd #CHECK IF INSTALLED
+import time
+import uuid
+import numpy as np
 import bpy
-import bmesh
 import bpy_extras.io_utils
 from bpy.types import Operator
-from bpy.props import StringProperty, FloatProperty
-from PIL import Image #CHECK IF INSTALLED
-from pyproj import Transformer #CHECK IF INSTALLED
-from PIL.ExifTags import TAGS, GPSTAGS
 from .utilities import *
+from .builders import build_image_planes, build_geo_image_planes, build_atlas_grid, build_image_spheres, build_poly_curve, load_image, get_image_material, get_sphere_material, tag_citography, CITOGRAPHY_TAG
+from .atlas import pack_atlases
+from .nodes import add_point_markers, add_reveal_by_time, set_modifier_input
+from .tracks import track_edges, merge_tracks
+from .lod import build_lod_curves, apply_lod, register_lod_groups, lod_update_handler, lod_frame_handler, lod_load_handler
+from .tiles import build_tiled_layer, create_tiled_layer, write_tiles, update_tiles, remove_unused_tile_dirs, register_tile_layers, tile_update_handler, tile_load_handler
+from .spatial_index import nearest_photo, photos_in_radius, photos_near_track, clear_indexes, index_update_handler, index_reset_handler
+from .proxies import make_proxy, make_proxies, proxy_size_for_budget, is_proxy
+from .projection import SceneOrigin, is_georeferenced
+from .readers import read_track_chunks, read_track_stream, track_format, archive_members, parse_time, track_duration
+from .exif import scan_geo_photos
+from .photo_cache import PhotoCache, scan_geo_photos_cached
+from .profiling import stage, bind_profile, instrument, profiles, export_json, export_chrome_trace
+from . import background
+from .background import Progress, ProgressFile, chunks
+from .folder_sync import plan_sync
+from .track_cache import TrackCache, load_projected_track, stream_projected_track
+from .batch import load_input
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import xml.etree.ElementTree as ET #for strava files
-from datetime import datetime
+from datetime import timedelta
 
 IMAGE_SCALE = (8, 8, 8)
 TRANSFORM_PIVOT_POINT = 'INDIVIDUAL_ORIGINS'
@@ -41,6 +60,13 @@ properties = {
         maxlen=1024,
         subtype='FILE_PATH'
     ),
+    "path4": bpy.props.StringProperty(
+        name="Path4",
+        description="A folder of tracks, a glob like /rides/*.gpx or a .zip export",
+        default="",
+        maxlen=1024,
+        subtype='DIR_PATH'
+    ),
     "spacing": bpy.props.FloatProperty(
         name="Spacing",
         description="Space between images in the grid",
@@ -64,22 +90,299 @@ properties = {
         name="CSV Duration",
         description="Duration extracted from CSV file",
         default=""
+    ),
+    "use_photo_cache": bpy.props.BoolProperty(
+        name="Use metadata cache",
+        description="Keep the GPS data of photos on disk and skip reading unchanged files",
+        default=True
+    ),
+    "use_proxies": bpy.props.BoolProperty(
+        name="Use proxies",
+        description="Load downscaled copies of the images as textures",
+        default=True
+    ),
+    "proxy_size": bpy.props.IntProperty(
+        name="Proxy size",
+        description="Longest side of a proxy texture in pixels",
+        default=1024,
+        min=128,
+        max=8192
+    ),
+    "grid_atlas": bpy.props.BoolProperty(
+        name="Atlas",
+        description="Pack all images into a few atlas textures on a single mesh",
+        default=False
+    ),
+    "atlas_tile_size": bpy.props.IntProperty(
+        name="Tile size",
+        description="Size of one image in the atlas in pixels",
+        default=256,
+        min=32,
+        max=2048
+    ),
+    "sphere_instancing": bpy.props.BoolProperty(
+        name="Shared sphere",
+        description="Let all image spheres share one mesh and one shader template",
+        default=True
+    ),
+    "import_as_curve": bpy.props.BoolProperty(
+        name="Path",
+        description="Also connect the imported points in recorded order and create a polyline from them",
+        default=False
+    ),
+    "reveal_by_time": bpy.props.BoolProperty(
+        name="Reveal by time",
+        description="Grow imported tracks with the scene frame using their time attribute",
+        default=False
+    ),
+    "reveal_speedup": bpy.props.FloatProperty(
+        name="Speed-up",
+        description="Seconds of the recording played back per second of animation",
+        default=60.0,
+        min=0.001,
+        max=1000000.0
+    ),
+    "point_instancing": bpy.props.BoolProperty(
+        name="Markers",
+        description="Instance a marker on every imported point with geometry nodes",
+        default=False
+    ),
+    "marker_attribute": bpy.props.EnumProperty(
+        name="Marker scale",
+        description="Point attribute that drives the size of the markers",
+        items=[
+            ('altitude', "Altitude", "Scale markers by altitude"),
+            ('speed', "Speed", "Scale markers by speed"),
+            ('time', "Time", "Scale markers by time since the start"),
+            ('distance', "Distance", "Scale markers by distance from the start"),
+        ],
+        default='altitude'
+    ),
+    "marker_size": bpy.props.FloatProperty(
+        name="Marker size",
+        description="Radius of the point markers",
+        default=2.0,
+        min=0.01,
+        max=100.0
+    ),
+    "path_simplify": bpy.props.BoolProperty(
+        name="Simplify",
+        description="Build simplified levels of detail of the polyline",
+        default=False
+    ),
+    "simplify_method": bpy.props.EnumProperty(
+        name="Method",
+        description="Line simplification algorithm",
+        items=[
+            ('DOUGLAS_PEUCKER', "Douglas-Peucker", "Keep points farther than the tolerance from the simplified line"),
+            ('VISVALINGAM', "Visvalingam-Whyatt", "Drop points enclosing the smallest areas first"),
+        ],
+        default='DOUGLAS_PEUCKER'
+    ),
+    "simplify_tolerance": bpy.props.FloatProperty(
+        name="Tolerance",
+        description="Tolerance of the first simplified level in meters, every next level is 4 times coarser",
+        default=5.0,
+        min=0.01,
+        max=10000.0,
+        unit='LENGTH'
+    ),
+    "lod_levels": bpy.props.IntProperty(
+        name="Levels",
+        description="Number of levels of detail, level 0 is the full track",
+        default=4,
+        min=2,
+        max=8
+    ),
+    "lod_mode": bpy.props.EnumProperty(
+        name="LOD",
+        description="How the shown level of detail is picked",
+        items=[
+            ('MANUAL', "Manual", "Show the level set in the panel"),
+            ('CAMERA', "Camera", "Pick the level by the distance to the active camera"),
+        ],
+        default='MANUAL',
+        update=lambda self, context: apply_lod(self)
+    ),
+    "track_lod": bpy.props.IntProperty(
+        name="Level",
+        description="Level of detail shown in manual mode",
+        default=0,
+        min=0,
+        max=7,
+        update=lambda self, context: apply_lod(self)
+    ),
+    "lod_distance": bpy.props.FloatProperty(
+        name="Distance",
+        description="Camera distance up to which the full track is shown, each doubling shows a coarser level",
+        default=500.0,
+        min=1.0,
+        unit='LENGTH'
+    ),
+    "search_radius": bpy.props.FloatProperty(
+        name="Radius",
+        description="Search radius around the 3D cursor or the track",
+        default=100.0,
+        min=0.0,
+        unit='LENGTH'
+    ),
+    "texture_budget": bpy.props.IntProperty(
+        name="Texture budget",
+        description="Texture memory in MB that the proxies of one import may use",
+        default=2048,
+        min=64,
+        max=65536
+    ),
+    "track_filter": bpy.props.BoolProperty(
+        name="Filter",
+        description="Only import the points inside the bounding box and the time range",
+        default=False
+    ),
+    "filter_min_lat": bpy.props.FloatProperty(name="Min latitude", default=-90.0, min=-90.0, max=90.0, precision=6),
+    "filter_max_lat": bpy.props.FloatProperty(name="Max latitude", default=90.0, min=-90.0, max=90.0, precision=6),
+    "filter_min_lon": bpy.props.FloatProperty(name="Min longitude", default=-180.0, min=-180.0, max=180.0, precision=6),
+    "filter_max_lon": bpy.props.FloatProperty(name="Max longitude", default=180.0, min=-180.0, max=180.0, precision=6),
+    "filter_start": bpy.props.StringProperty(
+        name="From",
+        description="ISO 8601 time of the first point to import, empty for the start of the track",
+        default=""
+    ),
+    "filter_end": bpy.props.StringProperty(
+        name="To",
+        description="ISO 8601 time of the last point to import, empty for the end of the track",
+        default=""
+    ),
+    "use_track_cache": bpy.props.BoolProperty(
+        name="Track cache",
+        description="Keep parsed and projected tracks on disk, importing the same file again skips parsing",
+        default=True
+    ),
+    "tiled_import": bpy.props.BoolProperty(
+        name="Tiled",
+        description="Import the points into tiles on disk, only the tiles the camera sees are loaded",
+        default=False
+    ),
+    "tile_points": bpy.props.IntProperty(
+        name="Points per tile",
+        description="Most points one tile holds",
+        default=65536,
+        min=1024
+    ),
+    "tile_distance": bpy.props.FloatProperty(
+        name="Tile distance",
+        description="Camera distance up to which tiles show all their points, an overview up to 4 times as far",
+        default=1000.0,
+        min=1.0,
+        unit='LENGTH'
+    ),
+    "tile_budget": bpy.props.IntProperty(
+        name="Point budget",
+        description="Most points loaded at once over all tiled layers",
+        default=5000000,
+        min=10000
+    ),
+    "import_workers": bpy.props.IntProperty(
+        name="Workers",
+        description="Processes parsing the tracks of a folder, 0 uses every core",
+        default=0,
+        min=0,
+        max=64
+    ),
+    "per_track_objects": bpy.props.BoolProperty(
+        name="Per-track objects",
+        description="Also create one object per track file, next to the merged layer",
+        default=False
+    ),
+    "sync_folder": bpy.props.BoolProperty(
+        name="Sync",
+        description="Only import the files that are new or changed since the last import of the folder",
+        default=False
+    ),
+    "sync_remove_missing": bpy.props.BoolProperty(
+        name="Remove missing",
+        description="When syncing, remove the objects whose file is no longer in the folder",
+        default=False
+    ),
+    "modal_import": bpy.props.BoolProperty(
+        name="In background",
+        description="Import without freezing Blender, with a progress bar and Esc to cancel",
+        default=False
+    ),
+    "profile_operators": bpy.props.BoolProperty(
+        name="Profile operators",
+        description="Time the stages of every Citography operator and keep the last runs",
+        default=False
+    ),
+    "profile_memory": bpy.props.BoolProperty(
+        name="Count allocations",
+        description="Also trace the Python memory allocated in every stage, slows the operators down",
+        default=False
+    ),
+    "clean_citography_only": bpy.props.BoolProperty(
+        name="Only Citography data",
+        description="Clean only the objects and data Citography created, keep everything else in the scene",
+        default=False
     )
 }
 
+PHOTO_CACHE_FILE = "photos.sqlite"
+
+def object_datablocks(objects):
+    """Data used by objects, in the order it can be freed: object data, materials, node groups, images."""
+    data = {obj.data for obj in objects if obj.data is not None}
+    materials = {slot.material for obj in objects for slot in obj.material_slots if slot.material is not None}
+    node_groups = {
+        modifier.node_group for obj in objects for modifier in obj.modifiers
+        if modifier.type == 'NODES' and modifier.node_group is not None
+    }
+    trees = [material.node_tree for material in materials if material.node_tree is not None]
+    # Shader groups inside the materials (the sphere shader) and the images of all those trees
+    node_groups |= {node.node_tree for tree in trees for node in tree.nodes if node.type == 'GROUP' and node.node_tree is not None}
+    images = {
+        node.image for tree in trees + list(node_groups)
+        for node in tree.nodes if node.type == 'TEX_IMAGE' and node.image is not None
+    }
+    return [data, materials, node_groups, images]
+
+def citography_orphans():
+    """Citography datablocks nothing uses anymore, left behind by earlier imports and deletes.
+
+    Yields one list per type, each after the types using it were removed.
+    """
+    for blocks in (bpy.data.meshes, bpy.data.curves, bpy.data.materials, bpy.data.node_groups, bpy.data.images):
+        yield [block for block in blocks if block.users == 0 and block.get(CITOGRAPHY_TAG)]
+
 class CleanTheScene(bpy.types.Operator):
     bl_idname = "object.cleanthescene"
     bl_label = " Clean the scene "
     
     def execute(self, context):
         print("Operator CleanTheScene is called!")
+        scene = context.scene
         try:
-            bpy.ops.object.select_all(action='SELECT')
-            bpy.ops.object.delete()
-            
+            started = time.perf_counter()
+            if scene.clean_citography_only:
+                objects = [obj for obj in scene.objects if obj.get(CITOGRAPHY_TAG)]
+            else:
+                objects = list(scene.objects)
+            # Removed on the data level in a few batches, the data the objects leave unused goes with them
+            with stage("remove"):
+                removed = remove_imported(objects)
+                for blocks in citography_orphans():
+                    bpy.data.batch_remove(blocks)
+                    removed += len(blocks)
+                empty = [
+                    collection for collection in bpy.data.collections
+                    if collection.get(CITOGRAPHY_TAG) and not collection.objects and not collection.children
+                ]
+                bpy.data.batch_remove(empty)
+
             # Push an undo step
             bpy.ops.ed.undo_push(message="Delete All Objects")
-            
+            self.report(
+                {'INFO'},
+                f"Removed {len(objects)} objects and {removed} datablocks in {time.perf_counter() - started:.2f}s",
+            )
         except Exception as e:
             self.report({'ERROR'}, f"An error occurred: {e}")
         return {'FINISHED'}
@@ -121,7 +424,7 @@ class AddRandomImage(Operator):
         
         # Error handling for directory check and file retrieval
         if os.path.isdir(path_for_images):
-            all_images = os.listdir(path_for_images)  
+            all_images = get_all_images(path_for_images)
         else:
             self.report({'WARNING'}, f"The path {path_for_images} is not a valid directory.")
             return {'CANCELLED'}
@@ -130,10 +433,8 @@ class AddRandomImage(Operator):
             if all_images:
                 random_image = random.choice(all_images)
                 print(f"Adding a random image: {random_image}")
-                enable_addon("io_import_images_as_planes")
-                import_images_as_plane(os.path.join(path_for_images, random_image))
-                if context.object:
-                    context.object.scale = IMAGE_SCALE
+                obj = build_image_planes([random_image], [(0, 0, 0)], context.collection, scale=IMAGE_SCALE[0])[0]
+                context.view_layer.objects.active = obj
             else:
                 self.report({'WARNING'}, "No images found in the specified directories.")
         except Exception as e: 
@@ -142,6 +443,84 @@ class AddRandomImage(Operator):
 
         return {'FINISHED'}
 
+def grid_locations(count, start, spacing):
+    """Rows of a square grid going right and down from start."""
+    grid_size = max(1, int(math.sqrt(count)))
+    return [
+        (start[0] + (i % grid_size) * spacing, start[1] - (i // grid_size) * spacing, start[2])
+        for i in range(count)
+    ]
+
+def folder_imports(scene, kind, folder):
+    """Objects of one kind imported from the files of a folder, by source file."""
+    folder = os.path.normpath(folder)
+    return {
+        obj["citography_source"]: obj for obj in scene.objects
+        if obj.get(CITOGRAPHY_TAG) == kind and "citography_source" in obj
+        and os.path.dirname(os.path.normpath(obj["citography_source"])) == folder
+    }
+
+def imported_state(objects):
+    """Signature and hash recorded on every imported object, what plan_sync compares to."""
+    return {
+        source: (obj.get("citography_signature"), obj.get("citography_hash"))
+        for source, obj in objects.items()
+    }
+
+def record_source(obj, plan):
+    source = obj["citography_source"]
+    obj["citography_signature"] = plan.signatures[source]
+    if source in plan.hashes:
+        obj["citography_hash"] = plan.hashes[source]
+
+def relink_source(obj, path, plan):
+    """Point an object and its original (not proxy) images at the new place of a moved file."""
+    source = obj["citography_source"]
+    for slot in obj.material_slots:
+        if slot.material is None or slot.material.node_tree is None:
+            continue
+        for node in slot.material.node_tree.nodes:
+            image = node.image if node.type == 'TEX_IMAGE' else None
+            if image is None or image.get("citography_source") != source:
+                continue
+            if os.path.normpath(bpy.path.abspath(image.filepath)) == os.path.normpath(source):
+                image.filepath = path
+            image["citography_source"] = path
+    obj["citography_source"] = path
+    record_source(obj, plan)
+
+def apply_sync(plan, imported, created, remove_missing):
+    """Finish a folder sync once the new and changed files are built, returns a summary."""
+    for source, path in plan.moved:
+        relink_source(imported[source], path, plan)
+    for obj in created:
+        record_source(obj, plan)
+    # Objects imported before syncing existed adopt the state of their file
+    for source in plan.unchanged:
+        if "citography_signature" not in imported[source]:
+            record_source(imported[source], plan)
+
+    stale = [imported[source] for source in plan.changed]
+    if remove_missing:
+        stale += [imported[source] for source in plan.missing]
+    remove_imported(stale)
+    return (
+        f"{len(plan.new)} new, {len(plan.changed)} changed, {len(plan.moved)} moved, "
+        f"{len(plan.unchanged)} unchanged, {len(plan.missing)} missing"
+        + (" (removed)" if remove_missing and plan.missing else "")
+    )
+
+def grid_sync_layout(placed, plan, cursor, spacing):
+    """Changed images stay where they were, new ones go on the rows below the existing grid.
+
+    placed maps the sources of the imported planes to their locations.
+    """
+    x, y, z = cursor
+    if placed:
+        y = min(location[1] for location in placed.values()) - spacing
+    locations = [placed[source] for source in plan.changed]
+    return locations + grid_locations(len(plan.new), (x, y, z), spacing)
+
 class DistributeImagesGrid(Operator):
     bl_idname = "object.images_grid"
     bl_label = "Grid"
@@ -155,22 +534,37 @@ class DistributeImagesGrid(Operator):
                 return {'CANCELLED'}
             
             all_images = get_all_images(path_for_images)
-            num_images = len(all_images)
-            grid_size = int(math.sqrt(num_images))
             spacing = context.scene.spacing
             cursor_location = context.scene.cursor.location
-
-            for i, image_path in enumerate(all_images):
-                row = i // grid_size
-                col = i % grid_size
-                x = cursor_location.x + (col * spacing)
-                y = cursor_location.y - (row * spacing)
-                z = cursor_location.z
-                
-                import_images_as_plane(image_path, location=(x, y, z))
+            locations = grid_locations(len(all_images), tuple(cursor_location), spacing)
+
+            # The atlas grid is one object, it is always built again
+            plan = None
+            if context.scene.sync_folder and not context.scene.grid_atlas:
+                imported = folder_imports(context.scene, "grid_image", path_for_images)
+                with stage("sync"):
+                    plan = plan_sync(all_images, imported_state(imported))
+                all_images = plan.changed + plan.new
+                placed = {source: tuple(obj.location) for source, obj in imported.items()}
+                locations = grid_sync_layout(placed, plan, tuple(cursor_location), spacing)
+
+            # Build all planes at once through bpy.data
+            textures = get_texture_paths(context.scene, all_images)
+            if context.scene.grid_atlas:
+                # All images in a few atlas textures on one mesh
+                with stage("atlas pack"):
+                    atlas_files, tiles = pack_atlases(textures, get_cache_dir("atlases"), context.scene.atlas_tile_size)
+                with stage("build atlas grid"):
+                    obj = build_atlas_grid("images_grid", locations, tiles, atlas_files, context.collection)
+                obj["citography_source"] = path_for_images
+            else:
+                with stage("build planes"):
+                    objects = build_image_planes(all_images, locations, context.collection, texture_paths=textures, kind="grid_image")
+                if plan is not None:
+                    self.report({'INFO'}, apply_sync(plan, imported, objects, context.scene.sync_remove_missing))
                 
-        except FileNotFoundError:
-            self.report({'ERROR'}, f"Image file not found: {image_path}")
+        except FileNotFoundError as e:
+            self.report({'ERROR'}, f"Image file not found: {e.filename}")
             return {'CANCELLED'}
         except Exception as e:  
             self.report({'ERROR'}, f"An error occurred: {e}")
@@ -191,12 +585,24 @@ class DistributeImagesSphere(Operator):
                 return {'CANCELLED'}
             
             all_images = get_all_images(path_for_images)
+            textures = get_texture_paths(context.scene, all_images)
             spacing = context.scene.spacing
             cursor_location = context.scene.cursor.location
 
-            for image_path in all_images:
+            if context.scene.sphere_instancing:
+                # One shared sphere mesh and shader group, only the image texture differs
+                locations = [
+                    (cursor_location.x + spacing * (i + 1), cursor_location.y, cursor_location.z)
+                    for i in range(len(all_images))
+                ]
+                with stage("build spheres"):
+                    build_image_spheres(all_images, locations, context.collection, texture_paths=textures)
+                cursor_location.x += spacing * len(all_images)
+                return {'FINISHED'}
+
+            for image_path, texture_path in zip(all_images, textures):
                 # Load image into Blender
-                image = bpy.data.images.load(image_path)  
+                image = load_image(texture_path, image_path)
 
                 # 1. Create the Sphere
                 x = cursor_location.x + spacing
@@ -204,6 +610,7 @@ class DistributeImagesSphere(Operator):
                 z = cursor_location.z
                 bpy.ops.mesh.primitive_uv_sphere_add(radius=1, enter_editmode=False, align='WORLD', location=(x, y, z))
                 sphere = bpy.context.active_object
+                sphere["citography_source"] = image_path
 
                 # 2. Create a New Material and assign it to the Sphere
                 material = bpy.data.materials.new(name="Sphere_Material")
@@ -242,8 +649,8 @@ class DistributeImagesSphere(Operator):
 
                 cursor_location.x += spacing 
                 
-        except FileNotFoundError:
-            self.report({'ERROR'}, f"Image file not found: {image_path}")
+        except FileNotFoundError as e:
+            self.report({'ERROR'}, f"Image file not found: {e.filename}")
             return {'CANCELLED'}
         except Exception as e:  
             self.report({'ERROR'}, f"An error occurred: {e}")
@@ -256,87 +663,194 @@ class ImportGeoImages(Operator):
     bl_label = "Import"
 
     VALID_IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg'} 
-    SRC_CRS = "EPSG:4326"
-    DEST_CRS = "EPSG:3857"
 
-    def handle_exif(self, img_path):
-        image = Image.open(img_path)
-        exif_data = image._getexif()
-        if exif_data is not None:
-            for (tag, value) in exif_data.items():
-                tag_name = TAGS.get(tag, tag)
-                if tag_name == 'GPSInfo':
-                    gps_data = {}
-                    for t in value:
-                        sub_tag_name = GPSTAGS.get(t, t)
-                        gps_data[sub_tag_name] = value[t]
-                    return gps_data
-        return {}  # return an empty dict if no GPSInfo tag
+    def import_images_as_plane(self, context, geo_photos, locations, scale_factor=45):
+        texture_paths = get_texture_paths(context.scene, [photo.path for photo in geo_photos])
+        return build_geo_image_planes(geo_photos, locations, context.collection, scale_factor, texture_paths)
 
-    def convert_gps_data(self, gps_data, altitude):
-        transformer = Transformer.from_crs("EPSG:4326", "EPSG:3857", always_xy=True)
+    def execute(self, context):
+        """Execute the operator: Import geotagged images and place them in the scene."""
+        img_dir = bpy.path.abspath(context.scene.path2)
+        img_dir = os.path.normpath(img_dir)
 
-        latitude = gps_data.get('GPSLatitude', [0, 0, 0])
-        longitude = gps_data.get('GPSLongitude', [0, 0, 0])
+        if not is_georeferenced(context.scene):
+            self.report({'ERROR'}, "The scene has to be georeferenced!")
+            return {'CANCELLED'}
+        origin = SceneOrigin.from_scene(context.scene)
+
+        # Check for valid image extensions using a set
+        img_paths = [
+            os.path.join(img_dir, img_name) for img_name in os.listdir(img_dir)
+            if os.path.splitext(img_name)[1].lower() in self.VALID_IMAGE_EXTENSIONS
+        ]
+
+        # In sync mode only new and changed files are read, the others are in the scene already
+        plan = None
+        if context.scene.sync_folder:
+            imported = folder_imports(context.scene, "geo_image", img_dir)
+            with stage("sync"):
+                plan = plan_sync(img_paths, imported_state(imported))
+            img_paths = plan.new + plan.changed
+
+        # Read the GPS fields of all images on a thread pool, every file is opened once
+        with stage("exif"):
+            if context.scene.use_photo_cache:
+                with PhotoCache(os.path.join(get_cache_dir(), PHOTO_CACHE_FILE)) as cache:
+                    photos = scan_geo_photos_cached(img_paths, cache)
+            else:
+                photos = scan_geo_photos(img_paths)
+
+        geo_photos = []
+        for img_path, photo in zip(img_paths, photos):
+            # Notify user and continue if no GPS data
+            if photo is None:
+                self.report({'WARNING'}, f"No GPS data for {os.path.basename(img_path)}. Skipping.")
+                continue
+            geo_photos.append(photo)
+
+        objects = []
+        if geo_photos:
+            # Project all image positions in one call
+            with stage("project"):
+                locations = origin.project(
+                    [photo.longitude for photo in geo_photos],
+                    [photo.latitude for photo in geo_photos],
+                    [photo.altitude for photo in geo_photos],
+                )
+            with stage("build planes"):
+                objects = self.import_images_as_plane(context, geo_photos, locations)
+
+        if plan is not None:
+            self.report({'INFO'}, apply_sync(plan, imported, objects, context.scene.sync_remove_missing))
+        return {'FINISHED'}
 
-        latitude = latitude[0] + latitude[1]/60 + latitude[2]/3600
-        longitude = longitude[0] + longitude[1]/60 + longitude[2]/3600
+class ClearPhotoCache(Operator):
+    bl_idname = "object.clear_photo_cache"
+    bl_label = "Clear metadata cache"
 
-        x, y = transformer.transform(longitude, latitude)
+    def execute(self, context):
+        try:
+            with PhotoCache(os.path.join(get_cache_dir(), PHOTO_CACHE_FILE)) as cache:
+                cache.clear()
+        except Exception as e:
+            self.report({'ERROR'}, f"An error occurred: {e}")
+            return {'CANCELLED'}
+        self.report({'INFO'}, "Photo metadata cache cleared.")
+        return {'FINISHED'}
 
-        # Convert altitude from feet to meters
-        z = altitude #* 0.3048
+class ExportProfiles(Operator, bpy_extras.io_utils.ExportHelper):
+    bl_idname = "object.export_profiles"
+    bl_label = "Export profiles"
+
+    filename_ext = ".json"
+    format: bpy.props.EnumProperty(
+        name="Format",
+        items=[
+            ('JSON', "JSON", "Stages and per-stage summary of every run"),
+            ('CHROME', "Chrome trace", "Trace Event Format for chrome://tracing or Perfetto"),
+        ],
+        default='JSON'
+    )
 
-        # Get the coordinates of the scene origin in the EPSG:3857 system
-        scene_origin_crs_x = bpy.data.scenes["Scene"]["crs x"]
-        scene_origin_crs_y = bpy.data.scenes["Scene"]["crs y"]
+    def execute(self, context):
+        if not profiles:
+            self.report({'WARNING'}, "No profiled runs yet.")
+            return {'CANCELLED'}
+        try:
+            if self.format == 'CHROME':
+                export_chrome_trace(self.filepath)
+            else:
+                export_json(self.filepath)
+        except OSError as e:
+            self.report({'ERROR'}, f"An error occurred: {e}")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Exported {len(profiles)} runs to {self.filepath}")
+        return {'FINISHED'}
 
-        # Calculate the position of the image in the scene
-        position_in_scene_x = x - scene_origin_crs_x
-        position_in_scene_y = y - scene_origin_crs_y
-        position_in_scene_z = z
+class ClearTrackCache(Operator):
+    bl_idname = "object.clear_track_cache"
+    bl_label = "Clear track cache"
 
-        return (position_in_scene_x, position_in_scene_y, position_in_scene_z)
+    def execute(self, context):
+        try:
+            TrackCache(get_cache_dir("tracks")).clear()
+        except OSError as e:
+            self.report({'ERROR'}, f"An error occurred: {e}")
+            return {'CANCELLED'}
+        self.report({'INFO'}, "Track cache cleared.")
+        return {'FINISHED'}
+
+class ClearUnusedTiles(Operator):
+    bl_idname = "object.clear_unused_tiles"
+    bl_label = "Remove unused tiles"
+
+    def execute(self, context):
+        # Folders of deleted layers are kept until now, undo or another .blend may still use them
+        try:
+            removed = remove_unused_tile_dirs(get_cache_dir("tiles"))
+        except OSError as e:
+            self.report({'ERROR'}, f"An error occurred: {e}")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Removed {removed} unused tile folders.")
+        return {'FINISHED'}
 
-    def import_image_as_plane(self, img_path, location, scale_factor=45):
-        bpy.ops.import_image.to_plane(files=[{"name": img_path, "name": img_path}], directory=os.path.dirname(img_path))
-        obj = bpy.context.selected_objects[0]
-        obj.location = location
+class ClearProfiles(Operator):
+    bl_idname = "object.clear_profiles"
+    bl_label = "Clear profiles"
 
-        # Additional code to rotate the image
-        gps_data = self.handle_exif(img_path)
-        orientation = gps_data.get('GPSImgDirection', 0)
-        obj.rotation_euler = (math.radians(85), 0, math.radians(orientation))
+    def execute(self, context):
+        profiles.clear()
+        return {'FINISHED'}
 
-        # Save original position and rotation
-        obj["original_location"] = obj.location[:]
-        obj["original_rotation"] = obj.rotation_euler[:]
+# Material of an image for each kind of textured object, by the tag of its material
+MATERIAL_BUILDERS = {"image": get_image_material, "sphere": get_sphere_material}
 
-        # Scale up the image by the scale factor
-        obj.scale = (scale_factor, scale_factor, scale_factor)
+class SwapImageResolution(Operator):
+    bl_idname = "object.swap_image_resolution"
+    bl_label = "Full resolution / proxy"
+    bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
-        """Execute the operator: Import geotagged images and place them in the scene."""
-        img_dir = bpy.path.abspath(context.scene.path2)
-        img_dir = os.path.normpath(img_dir)
-        
-        for img_name in os.listdir(img_dir):
-            img_path = os.path.join(img_dir, img_name)
-            
-            # Check for valid image extensions using a set
-            _, ext = os.path.splitext(img_name)
-            if ext.lower() in self.VALID_IMAGE_EXTENSIONS:
-                gps_data = self.handle_exif(img_path)
-                
-                # Notify user and continue if no GPS data
-                if not gps_data:
-                    self.report({'WARNING'}, f"No GPS data for {img_name}. Skipping.")
+        proxy_dir = get_cache_dir("proxies")
+        swapped = 0
+        for obj in context.selected_objects:
+            source = obj.get("citography_source")
+            # Atlas grids show packed atlases and record the folder they came from, there is nothing to swap
+            if not source or obj.get(CITOGRAPHY_TAG) == "atlas_grid" or not os.path.isfile(source):
+                continue
+            for slot in obj.material_slots:
+                # Materials are shared by every plane of an image, the object gets the material of the other image
+                builder = MATERIAL_BUILDERS.get(slot.material.get(CITOGRAPHY_TAG)) if slot.material is not None else None
+                if builder is None or not slot.material.use_nodes:
+                    continue
+                old_material = slot.material
+                old_image = next(
+                    (node.image for node in old_material.node_tree.nodes if node.type == 'TEX_IMAGE' and node.image),
+                    None,
+                )
+                if old_image is None:
+                    continue
+                # Proxy -> original, original -> proxy
+                if is_proxy(bpy.path.abspath(old_image.filepath), proxy_dir):
+                    path = source
+                else:
+                    path = make_proxy(source, proxy_dir, context.scene.proxy_size)
+                try:
+                    material = builder(load_image(path, source))
+                except RuntimeError as e:
+                    self.report({'WARNING'}, f"Could not load {path}: {e}")
                     continue
+                slot.link = 'OBJECT'
+                slot.material = material
+                swapped += 1
 
-                altitude = gps_data.get('GPSAltitude', 0)
-                transformed_coordinates = self.convert_gps_data(gps_data, altitude)
-                self.import_image_as_plane(img_path, transformed_coordinates)
+                # Free the material and texture that are not shown anymore
+                if old_material.users == 0:
+                    bpy.data.materials.remove(old_material)
+                if old_image.users == 0:
+                    bpy.data.images.remove(old_image)
 
+        self.report({'INFO'}, f"Swapped {swapped} textures.")
         return {'FINISHED'}
 
 class TurnImageFlat(Operator):
@@ -372,29 +886,70 @@ class ResetToOriginal(Operator):
                 self.report({'WARNING'}, f"No original data saved for {obj.name}. Skipping.")
         return {'FINISHED'}
 
+def add_track_modifiers(context, obj, times):
+    """Remember when the track starts and add the geometry nodes chosen in the panel."""
+    valid = times[np.isfinite(times)]
+    if len(valid):
+        obj["citography_time_start"] = float(valid[0])
+
+    # Reveal first, so markers only appear on points that are already shown
+    if context.scene.reveal_by_time:
+        add_reveal_by_time(obj, context.scene.reveal_speedup)
+    if context.scene.point_instancing:
+        add_point_markers(obj, context.scene.marker_attribute, context.scene.marker_size)
+
+def get_track_cache(scene):
+    return TrackCache(get_cache_dir("tracks")) if scene.use_track_cache else None
+
+def new_tile_dir():
+    return os.path.join(get_cache_dir("tiles"), uuid.uuid4().hex)
+
+def import_tiled(context, chunks, source):
+    """Write (positions, attributes) chunks into a tiled point layer as they come, returns the layer empty."""
+    with stage("build tiles"):
+        layer = build_tiled_layer('data_tiles', chunks, context.scene.collection, new_tile_dir(), context.scene.tile_points)
+    layer["citography_source"] = source
+    with stage("load tiles"):
+        update_tiles(context.scene, force=True)
+    return layer
+
+def tile_chunks(chunks, span):
+    """(positions, attributes) of projected track chunks for import_tiled, keeps the first and last valid time in span."""
+    for positions, times, _, attributes in chunks:
+        valid = times[np.isfinite(times)]
+        if len(valid):
+            span[:] = [span[0] if span else valid[0], valid[-1]]
+        yield positions, attributes
+
+def import_tiled_track(context, path, origin, bbox, time_range, altitude_scale=1.0):
+    """Stream a track file into a tiled layer without holding it whole, returns the layer, point count and duration."""
+    span = []
+    chunks = stream_projected_track(
+        path, origin, lambda path: read_track_chunks(path, bbox, time_range), altitude_scale,
+        cache=get_track_cache(context.scene), options=(bbox, time_range),
+    )
+    layer = import_tiled(context, tile_chunks(chunks, span), path)
+    count = sum(tile["citography_tile_count"] for tile in layer.children)
+    duration = float(span[1] - span[0]) if span else None
+    return layer, count, duration
+
+def track_filters(scene):
+    """Bounding box and time range set in the panel, (None, None) when filtering is off."""
+    if not scene.track_filter:
+        return None, None
+    bbox = (scene.filter_min_lon, scene.filter_min_lat, scene.filter_max_lon, scene.filter_max_lat)
+    time_range = None
+    if scene.filter_start or scene.filter_end:
+        start = parse_time(scene.filter_start) if scene.filter_start else -math.inf
+        end = parse_time(scene.filter_end) if scene.filter_end else math.inf
+        if math.isnan(start) or math.isnan(end):
+            raise ValueError("The time range has to be given as ISO 8601, e.g. 2024-05-01T08:00:00Z")
+        time_range = (start, end)
+    return bbox, time_range
+
 class ImportCSVFile(Operator):
     bl_idname = "some_data.csv_file"
-    bl_label = "CSV - location data"
-
-    @staticmethod
-    def convert_gps_data(latitude, longitude, altitude):
-        transformer = Transformer.from_crs("EPSG:4326", "EPSG:3857", always_xy=True)
-
-        x, y = transformer.transform(longitude, latitude)
-
-        # Convert altitude from feet to meters
-        z = altitude  * 0.3048
-
-        # Retrieve the coordinates of the scene origin in the EPSG:3857 system
-        scene_origin_crs_x = bpy.data.scenes["Scene"]["crs x"]
-        scene_origin_crs_y = bpy.data.scenes["Scene"]["crs y"]
-
-        # Calculate the position of the point in the scene
-        position_in_scene_x = x - scene_origin_crs_x
-        position_in_scene_y = y - scene_origin_crs_y
-        position_in_scene_z = z
-
-        return (position_in_scene_x, position_in_scene_y, position_in_scene_z)
+    bl_label = "CSV / Parquet - location data"
 
     def execute(self, context):
         img_dir = bpy.path.abspath(context.scene.path3)  # convert to absolute path
@@ -403,58 +958,218 @@ class ImportCSVFile(Operator):
         if not os.path.exists(img_dir):
             self.report({'ERROR'}, f"File does not exist: {img_dir}")
             return {'CANCELLED'}
-        
+
+        # Retrieve the scene origin once per import
+        if not is_georeferenced(context.scene):
+            self.report({'ERROR'}, "The scene has to be georeferenced!")
+            return {'CANCELLED'}
+        origin = SceneOrigin.from_scene(context.scene)
+
+        # Read only the needed columns in chunks (CSV, Parquet or Feather) and project each chunk as it is read,
+        # converting altitude from feet to meters. A file imported before comes from the track cache.
         try:
-            data = pd.read_csv(img_dir)
+            bbox, time_range = track_filters(context.scene)
+            # Tiled imports stream the chunks straight into the tile files
+            if context.scene.tiled_import:
+                layer, count, duration = import_tiled_track(context, img_dir, origin, bbox, time_range, altitude_scale=0.3048)
+            else:
+                track = load_projected_track(
+                    img_dir, origin, lambda path: read_track_chunks(path, bbox, time_range), altitude_scale=0.3048,
+                    cache=get_track_cache(context.scene), options=(bbox, time_range),
+                )
         except Exception as e:
             self.report({'ERROR'}, f"Error reading CSV file: {str(e)}")
             return {'CANCELLED'}
 
+        if context.scene.tiled_import:
+            if duration is not None:
+                context.scene.csv_duration = format_duration(timedelta(seconds=duration))
+            self.report({'INFO'}, f"Created {len(layer.children)} tiles with {count} points.")
+            return {'FINISHED'}
+
+        vertices = track.positions
+        times = track.time
+
+        # Optional: calculate and format the duration
+        duration = track_duration(times)
+        if duration is not None:
+            context.scene.csv_duration = format_duration(timedelta(seconds=duration))
+
         # Create new mesh and object
         new_mesh = bpy.data.meshes.new(name='data')
         new_object = bpy.data.objects.new('data_graph', new_mesh)
 
         # Link the object to the scene
-        bpy.context.scene.collection.objects.link(new_object)
-        bpy.context.view_layer.objects.active = new_object
-        new_object.select_set(True)
-
-        # Define lists for mesh data
-        vertices = []
-
-        # Create vertices from GPS data
-        for _, row in data.iterrows():
-            converted_coordinates = self.convert_gps_data(row['latitude'], row['longitude'], row['altitude'])
-            vertices.append(converted_coordinates)
-
-        # Update mesh with new data
-        new_mesh.from_pydata(vertices, [], [])
-        new_mesh.update()
+        with stage("link"):
+            bpy.context.scene.collection.objects.link(new_object)
+            bpy.context.view_layer.objects.active = new_object
+            new_object.select_set(True)
+
+        # Update mesh with new data in one bulk call
+        with stage("build mesh"):
+            edges = track_edges(len(vertices)) if context.scene.import_as_curve else None
+            set_mesh_vertices(new_mesh, vertices, edges)
+            set_point_attributes(new_mesh, track.attributes)
+        tag_citography(new_object, "track")
+        if context.scene.import_as_curve and len(vertices):
+            with stage("build curve"):
+                curve_object = build_poly_curve('data_graph_curve', vertices, context.scene.collection)
+            tag_citography(curve_object, "track_curve")
+        with stage("modifiers"):
+            add_track_modifiers(context, new_object, times)
         
         self.report({'INFO'}, f"Created mesh with {len(vertices)} vertices.")
     
         return {'FINISHED'}
 
-#importing strava
-class ImportGPXFile(Operator):
-    bl_idname = "some_data.gpx_file"
-    bl_label = "GPX - location data"
+TRACK_EXTENSIONS = ('.gpx', '.tcx', '.fit', '.csv', '.parquet', '.pq', '.feather', '.arrow')
+
+def track_folder_inputs(pattern):
+    """Loader inputs for the track files of a folder, a glob pattern or a .zip export, in name order.
+
+    Every track inside a .zip archive is an input of its own, read straight out of the archive.
+    """
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*")
+    inputs = []
+    for path in sorted(glob.glob(pattern)):
+        if not os.path.isfile(path):
+            continue
+        if path.lower().endswith(".zip"):
+            inputs += [
+                {"type": track_format(member)[1:], "path": path, "member": member}
+                for member in archive_members(path)
+            ]
+        elif track_format(path) in TRACK_EXTENSIONS:
+            # Everything not read from a stream goes through the CSV / Parquet reader
+            kind = track_format(path)[1:]
+            inputs.append({"type": kind if kind in ("gpx", "tcx", "fit") else "csv", "path": path})
+    return inputs
+
+def input_source(item):
+    """Path an input is read from, tracks in an archive as a path inside it."""
+    if item.get("member"):
+        return os.path.join(item["path"], item["member"])
+    return item["path"]
+
+class ImportTrackFolder(Operator):
+    bl_idname = "some_data.track_folder"
+    bl_label = "Folder - merged tracks"
 
-    @staticmethod
-    def convert_gps_data(latitude, longitude, altitude):
-        transformer = Transformer.from_crs("EPSG:4326", "EPSG:3857", always_xy=True)
+    def execute(self, context):
+        scene = context.scene
+        pattern = bpy.path.abspath(scene.path4)
+        try:
+            items = track_folder_inputs(pattern)
+        except (OSError, zipfile.BadZipFile) as e:
+            self.report({'ERROR'}, f"Error reading archive: {e}")
+            return {'CANCELLED'}
+        if not items:
+            self.report({'ERROR'}, f"No GPX, TCX, FIT, CSV or Parquet files found: {pattern}")
+            return {'CANCELLED'}
 
-        x, y = transformer.transform(longitude, latitude)
-        z = altitude  # GPX typically uses meters for altitude, but if this changes you can adjust
+        if not is_georeferenced(scene):
+            self.report({'ERROR'}, "The scene has to be georeferenced!")
+            return {'CANCELLED'}
+        origin = SceneOrigin.from_scene(scene)
+        try:
+            bbox, time_range = track_filters(scene)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
 
-        scene_origin_crs_x = bpy.data.scenes["Scene"]["crs x"]
-        scene_origin_crs_y = bpy.data.scenes["Scene"]["crs y"]
+        # Every file is parsed and projected in its own worker process, the same loader as the batch import.
+        # Workers are fresh Python processes, they get plain values and hand back plain arrays.
+        for item in items:
+            item.update(bbox=bbox, time_range=time_range)
+        sources = [input_source(item) for item in items]
+        cache_dir = get_cache_dir("tracks") if scene.use_track_cache else None
+        results = [None] * len(items)
+        failed = []
+        wm = context.window_manager
+        wm.progress_begin(0, len(items))
+        try:
+            with stage("parse"):
+                executor = ProcessPoolExecutor(
+                    max_workers=scene.import_workers or None, mp_context=multiprocessing.get_context("spawn"),
+                )
+                with executor:
+                    futures = {
+                        executor.submit(load_input, item, (origin.crs, origin.x, origin.y), cache_dir): i
+                        for i, item in enumerate(items)
+                    }
+                    for done, future in enumerate(as_completed(futures), 1):
+                        i = futures[future]
+                        try:
+                            results[i] = future.result()
+                        except Exception as e:
+                            failed.append(f"{os.path.basename(sources[i])}: {e}")
+                        wm.progress_update(done)
+        finally:
+            wm.progress_end()
+
+        for message in failed:
+            self.report({'WARNING'}, f"Could not import {message}")
+        # Keep the file order, so track_id follows the sorted file names
+        loaded = [(source, result) for source, result in zip(sources, results) if result is not None and len(result["positions"])]
+        if not loaded:
+            self.report({'ERROR'}, "None of the files had points to import")
+            return {'CANCELLED'}
 
-        position_in_scene_x = x - scene_origin_crs_x
-        position_in_scene_y = y - scene_origin_crs_y
-        position_in_scene_z = z
+        with stage("merge"):
+            positions, attributes, edges = merge_tracks(
+                [result["positions"] for _, result in loaded],
+                [result["segments"] for _, result in loaded],
+                [result["attributes"] for _, result in loaded],
+                with_edges=scene.import_as_curve,
+            )
+        times = np.concatenate([result["times"] for _, result in loaded])
+
+        if scene.tiled_import:
+            layer = import_tiled(context, [(positions, attributes)], pattern)
+            self.report({'INFO'}, f"Created {len(layer.children)} tiles with {len(positions)} points from {len(loaded)} tracks.")
+            return {'FINISHED'}
+
+        new_mesh = bpy.data.meshes.new(name='tracks')
+        new_object = bpy.data.objects.new('tracks_merged', new_mesh)
+        with stage("link"):
+            scene.collection.objects.link(new_object)
+            context.view_layer.objects.active = new_object
+            new_object.select_set(True)
+        with stage("build mesh"):
+            set_mesh_vertices(new_mesh, positions, edges)
+            set_point_attributes(new_mesh, attributes)
+        new_object["citography_source"] = pattern
+        new_object["citography_track_files"] = [path for path, _ in loaded]
+        tag_citography(new_object, "track")
+        with stage("modifiers"):
+            add_track_modifiers(context, new_object, times)
+
+        if scene.per_track_objects:
+            with stage("per-track objects"):
+                collection = bpy.data.collections.new('tracks')
+                tag_citography(collection, "tracks")
+                scene.collection.children.link(collection)
+                for path, result in loaded:
+                    name = os.path.splitext(os.path.basename(path))[0]
+                    mesh = bpy.data.meshes.new(name)
+                    obj = bpy.data.objects.new(name, mesh)
+                    collection.objects.link(obj)
+                    set_mesh_vertices(
+                        mesh, result["positions"],
+                        track_edges(len(result["positions"]), result["segments"]) if scene.import_as_curve else None,
+                    )
+                    set_point_attributes(mesh, result["attributes"])
+                    obj["citography_source"] = path
+                    tag_citography(obj, "track")
+
+        self.report({'INFO'}, f"Merged {len(loaded)} tracks into {len(positions)} points.")
+        return {'FINISHED'}
 
-        return (position_in_scene_x, position_in_scene_y, position_in_scene_z)
+#importing strava
+class ImportGPXFile(Operator):
+    bl_idname = "some_data.gpx_file"
+    bl_label = "GPX / TCX / FIT - location data"
 
     def execute(self, context):
         gpx_dir = bpy.path.abspath(context.scene.path3)
@@ -463,58 +1178,90 @@ class ImportGPXFile(Operator):
             self.report({'ERROR'}, f"File does not exist: {gpx_dir}")
             return {'CANCELLED'}
 
-        tree = ET.parse(gpx_dir)
-        root = tree.getroot()
+        if not is_georeferenced(context.scene):
+            self.report({'ERROR'}, "The scene has to be georeferenced!")
+            return {'CANCELLED'}
+        origin = SceneOrigin.from_scene(context.scene)
 
-        # Extract start and end times (if available)
-        start_time_element = root.find(".//{http://www.topografix.com/GPX/1/1}trkpt/{http://www.topografix.com/GPX/1/1}time")
-        if start_time_element is not None:
-            start_time = start_time_element.text
-        else:
-            self.report({'WARNING'}, "No start time found in GPX data")
-            start_time = None
+        # Read all trackpoints in a single streaming pass and project them, unless the track cache has them.
+        # .gz files are decompressed while reading. GPX uses meters for altitude, so the elevation is used as it is
+        try:
+            bbox, time_range = track_filters(context.scene)
+            # Tiled imports stream the chunks straight into the tile files
+            if context.scene.tiled_import:
+                layer, count, duration = import_tiled_track(context, gpx_dir, origin, bbox, time_range)
+            else:
+                track = load_projected_track(
+                    gpx_dir, origin, lambda path: read_track_chunks(path, bbox, time_range),
+                    cache=get_track_cache(context.scene), options=(bbox, time_range),
+                )
+                duration = track_duration(track.time)
+        except (ET.ParseError, ValueError, OSError, EOFError) as e:
+            self.report({'ERROR'}, f"Error reading GPX file: {e}")
+            return {'CANCELLED'}
 
-        end_time_elements = list(root.findall(".//{http://www.topografix.com/GPX/1/1}trkpt/{http://www.topografix.com/GPX/1/1}time"))
-        if end_time_elements:
-            end_time = end_time_elements[-1].text
+        # Optional: calculate and format the duration
+        if duration is not None:
+            context.scene.gpx_duration = format_duration(timedelta(seconds=duration))
         else:
-            self.report({'WARNING'}, "No end time found in GPX data")
-            end_time = None
+            self.report({'WARNING'}, "No time found in GPX data")
 
-        # Optional: calculate and format the duration
-        if start_time and end_time:
-            start_datetime = datetime.fromisoformat(start_time.replace("Z", "+00:00"))
-            end_datetime = datetime.fromisoformat(end_time.replace("Z", "+00:00"))
-            duration = end_datetime - start_datetime
-            formatted_duration = format_duration(duration)
-            context.scene.gpx_duration = formatted_duration
+        if context.scene.tiled_import:
+            self.report({'INFO'}, f"Created {len(layer.children)} tiles with {count} points.")
+            return {'FINISHED'}
 
         # Create new mesh and object
         new_mesh = bpy.data.meshes.new(name='data')
         new_object = bpy.data.objects.new('data_graph', new_mesh)
 
-        bpy.context.scene.collection.objects.link(new_object)
-        bpy.context.view_layer.objects.active = new_object
-        new_object.select_set(True)
-
-        vertices = []
-
-        # Extract and convert trackpoints from GPX data
-        for trkpt in root.findall(".//{http://www.topografix.com/GPX/1/1}trkpt"):
-            lat = float(trkpt.get('lat'))
-            lon = float(trkpt.get('lon'))
-            ele = float(trkpt.find("{http://www.topografix.com/GPX/1/1}ele").text)
-            
-            converted_coordinates = self.convert_gps_data(lat, lon, ele)
-            vertices.append(converted_coordinates)
-
-        new_mesh.from_pydata(vertices, [], [])
-        new_mesh.update()
+        with stage("link"):
+            bpy.context.scene.collection.objects.link(new_object)
+            bpy.context.view_layer.objects.active = new_object
+            new_object.select_set(True)
+
+        vertices = track.positions
+        with stage("build mesh"):
+            edges = track_edges(len(vertices), track.segment) if context.scene.import_as_curve else None
+            set_mesh_vertices(new_mesh, vertices, edges)
+            set_point_attributes(new_mesh, track.attributes)
+        tag_citography(new_object, "track")
+        if context.scene.import_as_curve and len(vertices):
+            # One spline per track segment, straight from the imported arrays
+            with stage("build curve"):
+                curve_object = build_poly_curve('data_graph_curve', vertices, context.scene.collection, segments=track.segment)
+            tag_citography(curve_object, "track_curve")
+        with stage("modifiers"):
+            add_track_modifiers(context, new_object, track.time)
         
         self.report({'INFO'}, f"Created mesh with {len(vertices)} vertices.")
         
         return {'FINISHED'}
        
+class SyncTrackReveal(Operator):
+    bl_idname = "object.sync_track_reveal"
+    bl_label = "Sync tracks"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        tracks = [
+            obj for obj in context.selected_objects
+            if "citography_time_start" in obj.keys() and obj.modifiers.get("Citography Reveal")
+        ]
+        if not tracks:
+            self.report({'WARNING'}, "No selected tracks with time and reveal found")
+            return {'CANCELLED'}
+
+        # The earliest recording starts at frame 0, the others follow their real start times
+        first_start = min(obj["citography_time_start"] for obj in tracks)
+        for obj in tracks:
+            modifier = obj.modifiers["Citography Reveal"]
+            set_modifier_input(modifier, "Speed-up", context.scene.reveal_speedup)
+            set_modifier_input(modifier, "Offset", obj["citography_time_start"] - first_start)
+            obj.update_tag()
+
+        self.report({'INFO'}, f"Synchronized {len(tracks)} tracks.")
+        return {'FINISHED'}
+
 class MakeVertextsToPath(Operator):
     bl_idname = "object.vertex_to_path"
     bl_label = " Polyline "
@@ -526,44 +1273,32 @@ class MakeVertextsToPath(Operator):
             # Assume that the desired object is currently selected
             obj = bpy.context.active_object
 
-            # Store the initial mode
-            initial_mode = bpy.context.object.mode
-
-            # Ensure you are in Edit mode
-            if initial_mode != 'EDIT':
-                bpy.ops.object.mode_set(mode='EDIT')
-
-            # Get the mesh and BMesh
-            me = obj.data
-            bm = bmesh.from_edit_mesh(me)
-
-            # Get the selected vertices
-            selected_verts = [v for v in bm.verts if v.select]
-
-            # Prepare a list to store global coordinates
-            coords = [obj.matrix_world @ v.co for v in selected_verts]
-
-            # Switch back to initial mode before creating the curve to avoid context issues
-            bpy.ops.object.mode_set(mode=initial_mode)
-
-            # Create a new curve
-            curve_data = bpy.data.curves.new(obj.name + '_curve', type='CURVE')
-            curve_data.dimensions = '3D'
-            curve_data.resolution_u = 10  # Increasing for smoother curves
-
-            # Create a new object with the curve
-            curve_object = bpy.data.objects.new(obj.name + '_curve', curve_data)
+            # Global coordinates of the selected vertices in recorded order, without entering Edit mode
+            coords = selected_world_coordinates(obj)
+
+            # Simplified levels of detail instead of one full curve
+            scene = context.scene
+            if scene.path_simplify:
+                # The tolerance is in meters on the ground, scene units are stretched by the projection (Web Mercator)
+                tolerance = scene.simplify_tolerance
+                if is_georeferenced(scene):
+                    tolerance *= SceneOrigin.from_scene(scene).units_per_meter()
+                lod_objects = build_lod_curves(
+                    obj.name + '_curve',
+                    coords,
+                    bpy.context.collection,
+                    tolerance,
+                    scene.lod_levels,
+                    scene.simplify_method,
+                )
+                for lod_object in lod_objects:
+                    lod_object.location = obj.location
+                apply_lod(scene)
+                return {'FINISHED'}
+
+            # Create a new curve, resolution increased for smoother curves
+            curve_object = build_poly_curve(obj.name + '_curve', coords, bpy.context.collection, resolution=10)
             curve_object.location = obj.location
-            bpy.context.collection.objects.link(curve_object)
-
-            # Create a new spline in the curve
-            polyline = curve_data.splines.new('POLY')
-            polyline.points.add(len(coords)-1)  
-
-            # Assign the coordinates to spline points
-            for i, coord in enumerate(coords):
-                x, y, z = coord
-                polyline.points[i].co = (x, y, z, 1)        
 
         except Exception as e:
             self.report({'ERROR'}, f"An error occurred: {e}")
@@ -580,19 +1315,7 @@ class MakeVertexToBezier(Operator):
             obj = context.active_object
             curve_resolution = context.scene.curve_resolution_u  # Get the property
 
-            initial_mode = context.object.mode
-
-            if initial_mode != 'EDIT':
-                bpy.ops.object.mode_set(mode='EDIT')
-
-            me = obj.data
-            bm = bmesh.from_edit_mesh(me)
-
-            selected_verts = [v for v in bm.verts if v.select]
-
-            coords = [obj.matrix_world @ v.co for v in selected_verts]
-
-            bpy.ops.object.mode_set(mode=initial_mode)
+            coords = selected_world_coordinates(obj)
 
             curve_data = bpy.data.curves.new(obj.name + '_curve', type='CURVE')
             curve_data.dimensions = '3D'
@@ -610,11 +1333,10 @@ class MakeVertexToBezier(Operator):
             spline = curve_data.splines.new('BEZIER')
             spline.bezier_points.add(len(coords)-1)
 
-            for i, coord in enumerate(coords):
-                x, y, z = coord
-                spline.bezier_points[i].co = (x, y, z)
-                spline.bezier_points[i].handle_right_type = 'AUTO'
-                spline.bezier_points[i].handle_left_type = 'AUTO'
+            spline.bezier_points.foreach_set("co", coords.astype(np.float32).ravel())
+            for point in spline.bezier_points:
+                point.handle_right_type = 'AUTO'
+                point.handle_left_type = 'AUTO'
 
             spline.use_cyclic_u = True  # Make the curve cyclic
 
@@ -623,6 +1345,57 @@ class MakeVertexToBezier(Operator):
 
         return {'FINISHED'}
     
+def select_objects_by_name(context, names):
+    """Select only the named objects and make the first one active."""
+    for obj in context.selected_objects:
+        obj.select_set(False)
+    objects = [bpy.data.objects[name] for name in names if name in bpy.data.objects]
+    for obj in objects:
+        obj.select_set(True)
+    if objects:
+        context.view_layer.objects.active = objects[0]
+    return objects
+
+class SelectNearestPhoto(Operator):
+    bl_idname = "object.select_nearest_photo"
+    bl_label = "Nearest photo"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        name, distance = nearest_photo(context.scene, context.scene.cursor.location)
+        if name is None:
+            self.report({'WARNING'}, "No geolocated images in the scene")
+            return {'CANCELLED'}
+        select_objects_by_name(context, [name])
+        self.report({'INFO'}, f"{name} is {distance:.1f} m from the cursor.")
+        return {'FINISHED'}
+
+class SelectPhotosInRegion(Operator):
+    bl_idname = "object.select_photos_in_region"
+    bl_label = "Photos around cursor"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        names = photos_in_radius(context.scene, context.scene.cursor.location, context.scene.search_radius)
+        select_objects_by_name(context, names)
+        self.report({'INFO'}, f"Selected {len(names)} photos.")
+        return {'FINISHED'}
+
+class SelectPhotosNearTrack(Operator):
+    bl_idname = "object.select_photos_near_track"
+    bl_label = "Photos along track"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        track = context.active_object
+        if not (track and track.type == 'MESH'):
+            self.report({'WARNING'}, "Active object is not an imported track")
+            return {'CANCELLED'}
+        names = photos_near_track(context.scene, track, context.scene.search_radius)
+        select_objects_by_name(context, names)
+        self.report({'INFO'}, f"Selected {len(names)} photos.")
+        return {'FINISHED'}
+
 class SetCameraTopView(Operator):
     bl_idname = "view3d.set_camera_top_view"
     bl_label = "Set Camera Top View"
@@ -737,6 +1510,360 @@ class AnimateCameraAlongPath(Operator):
         return {'FINISHED'}
 
 
+def remove_imported(objects):
+    """Remove objects created by an import together with the data only they were using.
+
+    Returns how many datablocks other than the objects were freed.
+    """
+    existing = set(bpy.data.objects.keys())
+    objects = [obj for obj in objects if obj.name in existing]
+    used = object_datablocks(objects)
+    bpy.data.batch_remove(objects)
+    removed = 0
+    for blocks in used:
+        # Data still used elsewhere (or with a fake user) keeps a user and stays
+        unused = [block for block in blocks if block.users == 0]
+        bpy.data.batch_remove(unused)
+        removed += len(unused)
+    return removed
+
+class ModalImport:
+    """Loads on a background thread, then builds the datablocks in short slices on the main thread.
+
+    prepare() reads the scene, load() must not touch bpy and build() is a generator
+    yielding its progress after every chunk, appending what it creates to self.created.
+    Esc stops the load and removes everything built so far.
+    """
+    TIME_SLICE = 0.05
+    # Share of the progress bar taken by the background load
+    LOAD_SHARE = 0.7
+
+    def execute(self, context):
+        job = self.prepare(context)
+        if job is None:
+            return {'CANCELLED'}
+
+        self.created = []
+        self._progress = Progress()
+        # The load records its stages into the profile of this run, when it is profiled
+        self._future = background.submit(bind_profile(self.timed_load), job, self._progress)
+        self._builder = None
+
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.1, window=context.window)
+        wm.progress_begin(0, 100)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self._progress.cancel()
+            remove_imported(self.created)
+            self.finish(context)
+            self.report({'WARNING'}, f"{self.bl_label} cancelled.")
+            return {'CANCELLED'}
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        if self._builder is None:
+            if not self._future.done():
+                self.show_progress(context, self._progress.fraction * self.LOAD_SHARE, self._progress.message)
+                return {'PASS_THROUGH'}
+            try:
+                self._builder = self.build(context, self._future.result())
+            except Exception as e:
+                self.finish(context)
+                self.report({'ERROR'}, f"An error occurred: {e}")
+                return {'CANCELLED'}
+
+        # Build until the time slice is used up, then give the UI back
+        deadline = time.perf_counter() + self.TIME_SLICE
+        try:
+            with stage("build"):
+                while time.perf_counter() < deadline:
+                    fraction = next(self._builder)
+        except StopIteration:
+            self.finish(context)
+            self.report({'INFO'}, f"{self.bl_label}: created {len(self.created)} objects.")
+            return {'FINISHED'}
+        except Exception as e:
+            remove_imported(self.created)
+            self.finish(context)
+            self.report({'ERROR'}, f"An error occurred: {e}")
+            return {'CANCELLED'}
+        self.show_progress(context, self.LOAD_SHARE + fraction * (1 - self.LOAD_SHARE), "Building")
+        return {'PASS_THROUGH'}
+
+    def timed_load(self, job, progress):
+        with stage("load"):
+            return self.load(job, progress)
+
+    def show_progress(self, context, fraction, message):
+        context.window_manager.progress_update(int(fraction * 100))
+        context.workspace.status_text_set(f"{self.bl_label}: {message} {fraction:.0%} (Esc to cancel)")
+
+    def finish(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
+class ImportGeoImagesModal(ModalImport, Operator):
+    bl_idname = "object.geo_images_import_modal"
+    bl_label = "Import geo-images"
+
+    SCAN_CHUNK = 64
+    BUILD_CHUNK = 16
+
+    def prepare(self, context):
+        scene = context.scene
+        img_dir = os.path.normpath(bpy.path.abspath(scene.path2))
+        if not os.path.isdir(img_dir):
+            self.report({'WARNING'}, f"The path {img_dir} is not a valid directory.")
+            return None
+        if not is_georeferenced(scene):
+            self.report({'ERROR'}, "The scene has to be georeferenced!")
+            return None
+        self.imported = folder_imports(scene, "geo_image", img_dir) if scene.sync_folder else None
+        return {
+            "img_dir": img_dir,
+            "imported": imported_state(self.imported) if self.imported is not None else None,
+            "remove_missing": scene.sync_remove_missing,
+            "origin": SceneOrigin.from_scene(scene),
+            "cache_path": os.path.join(get_cache_dir(), PHOTO_CACHE_FILE) if scene.use_photo_cache else None,
+            "proxy_dir": get_cache_dir("proxies") if scene.use_proxies else None,
+            "texture_budget": scene.texture_budget,
+            "proxy_size": scene.proxy_size,
+        }
+
+    def load(self, job, progress):
+        img_paths = [
+            os.path.join(job["img_dir"], img_name) for img_name in os.listdir(job["img_dir"])
+            if os.path.splitext(img_name)[1].lower() in ImportGeoImages.VALID_IMAGE_EXTENSIONS
+        ]
+        plan = None
+        if job["imported"] is not None:
+            progress.update(0, 1, "Comparing with the scene")
+            plan = plan_sync(img_paths, job["imported"])
+            img_paths = plan.new + plan.changed
+
+        # Read the EXIF in chunks so the progress moves and Esc stops between them
+        photos = []
+        cache = PhotoCache(job["cache_path"]) if job["cache_path"] else None
+        try:
+            for batch in chunks(img_paths, self.SCAN_CHUNK):
+                photos += scan_geo_photos_cached(batch, cache) if cache else scan_geo_photos(batch)
+                progress.update(len(photos), len(img_paths), "Reading EXIF")
+        finally:
+            if cache:
+                cache.close()
+        geo_photos = [photo for photo in photos if photo is not None]
+
+        progress.update(0, 1, "Projecting")
+        locations = job["origin"].project(
+            [photo.longitude for photo in geo_photos],
+            [photo.latitude for photo in geo_photos],
+            [photo.altitude for photo in geo_photos],
+        )
+
+        textures = None
+        if job["proxy_dir"] and geo_photos:
+            progress.update(0, 1, "Making proxies")
+            max_size = proxy_size_for_budget(len(geo_photos), job["texture_budget"], job["proxy_size"])
+            textures = make_proxies([photo.path for photo in geo_photos], job["proxy_dir"], max_size)
+        return geo_photos, locations, textures, len(photos) - len(geo_photos), plan, job["remove_missing"]
+
+    def build(self, context, data):
+        geo_photos, locations, textures, skipped, plan, remove_missing = data
+        if skipped:
+            self.report({'WARNING'}, f"No GPS data in {skipped} images. Skipped.")
+        for batch in chunks(range(len(geo_photos)), self.BUILD_CHUNK):
+            self.created += build_geo_image_planes(
+                geo_photos[batch.start:batch.stop],
+                locations[batch.start:batch.stop],
+                context.collection,
+                texture_paths=textures[batch.start:batch.stop] if textures else None,
+            )
+            yield batch.stop / len(geo_photos)
+        # Old objects only change once everything new is built, Esc before leaves them as they were
+        if plan is not None:
+            self.report({'INFO'}, apply_sync(plan, self.imported, self.created, remove_missing))
+
+class DistributeImagesGridModal(ModalImport, Operator):
+    bl_idname = "object.images_grid_modal"
+    bl_label = "Grid"
+
+    BUILD_CHUNK = 16
+
+    def prepare(self, context):
+        scene = context.scene
+        path_for_images = bpy.path.abspath(scene.path1)
+        if not os.path.isdir(path_for_images):
+            self.report({'WARNING'}, f"The path {path_for_images} is not a valid directory.")
+            return None
+        self.imported = None
+        placed = None
+        if scene.sync_folder and not scene.grid_atlas:
+            self.imported = folder_imports(scene, "grid_image", path_for_images)
+            # Read here, load() cannot use bpy
+            placed = {source: tuple(obj.location) for source, obj in self.imported.items()}
+        return {
+            "path": path_for_images,
+            "imported": imported_state(self.imported) if self.imported is not None else None,
+            "placed": placed,
+            "remove_missing": scene.sync_remove_missing,
+            "cursor": tuple(scene.cursor.location),
+            "spacing": scene.spacing,
+            "proxy_dir": get_cache_dir("proxies") if scene.use_proxies else None,
+            "texture_budget": scene.texture_budget,
+            "proxy_size": scene.proxy_size,
+            "atlas_dir": get_cache_dir("atlases") if scene.grid_atlas else None,
+            "atlas_tile_size": scene.atlas_tile_size,
+        }
+
+    def load(self, job, progress):
+        all_images = get_all_images(job["path"])
+        locations = grid_locations(len(all_images), job["cursor"], job["spacing"])
+
+        plan = None
+        if job["imported"] is not None:
+            progress.update(0, 1, "Comparing with the scene")
+            plan = plan_sync(all_images, job["imported"])
+            all_images = plan.changed + plan.new
+            locations = grid_sync_layout(job["placed"], plan, job["cursor"], job["spacing"])
+
+        textures = all_images
+        if job["proxy_dir"] and all_images:
+            progress.update(0, 1, "Making proxies")
+            max_size = proxy_size_for_budget(len(all_images), job["texture_budget"], job["proxy_size"])
+            textures = make_proxies(all_images, job["proxy_dir"], max_size)
+
+        atlas = None
+        if job["atlas_dir"] and all_images:
+            progress.update(0, 1, "Packing atlases")
+            atlas = pack_atlases(textures, job["atlas_dir"], job["atlas_tile_size"])
+        return all_images, locations, textures, atlas, plan, job["remove_missing"]
+
+    def build(self, context, data):
+        all_images, locations, textures, atlas, plan, remove_missing = data
+        if atlas is not None:
+            # All images in a few atlas textures on one mesh
+            atlas_files, tiles = atlas
+            obj = build_atlas_grid("images_grid", locations, tiles, atlas_files, context.collection)
+            obj["citography_source"] = bpy.path.abspath(context.scene.path1)
+            self.created.append(obj)
+            yield 1.0
+            return
+
+        for batch in chunks(range(len(all_images)), self.BUILD_CHUNK):
+            self.created += build_image_planes(
+                all_images[batch.start:batch.stop],
+                locations[batch.start:batch.stop],
+                context.collection,
+                texture_paths=textures[batch.start:batch.stop],
+                kind="grid_image",
+            )
+            yield batch.stop / len(all_images)
+        if plan is not None:
+            self.report({'INFO'}, apply_sync(plan, self.imported, self.created, remove_missing))
+
+class ImportGPXFileModal(ModalImport, Operator):
+    bl_idname = "some_data.gpx_file_modal"
+    bl_label = "GPX / TCX / FIT - location data"
+
+    def prepare(self, context):
+        scene = context.scene
+        gpx_dir = bpy.path.abspath(scene.path3)
+        if not os.path.exists(gpx_dir):
+            self.report({'ERROR'}, f"File does not exist: {gpx_dir}")
+            return None
+        if not is_georeferenced(scene):
+            self.report({'ERROR'}, "The scene has to be georeferenced!")
+            return None
+        try:
+            bbox, time_range = track_filters(scene)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return None
+        return {
+            "path": gpx_dir,
+            "bbox": bbox,
+            "time_range": time_range,
+            "origin": SceneOrigin.from_scene(scene),
+            "cache": get_track_cache(scene),
+            "import_as_curve": scene.import_as_curve,
+            # Tiled imports write their tiles on the background thread
+            "tile_dir": new_tile_dir() if scene.tiled_import else None,
+            "tile_points": scene.tile_points,
+        }
+
+    def load(self, job, progress):
+        def read(path):
+            # The parser reads through the file wrapper, which reports how far it got
+            source = ProgressFile(path, progress, "Reading track")
+            try:
+                size_hint = None if path.lower().endswith(".gz") else os.path.getsize(path)
+                track = read_track_stream(source, path, job["bbox"], job["time_range"], size_hint)
+            finally:
+                source.close()
+            progress.update(0, 1, "Projecting")
+            return track
+
+        # GPX uses meters for altitude, so the elevation is used as it is
+        options = (job["bbox"], job["time_range"])
+        if job["tile_dir"] is not None:
+            # Projected chunks go straight into the tile files, the track is never held whole
+            span = []
+            chunks = stream_projected_track(job["path"], job["origin"], read, cache=job["cache"], options=options)
+            with stage("build tiles"):
+                manifest = write_tiles(tile_chunks(chunks, span), job["tile_dir"], job["tile_points"])
+            duration = float(span[1] - span[0]) if span else None
+            return {"manifest": manifest, "tile_dir": job["tile_dir"], "duration": duration}
+
+        track = load_projected_track(job["path"], job["origin"], read, cache=job["cache"], options=options)
+        vertices = track.positions
+        edges = track_edges(len(vertices), track.segment) if job["import_as_curve"] else None
+        return {"track": track, "edges": edges, "duration": track_duration(track.time)}
+
+    def build(self, context, data):
+        duration = data["duration"]
+        if duration is not None:
+            context.scene.gpx_duration = format_duration(timedelta(seconds=duration))
+        else:
+            self.report({'WARNING'}, "No time found in GPX data")
+
+        if "manifest" in data:
+            layer = create_tiled_layer('data_tiles', data["manifest"], context.scene.collection, data["tile_dir"])
+            layer["citography_source"] = bpy.path.abspath(context.scene.path3)
+            self.created += [layer] + list(layer.children)
+            with stage("load tiles"):
+                update_tiles(context.scene, force=True)
+            yield 1.0
+            return
+
+        track, edges = data["track"], data["edges"]
+        vertices, attributes = track.positions, track.attributes
+
+        new_mesh = bpy.data.meshes.new(name='data')
+        new_object = bpy.data.objects.new('data_graph', new_mesh)
+        self.created.append(new_object)
+        context.scene.collection.objects.link(new_object)
+        context.view_layer.objects.active = new_object
+        new_object.select_set(True)
+        set_mesh_vertices(new_mesh, vertices, edges)
+        set_point_attributes(new_mesh, attributes)
+        tag_citography(new_object, "track")
+        yield 0.5
+
+        if edges is not None and len(vertices):
+            # One spline per track segment, straight from the imported arrays
+            curve_object = build_poly_curve('data_graph_curve', vertices, context.scene.collection, segments=track.segment)
+            self.created.append(curve_object)
+            tag_citography(curve_object, "track_curve")
+            yield 0.8
+        add_track_modifiers(context, new_object, track.time)
+        yield 1.0
+
 # List of classes operators
 classes = [
     CleanTheScene,
@@ -744,21 +1871,38 @@ classes = [
     DistributeImagesGrid,
     SelectFolderImages,
     ImportGeoImages,
+    ClearPhotoCache,
+    SwapImageResolution,
     # SimpleAddCube,
     TurnImageFlat,
     TurnImagesZRotation,
     ImportCSVFile,
+    SyncTrackReveal,
     MakeVertextsToPath,
     MakeVertexToBezier,
+    SelectNearestPhoto,
+    SelectPhotosInRegion,
+    SelectPhotosNearTrack,
     SetCameraTopView,
     SetCameraAnimationPath,
     AnimateCameraAlongPath,
     ImportGPXFile,
+    ImportTrackFolder,
     ResetToOriginal,
     DistributeImagesSphere,
+    ExportProfiles,
+    ClearProfiles,
+    ImportGeoImagesModal,
+    DistributeImagesGridModal,
+    ImportGPXFileModal,
+    ClearTrackCache,
+    ClearUnusedTiles,
 ]
 
 def register():
+    # Time the stages of the operators when the scene asks for it
+    instrument(cls for cls in classes if cls not in (ExportProfiles, ClearProfiles))
+
     # Register classes
     for cls in classes:
         bpy.utils.register_class(cls)
@@ -767,8 +1911,39 @@ def register():
     for prop_name, prop_value in properties.items():
         setattr(bpy.types.Scene, prop_name, prop_value)
 
+    # Switch levels of detail when the camera moves or the frame changes
+    bpy.app.handlers.depsgraph_update_post.append(lod_update_handler)
+    bpy.app.handlers.frame_change_post.append(lod_frame_handler)
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        handlers.append(lod_load_handler)
+    # bpy.data is not readable while add-ons register at startup, the registries are filled once it is
+    bpy.app.timers.register(register_lod_groups, first_interval=0)
+    # Spatial indexes follow the changes instead of rescanning the scene per query
+    bpy.app.handlers.depsgraph_update_post.append(index_update_handler)
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        handlers.append(index_reset_handler)
+    # Load and unload the tiles of tiled layers as the camera moves
+    bpy.app.handlers.depsgraph_update_post.append(tile_update_handler)
+    bpy.app.handlers.frame_change_post.append(tile_update_handler)
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        handlers.append(tile_load_handler)
+    bpy.app.timers.register(register_tile_layers, first_interval=0)
+
 
 def unregister():
+    bpy.app.handlers.depsgraph_update_post.remove(lod_update_handler)
+    bpy.app.handlers.frame_change_post.remove(lod_frame_handler)
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        handlers.remove(lod_load_handler)
+    bpy.app.handlers.depsgraph_update_post.remove(index_update_handler)
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        handlers.remove(index_reset_handler)
+    clear_indexes()
+    bpy.app.handlers.depsgraph_update_post.remove(tile_update_handler)
+    bpy.app.handlers.frame_change_post.remove(tile_update_handler)
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        handlers.remove(tile_load_handler)
+
     # Unregister classes
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
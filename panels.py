@@ -11,7 +11,9 @@ class Panel_PT_CitoStart(bpy.types.Panel):
     
     def draw(self, context):
         layout = self.layout
-        layout.operator("object.cleanthescene", text="Clean the scene", icon= "X")
+        row = layout.row()
+        row.operator("object.cleanthescene", text="Clean the scene", icon= "X")
+        row.prop(context.scene, "clean_citography_only", text="", icon="FILTER")
 
 # main panel - import
 class Panel_PT_CitographyImport(Panel):
@@ -59,9 +61,25 @@ class SubPanel_PT_Image(Panel):
         row = layout.row()
         row.prop(scene, "spacing", text="Spacing", slider=True)  
         row = layout.row()
-        row.operator("object.images_grid", icon= "LIGHTPROBE_GRID", text="Grid")
+        grid_operator = DistributeImagesGridModal.bl_idname if scene.modal_import else "object.images_grid"
+        row.operator(grid_operator, icon= "LIGHTPROBE_GRID", text="Grid")
+        row.prop(scene, "grid_atlas", toggle=True)
+        row.prop(scene, "atlas_tile_size", text="Tile")
+        row.prop(scene, "modal_import", text="", icon="TIME")
+        row = layout.row()
+        row.prop(scene, "sync_folder", icon="FILE_REFRESH")
+        row.prop(scene, "sync_remove_missing")
         row = layout.row()
         row.operator("object.images_spheres", icon= "THREE_DOTS", text="Spheres")
+        row.prop(scene, "sphere_instancing", toggle=True)
+        row = layout.row()
+        row.prop(scene, "use_proxies")
+        row.prop(scene, "proxy_size", text="Size")
+        row = layout.row()
+        row.prop(scene, "texture_budget", text="Budget (MB)")
+        row = layout.row()
+        row.label(text="Select and:", icon="TEXTURE")
+        row.operator(SwapImageResolution.bl_idname, text=SwapImageResolution.bl_label)
         row = layout.row()
         row.label(text="Select and:", icon="ARROW_LEFTRIGHT")
         row.operator("transform.resize")
@@ -88,7 +106,15 @@ class  SubPanel_PT_Geoimages(Panel):
         row = layout.row()
         row.label(text= "WARNING! The scene has to be georeferenced!", icon= "ERROR")
         layout = self.layout
-        layout.operator("object.geo_images_import", text=SelectFolderImages.bl_label)
+        row = layout.row()
+        row.operator(ImportGeoImagesModal.bl_idname if scene.modal_import else "object.geo_images_import", text=SelectFolderImages.bl_label)
+        row.prop(scene, "modal_import", text="", icon="TIME")
+        row = layout.row()
+        row.prop(scene, "use_photo_cache")
+        row.operator(ClearPhotoCache.bl_idname, text="", icon="TRASH")
+        row = layout.row()
+        row.prop(scene, "sync_folder", icon="FILE_REFRESH")
+        row.prop(scene, "sync_remove_missing")
         row = layout.row()
         row.label(text="Select and:", icon="DOCUMENTS")
         row.operator("object.rotate_images_flat", text=TurnImageFlat.bl_label)
@@ -98,6 +124,9 @@ class  SubPanel_PT_Geoimages(Panel):
         row = layout.row()
         row.label(text="Select and:", icon="SNAP_EDGE")
         row.operator("object.reset_to_original", text=ResetToOriginal.bl_label)
+        row = layout.row()
+        row.label(text="Select and:", icon="TEXTURE")
+        row.operator(SwapImageResolution.bl_idname, text=SwapImageResolution.bl_label)
 
 #sub panel - import
 class SubPanel_PT_GPSData(Panel):
@@ -115,7 +144,8 @@ class SubPanel_PT_GPSData(Panel):
         layout.prop(scene, "path3", text="File") 
         layout.separator()
         row = layout.row()
-        row.operator(ImportGPXFile.bl_idname, text=ImportGPXFile.bl_label)
+        row.operator(ImportGPXFileModal.bl_idname if scene.modal_import else ImportGPXFile.bl_idname, text=ImportGPXFile.bl_label)
+        row.prop(scene, "modal_import", text="", icon="TIME")
         row = layout.row()
         if hasattr(scene, "gpx_duration"):
             duration_text = f"GPX Duration: {scene.gpx_duration}"
@@ -125,8 +155,60 @@ class SubPanel_PT_GPSData(Panel):
         row = layout.row()
         if hasattr(scene, "csv_duration"):
             row.label(text=f"CSV Duration: {scene.csv_duration}")
+        layout.prop(scene, "path4", text="Folder / .zip")
+        row = layout.row()
+        row.operator(ImportTrackFolder.bl_idname, text=ImportTrackFolder.bl_label)
+        row.prop(scene, "import_workers")
+        row.prop(scene, "per_track_objects", text="", icon="OUTLINER_OB_MESH")
+        row = layout.row()
+        row.prop(scene, "use_track_cache")
+        row.operator(ClearTrackCache.bl_idname, text="", icon="TRASH")
+        row = layout.row()
+        row.prop(scene, "track_filter", toggle=True, icon="FILTER")
+        if scene.track_filter:
+            col = layout.column(align=True)
+            row = col.row(align=True)
+            row.prop(scene, "filter_min_lat", text="Lat")
+            row.prop(scene, "filter_max_lat", text="")
+            row = col.row(align=True)
+            row.prop(scene, "filter_min_lon", text="Lon")
+            row.prop(scene, "filter_max_lon", text="")
+            col.prop(scene, "filter_start")
+            col.prop(scene, "filter_end")
+        row = layout.row()
+        row.prop(scene, "tiled_import", toggle=True, icon="VIEW_ORTHO")
+        row.prop(scene, "tile_points", text="Points")
+        row.operator(ClearUnusedTiles.bl_idname, text="", icon="TRASH")
+        if scene.tiled_import:
+            row = layout.row()
+            row.prop(scene, "tile_distance", text="Distance")
+            row.prop(scene, "tile_budget", text="Budget")
+        row = layout.row()
+        row.prop(scene, "import_as_curve", toggle=True)
+        row = layout.row()
+        row.prop(scene, "reveal_by_time", toggle=True)
+        row.prop(scene, "reveal_speedup")
+        row.operator(SyncTrackReveal.bl_idname, text="", icon="TIME")
+        row = layout.row()
+        row.prop(scene, "point_instancing", toggle=True)
+        row.prop(scene, "marker_attribute", text="")
+        row.prop(scene, "marker_size", text="Size")
         row = layout.row()
         row.operator(MakeVertextsToPath.bl_idname, icon="IPO_CONSTANT", text=MakeVertextsToPath.bl_label)
+        row = layout.row()
+        row.prop(scene, "path_simplify", toggle=True)
+        row.prop(scene, "simplify_method", text="")
+        if scene.path_simplify:
+            row = layout.row()
+            row.prop(scene, "simplify_tolerance")
+            row.prop(scene, "lod_levels")
+            row = layout.row()
+            row.prop(scene, "lod_mode", expand=True)
+            row = layout.row()
+            if scene.lod_mode == 'CAMERA':
+                row.prop(scene, "lod_distance")
+            else:
+                row.prop(scene, "track_lod", slider=True)
         row = layout.row()       
         split = row.split(factor=0.5, align=True)
         split.operator(MakeVertexToBezier.bl_idname, icon="IPO_BACK", text="Bezier Path")
@@ -172,8 +254,63 @@ class SubPanel_PT_Explore3DMap(Panel):
         row = layout.row()
         row.operator("view3d.animate_camera_along_path", text="Animation: Along the Path")
 
+# sub panel - explore
+class SubPanel_PT_ExploreSearch(Panel):
+    bl_label = "SPATIAL SEARCH"
+    bl_idname = "C_PT_CitoSearchPanel"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "Citography"
+    bl_parent_id = "C_PT_CitoExplorePanel"  
+    bl_options = {"DEFAULT_CLOSED"} 
+    
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        row = layout.row()
+        row.prop(scene, "search_radius")
+        row = layout.row()
+        row.label(text="Place the 3D cursor:", icon="PIVOT_CURSOR")
+        row = layout.row()
+        row.operator(SelectNearestPhoto.bl_idname, text=SelectNearestPhoto.bl_label)
+        row.operator(SelectPhotosInRegion.bl_idname, text=SelectPhotosInRegion.bl_label)
+        row = layout.row()
+        row.label(text="Select a track and:", icon="CURVE_PATH")
+        row.operator(SelectPhotosNearTrack.bl_idname, text=SelectPhotosNearTrack.bl_label)
+
+class SubPanel_PT_Profiling(Panel):
+    bl_label = "PROFILING"
+    bl_idname = "C_PT_CitoProfilingPanel"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "Citography"
+    bl_parent_id = "C_PT_CitoPanelStart"
+    bl_options = {"DEFAULT_CLOSED"}
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        row = layout.row()
+        row.prop(scene, "profile_operators")
+        row.prop(scene, "profile_memory")
+        if profiles:
+            # Stages of the last profiled run, slowest first
+            profile = profiles[-1]
+            box = layout.box()
+            box.label(text=f"{profile.name}: {profile.seconds:.3f}s", icon="TIME")
+            for total in profile.summary():
+                row = box.row()
+                row.label(text=f"{total['stage']} ({total['calls']}x)")
+                row.label(text=f"{total['seconds']:.3f}s")
+                if profile.track_memory:
+                    row.label(text=f"{total['peak'] / 2 ** 20:.1f} MB")
+        row = layout.row()
+        row.operator(ExportProfiles.bl_idname, text=ExportProfiles.bl_label, icon="EXPORT")
+        row.operator(ClearProfiles.bl_idname, text="", icon="TRASH")
+
 classes = [
     Panel_PT_CitoStart,
+    SubPanel_PT_Profiling,
     Panel_PT_CitographyImport,
     SubPanel_PT_Image,
     SubPanel_PT_Geoimages,
@@ -181,6 +318,7 @@ classes = [
     Panel_PT_CitographyExplore,
     SubPanel_PT_Explore2DMap,
     SubPanel_PT_Explore3DMap,
+    SubPanel_PT_ExploreSearch,
 ]
 
 def register():
@@ -0,0 +1,137 @@
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .exif import GeoPhoto, read_geo_photo
+
+# Marker for files that were read before and carry no GPS position
+NO_GPS = "NO_GPS"
+# Marker for files that could not be read this time, they are never cached
+READ_FAILED = "READ_FAILED"
+
+class PhotoCache:
+    """On-disk SQLite cache of photo metadata, keyed by path + size + mtime."""
+
+    def __init__(self, db_path, max_entries=200000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute(
+            """CREATE TABLE IF NOT EXISTS photos (
+                path TEXT PRIMARY KEY,
+                size INTEGER,
+                mtime_ns INTEGER,
+                has_gps INTEGER,
+                latitude REAL,
+                longitude REAL,
+                altitude REAL,
+                direction REAL,
+                timestamp REAL,
+                orientation INTEGER,
+                width INTEGER,
+                height INTEGER,
+                last_used REAL
+            )"""
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS photos_last_used ON photos (last_used)")
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def lookup(self, stats):
+        """Return {path: GeoPhoto or NO_GPS} for every path whose size and mtime still match."""
+        found = {}
+        now = time.time()
+        cursor = self.connection.cursor()
+        for path, (size, mtime_ns) in stats.items():
+            row = cursor.execute(
+                "SELECT size, mtime_ns, has_gps, latitude, longitude, altitude, direction, "
+                "timestamp, orientation, width, height FROM photos WHERE path = ?",
+                (path,),
+            ).fetchone()
+            # Entries of files that changed since they were cached are invalid
+            if row is None or row[0] != size or row[1] != mtime_ns:
+                continue
+            if row[2]:
+                found[path] = GeoPhoto(path, *row[3:])
+            else:
+                found[path] = NO_GPS
+        cursor.executemany(
+            "UPDATE photos SET last_used = ? WHERE path = ?",
+            [(now, path) for path in found],
+        )
+        self.connection.commit()
+        return found
+
+    def store(self, stats, photos):
+        """Store freshly read results (GeoPhoto or None) for the given paths, READ_FAILED ones are skipped."""
+        now = time.time()
+        rows = []
+        for path, photo in photos.items():
+            size, mtime_ns = stats[path]
+            if photo is READ_FAILED:
+                continue
+            if photo is None:
+                rows.append((path, size, mtime_ns, 0) + (None,) * 8 + (now,))
+            else:
+                rows.append((path, size, mtime_ns, 1) + tuple(photo[1:]) + (now,))
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO photos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        self.prune()
+        self.connection.commit()
+
+    def prune(self):
+        """Drop the least recently used entries above the size cap."""
+        count = self.connection.execute("SELECT COUNT(*) FROM photos").fetchone()[0]
+        if count > self.max_entries:
+            self.connection.execute(
+                "DELETE FROM photos WHERE path IN "
+                "(SELECT path FROM photos ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def clear(self):
+        self.connection.execute("DELETE FROM photos")
+        self.connection.commit()
+
+def read_geo_photo_for_cache(path):
+    """GeoPhoto, None for no GPS, or READ_FAILED when the file could not be read right now."""
+    try:
+        return read_geo_photo(path, raise_errors=True)
+    except OSError as e:
+        print(f"Error reading EXIF of {path}: {e}")
+        return READ_FAILED
+
+def scan_geo_photos_cached(img_paths, cache, max_workers=None):
+    """Like exif.scan_geo_photos, but only files that are new or changed since the last scan are read.
+
+    Files that fail to read are returned as None and read again on the next scan.
+    """
+    def stat(path):
+        try:
+            st = os.stat(path)
+            return path, (st.st_size, st.st_mtime_ns)
+        except OSError:
+            return path, None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        stats = {path: st for path, st in executor.map(stat, img_paths) if st is not None}
+        cached = cache.lookup(stats)
+        missing = [path for path in stats if path not in cached]
+        fresh = dict(zip(missing, executor.map(read_geo_photo_for_cache, missing)))
+
+    cache.store(stats, fresh)
+    results = []
+    for path in img_paths:
+        photo = cached.get(path, fresh.get(path))
+        results.append(None if photo is NO_GPS or photo is READ_FAILED else photo)
+    return results
@@ -0,0 +1,230 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import types
+from collections import deque
+from contextlib import contextmanager
+
+# Profiles of the last operator runs, newest last
+MAX_PROFILES = 20
+profiles = deque(maxlen=MAX_PROFILES)
+
+# Profile of the operator running on each thread, none when profiling is off
+_local = threading.local()
+
+class Profile:
+    """Named stages of one operator run, with their wall time and Python allocations."""
+
+    def __init__(self, name, track_memory=False):
+        self.name = name
+        self.track_memory = track_memory
+        self.started = time.time()
+        self.origin = time.perf_counter()
+        self.seconds = 0.0
+        self.status = None
+        # name, start, seconds, allocated bytes, peak bytes, nesting depth
+        self.stages = []
+        self._stack = []
+
+    def begin(self, name):
+        memory = tracemalloc.get_traced_memory()[0] if self.track_memory else 0
+        if self.track_memory:
+            tracemalloc.reset_peak()
+        self._stack.append([name, time.perf_counter(), memory, 0])
+
+    def end(self):
+        name, start, memory, inner_peak = self._stack.pop()
+        seconds = time.perf_counter() - start
+        allocated = peak = 0
+        if self.track_memory:
+            current, traced_peak = tracemalloc.get_traced_memory()
+            allocated = current - memory
+            # reset_peak in a nested stage hides the peak before it, the inner stages pass theirs up
+            peak = max(traced_peak, inner_peak) - memory
+            if self._stack:
+                self._stack[-1][3] = max(self._stack[-1][3], max(traced_peak, inner_peak))
+        self.stages.append((name, start - self.origin, seconds, allocated, peak, len(self._stack)))
+
+    def summary(self):
+        """Total time, calls and allocations per stage name, slowest first."""
+        totals = {}
+        for name, _, seconds, allocated, peak, _ in self.stages:
+            total = totals.setdefault(name, {"stage": name, "calls": 0, "seconds": 0.0, "allocated": 0, "peak": 0})
+            total["calls"] += 1
+            total["seconds"] += seconds
+            total["allocated"] += allocated
+            total["peak"] = max(total["peak"], peak)
+        return sorted(totals.values(), key=lambda total: total["seconds"], reverse=True)
+
+    def as_dict(self):
+        return {
+            "operator": self.name,
+            "started": self.started,
+            "seconds": self.seconds,
+            "status": sorted(self.status) if self.status else None,
+            "stages": [
+                {"stage": name, "start": start, "seconds": seconds, "allocated": allocated, "peak": peak, "depth": depth}
+                for name, start, seconds, allocated, peak, depth in sorted(self.stages, key=lambda stage: stage[1])
+            ],
+            "summary": self.summary(),
+        }
+
+@contextmanager
+def stage(name):
+    """Time a named stage of the running operator, does nothing when it is not profiled."""
+    profile = active_profile()
+    if profile is None:
+        yield
+        return
+    profile.begin(name)
+    try:
+        yield
+    finally:
+        profile.end()
+
+def active_profile():
+    return getattr(_local, "profile", None)
+
+@contextmanager
+def profiling(profile):
+    """Record the stages of this thread into profile for the duration of the block."""
+    previous = active_profile()
+    _local.profile = profile
+    try:
+        yield
+    finally:
+        _local.profile = previous
+
+def start_profile(name, context):
+    """A new profile when the scene asks for one and this thread is not profiled already, None otherwise."""
+    scene = getattr(context, "scene", None)
+    if active_profile() is not None or scene is None or not getattr(scene, "profile_operators", False):
+        return None
+    track_memory = scene.profile_memory and not tracemalloc.is_tracing()
+    if track_memory:
+        tracemalloc.start()
+    return Profile(name, track_memory)
+
+def finish_profile(profile, context, status):
+    """Evaluate what the operator changed inside the profile and store it with the others."""
+    try:
+        if status is not None:
+            # Whatever the operator changed is evaluated here instead of on the next redraw
+            with profiling(profile), stage("depsgraph"):
+                context.view_layer.update()
+    finally:
+        profile.status = status
+        profile.seconds = time.perf_counter() - profile.origin
+        if profile.track_memory:
+            tracemalloc.stop()
+        profiles.append(profile)
+
+def bind_profile(func):
+    """func recording into the profile of this thread, for work handed to a background thread."""
+    profile = active_profile()
+    if profile is None:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with profiling(profile):
+            return func(*args, **kwargs)
+    return wrapper
+
+def profile_execute(execute):
+    """Wrap an operator's execute to profile it when the scene asks for it."""
+    @functools.wraps(execute)
+    def wrapper(self, context):
+        profile = start_profile(self.bl_idname, context)
+        if profile is None:
+            return execute(self, context)
+        status = None
+        try:
+            with profiling(profile), stage("execute"):
+                status = execute(self, context)
+            return status
+        finally:
+            finish_profile(profile, context, status)
+    return wrapper
+
+def profile_modal(cls):
+    """Profile a modal operator from its execute until its modal finishes or cancels, as one run."""
+    execute, modal = python_method(cls, "execute"), python_method(cls, "modal")
+
+    @functools.wraps(execute)
+    def execute_wrapper(self, context):
+        self._profile = start_profile(self.bl_idname, context)
+        if self._profile is None:
+            return execute(self, context)
+        status = None
+        try:
+            with profiling(self._profile), stage("execute"):
+                status = execute(self, context)
+        finally:
+            if status != {'RUNNING_MODAL'}:
+                finish_profile(self._profile, context, status)
+        return status
+
+    @functools.wraps(modal)
+    def modal_wrapper(self, context, event):
+        profile = getattr(self, "_profile", None)
+        if profile is None:
+            return modal(self, context, event)
+        status = None
+        try:
+            with profiling(profile):
+                status = modal(self, context, event)
+        finally:
+            if status is None or not status & {'RUNNING_MODAL', 'PASS_THROUGH'}:
+                self._profile = None
+                finish_profile(profile, context, status)
+        return status
+
+    cls.execute, cls.modal = execute_wrapper, modal_wrapper
+
+def python_method(cls, name):
+    """The Python function name resolves to through the class hierarchy, None when it has none."""
+    for base in cls.__mro__:
+        method = vars(base).get(name)
+        if isinstance(method, types.FunctionType):
+            return method
+    return None
+
+def instrument(classes):
+    """Profile every operator class before they are registered, inherited execute and modal included."""
+    for cls in classes:
+        execute = python_method(cls, "execute")
+        if execute is None or hasattr(execute, "__wrapped__"):
+            continue
+        if python_method(cls, "modal") is not None:
+            profile_modal(cls)
+        else:
+            cls.execute = profile_execute(execute)
+
+def export_json(path, runs=None):
+    runs = list(profiles) if runs is None else runs
+    with open(path, "w") as f:
+        json.dump([profile.as_dict() for profile in runs], f, indent=2)
+
+def export_chrome_trace(path, runs=None):
+    """Write the profiles in the Trace Event Format of chrome://tracing and Perfetto."""
+    runs = list(profiles) if runs is None else runs
+    events = []
+    for profile in runs:
+        origin = profile.started * 1e6
+        for name, start, seconds, allocated, peak, depth in profile.stages:
+            events.append({
+                "name": name,
+                "cat": profile.name,
+                "ph": "X",
+                "ts": origin + start * 1e6,
+                "dur": seconds * 1e6,
+                "pid": os.getpid(),
+                "tid": 1,
+                "args": {"allocated": allocated, "peak": peak},
+            })
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
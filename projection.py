@@ -0,0 +1,54 @@
+import math
+from functools import lru_cache
+import numpy as np
+from pyproj import Geod, Transformer #CHECK IF INSTALLED
+
+WGS84 = "EPSG:4326"
+WEB_MERCATOR = "EPSG:3857"
+
+@lru_cache(maxsize=32)
+def get_transformer(src_crs, dest_crs):
+    """Return a cached (lon, lat ordered) transformer between two CRSs."""
+    return Transformer.from_crs(src_crs, dest_crs, always_xy=True)
+
+def is_georeferenced(scene):
+    """Check if the scene carries an origin set by BlenderGIS."""
+    return "crs x" in scene and "crs y" in scene
+
+class SceneOrigin:
+    """CRS and origin of a georeferenced scene, read once per import."""
+
+    def __init__(self, crs=WEB_MERCATOR, x=0.0, y=0.0):
+        self.crs = crs
+        self.x = float(x)
+        self.y = float(y)
+
+    @classmethod
+    def from_scene(cls, scene):
+        # BlenderGIS stores the scene CRS as "SRID" next to the origin coordinates
+        return cls(scene.get("SRID", WEB_MERCATOR), scene["crs x"], scene["crs y"])
+
+    def key(self):
+        """Hashable identity of the projection, used by caches."""
+        return (self.crs, round(self.x, 3), round(self.y, 3))
+
+    def units_per_meter(self):
+        """Scene units one meter on the ground spans at the origin, 1 / cos(latitude) in Web Mercator."""
+        longitude, latitude = get_transformer(self.crs, WGS84).transform(self.x, self.y)
+        east_longitude, east_latitude, _ = Geod(ellps="WGS84").fwd(longitude, latitude, 90.0, 1000.0)
+        x, y = get_transformer(WGS84, self.crs).transform([longitude, east_longitude], [latitude, east_latitude])
+        return math.hypot(x[1] - x[0], y[1] - y[0]) / 1000.0
+
+    def project(self, longitude, latitude, altitude, src_crs=WGS84):
+        """Project longitude/latitude/altitude arrays to an (N, 3) array of scene coordinates."""
+        transformer = get_transformer(src_crs, self.crs)
+        longitude = np.atleast_1d(np.asarray(longitude, dtype=np.float64))
+        latitude = np.atleast_1d(np.asarray(latitude, dtype=np.float64))
+
+        x, y = transformer.transform(longitude, latitude)
+
+        coordinates = np.empty((len(longitude), 3), dtype=np.float32)
+        coordinates[:, 0] = np.asarray(x) - self.x
+        coordinates[:, 1] = np.asarray(y) - self.y
+        coordinates[:, 2] = altitude
+        return coordinates
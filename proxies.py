@@ -0,0 +1,63 @@
+import hashlib
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image #CHECK IF INSTALLED
+
+# Smallest proxy side, below this the images stop being recognizable
+MIN_PROXY_SIZE = 128
+
+# Proxies are 8 bit PNGs, float and high bit depth images would lose their range, they are used as they are
+FLOAT_EXTENSIONS = ('.hdr', '.exr')
+HIGH_DEPTH_MODES = ('I', 'F', 'I;16', 'I;16B', 'I;16L', 'I;16N')
+
+def proxy_size_for_budget(count, budget_mb, max_size):
+    """Largest proxy side that keeps `count` RGBA textures within the memory budget."""
+    if count <= 0:
+        return max_size
+    side = int(math.sqrt(budget_mb * 1024 * 1024 / (4 * count)))
+    return max(MIN_PROXY_SIZE, min(max_size, side))
+
+def proxy_path(img_path, cache_dir, max_size):
+    """Path of the proxy of an image, changing whenever the source file changes."""
+    st = os.stat(img_path)
+    key = f"{os.path.abspath(img_path)}|{st.st_size}|{st.st_mtime_ns}|{max_size}"
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
+    stem = os.path.splitext(os.path.basename(img_path))[0]
+    return os.path.join(cache_dir, f"{stem}_{digest}.png")
+
+def make_proxy(img_path, cache_dir, max_size):
+    """Write a downscaled copy of an image into the cache, returns its path (or the original on failure).
+
+    Float and high bit depth images get no proxy, the original path is returned for them.
+    """
+    if img_path.lower().endswith(FLOAT_EXTENSIONS):
+        return img_path
+    try:
+        target = proxy_path(img_path, cache_dir, max_size)
+        if os.path.exists(target):
+            return target
+        with Image.open(img_path) as image:
+            if image.mode in HIGH_DEPTH_MODES:
+                return img_path
+            # Let the JPEG decoder skip detail we are going to throw away anyway
+            image.draft('RGB', (max_size, max_size))
+            image.thumbnail((max_size, max_size))
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+            temporary = target + ".tmp"
+            image.save(temporary, format="PNG", compress_level=1)
+        os.replace(temporary, target)
+        return target
+    except (OSError, ValueError) as e:
+        print(f"Error creating proxy of {img_path}: {e}")
+        return img_path
+
+def make_proxies(img_paths, cache_dir, max_size, max_workers=None):
+    """Create the proxies of many images in parallel, results keep the order of img_paths."""
+    os.makedirs(cache_dir, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda path: make_proxy(path, cache_dir, max_size), img_paths))
+
+def is_proxy(path, cache_dir):
+    return os.path.normpath(os.path.dirname(path)) == os.path.normpath(cache_dir)
@@ -0,0 +1,494 @@
+import gzip
+import io
+import os
+import zipfile
+import xml.etree.ElementTree as ET #for strava files
+from collections import namedtuple
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd #CHECK IF INSTALLED
+
+# Arrays of one track in recorded order, time in UTC epoch seconds (NaN when missing)
+Track = namedtuple("Track", ["latitude", "longitude", "elevation", "time", "segment"])
+
+# Rough size of one <trkpt> in bytes, used to preallocate the arrays from the file size
+GPX_BYTES_PER_POINT = 120
+
+CSV_COLUMNS = ['latitude', 'longitude', 'altitude']
+CSV_TIME_COLUMNS = ('time', 'timestamp', 'datetime', 'date')
+CSV_CHUNK_SIZE = 250000
+
+# Degrees need float64, altitudes are fine in float32
+COLUMN_DTYPES = {'latitude': np.float64, 'longitude': np.float64, 'altitude': np.float32}
+
+# Track formats read from a byte stream, so also out of .gz files and .zip archives
+STREAM_FORMATS = ('.gpx', '.tcx', '.fit')
+
+# FIT times count seconds from 1989-12-31T00:00:00Z
+FIT_EPOCH = 631065600
+FIT_RECORD = 20
+# Field number: (name, numpy type, invalid value) of the record message fields used
+FIT_RECORD_FIELDS = {
+    253: ("timestamp", "u4", 0xFFFFFFFF),
+    0: ("latitude", "i4", 0x7FFFFFFF),
+    1: ("longitude", "i4", 0x7FFFFFFF),
+    2: ("altitude", "u2", 0xFFFF),
+    78: ("enhanced_altitude", "u4", 0xFFFFFFFF),
+}
+
+COLUMNAR_FORMATS = {'.parquet': 'parquet', '.pq': 'parquet', '.feather': 'feather', '.arrow': 'feather', '.ipc': 'feather'}
+
+def local_name(tag):
+    """Strip the namespace so GPX 1.0 and 1.1 files are read the same way."""
+    return tag.rsplit('}', 1)[-1]
+
+def parse_time(text):
+    """Parse an ISO 8601 timestamp into UTC epoch seconds, NaN if it cannot be read."""
+    if not text:
+        return np.nan
+    try:
+        moment = datetime.fromisoformat(text.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return np.nan
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+class ColumnBuffer:
+    """Preallocated numeric column that grows by doubling."""
+
+    def __init__(self, capacity, dtype=np.float64):
+        self.data = np.empty(max(int(capacity), 1), dtype=dtype)
+        self.size = 0
+
+    def append(self, value):
+        if self.size == len(self.data):
+            self.data = np.resize(self.data, len(self.data) * 2)
+        self.data[self.size] = value
+        self.size += 1
+
+    def result(self):
+        return self.data[:self.size].copy()
+
+def read_gpx(source, size_hint=None):
+    """Read all trkpt lat/lon/ele/time of a GPX file (path or file object) in one streaming pass."""
+    if size_hint is None and isinstance(source, (str, os.PathLike)):
+        size_hint = os.path.getsize(source)
+    capacity = (size_hint or 0) // GPX_BYTES_PER_POINT + 1024
+
+    latitude = ColumnBuffer(capacity)
+    longitude = ColumnBuffer(capacity)
+    elevation = ColumnBuffer(capacity)
+    time = ColumnBuffer(capacity)
+    segment = ColumnBuffer(capacity, dtype=np.int32)
+
+    segment_index = -1
+    parent = None
+    context = ET.iterparse(source, events=("start", "end"))
+    _, root = next(context)
+
+    for event, elem in context:
+        tag = local_name(elem.tag)
+        if event == "start":
+            if tag == "trkseg":
+                segment_index += 1
+                parent = elem
+            continue
+
+        if tag == "trkpt":
+            ele = None
+            when = None
+            for child in elem:
+                child_tag = local_name(child.tag)
+                if child_tag == "ele":
+                    ele = child.text
+                elif child_tag == "time":
+                    when = child.text
+            latitude.append(float(elem.get('lat')))
+            longitude.append(float(elem.get('lon')))
+            elevation.append(float(ele) if ele else 0.0)
+            time.append(parse_time(when))
+            segment.append(max(segment_index, 0))
+
+            # Drop the processed point so memory stays bound to the arrays, not the XML tree
+            elem.clear()
+            if parent is not None:
+                parent.remove(elem)
+        elif tag in ("trkseg", "trk", "wpt", "rte", "metadata"):
+            elem.clear()
+            root.clear()
+
+    return Track(latitude.result(), longitude.result(), elevation.result(), time.result(), segment.result())
+
+def skip_leading_whitespace(source):
+    """Some exports (Strava TCX) put blanks before the XML declaration, which the parser refuses."""
+    if not hasattr(source, "peek"):
+        source = io.BufferedReader(source)
+    while True:
+        head = source.peek(64)[:64]
+        blanks = len(head) - len(head.lstrip())
+        if not head or not blanks:
+            return source
+        source.read(blanks)
+
+def read_tcx(source):
+    """Read the Trackpoints with a position of a TCX file (path or file object), one segment per Track."""
+    latitude = ColumnBuffer(1024)
+    longitude = ColumnBuffer(1024)
+    elevation = ColumnBuffer(1024)
+    time = ColumnBuffer(1024)
+    segment = ColumnBuffer(1024, dtype=np.int32)
+
+    segment_index = -1
+    parent = None
+    context = ET.iterparse(source, events=("start", "end"))
+    _, root = next(context)
+
+    for event, elem in context:
+        tag = local_name(elem.tag)
+        if event == "start":
+            if tag == "Track":
+                segment_index += 1
+                parent = elem
+            continue
+
+        if tag == "Trackpoint":
+            values = {local_name(child.tag): child for child in elem.iter()}
+            # Points without a position only carry heart rate or cadence
+            if "LatitudeDegrees" in values and "LongitudeDegrees" in values:
+                ele = values.get("AltitudeMeters")
+                when = values.get("Time")
+                latitude.append(float(values["LatitudeDegrees"].text))
+                longitude.append(float(values["LongitudeDegrees"].text))
+                elevation.append(float(ele.text) if ele is not None and ele.text else 0.0)
+                time.append(parse_time(when.text if when is not None else None))
+                segment.append(max(segment_index, 0))
+            elem.clear()
+            if parent is not None:
+                parent.remove(elem)
+        elif tag in ("Track", "Lap"):
+            elem.clear()
+            root.clear()
+
+    return Track(latitude.result(), longitude.result(), elevation.result(), time.result(), segment.result())
+
+def fit_record_layouts(data):
+    """Walk the messages of a FIT file and collect where the record messages are.
+
+    Returns, per record message definition, the field layout and the offsets (and
+    compressed timestamp offsets, -1 for a normal header) of its data messages.
+    Only the headers are looked at here, the fields are decoded in bulk afterwards.
+    """
+    layouts = []
+    position = 0
+    while position + 12 <= len(data):
+        header_size = data[position]
+        data_size = int.from_bytes(data[position + 4:position + 8], "little")
+        if data[position + 8:position + 12] != b".FIT":
+            if position == 0:
+                raise ValueError("Not a FIT file")
+            break
+        position += header_size
+        end = min(position + data_size, len(data))
+        # Local message type -> the layout it was last defined with, None for messages other than records
+        local = {}
+        # Local message type -> size of its data messages
+        sizes = {}
+        while position < end:
+            header = data[position]
+            if header & 0x80:
+                layout = local.get((header >> 5) & 0x03)
+                if layout is not None:
+                    layout["offsets"].append(position + 1)
+                    layout["time_offsets"].append(header & 0x1F)
+                elif (header >> 5) & 0x03 not in local:
+                    raise ValueError(f"FIT data message without definition at byte {position}")
+                position += 1 + sizes[(header >> 5) & 0x03]
+            elif header & 0x40:
+                big_endian = data[position + 2] == 1
+                message = int.from_bytes(data[position + 3:position + 5], "big" if big_endian else "little")
+                count = data[position + 5]
+                fields = data[position + 6:position + 6 + 3 * count]
+                position += 6 + 3 * count
+                size = sum(fields[1::3])
+                if header & 0x20:
+                    developer_count = data[position]
+                    size += sum(data[position + 1:position + 1 + 3 * developer_count][1::3])
+                    position += 1 + 3 * developer_count
+                sizes[header & 0x0F] = size
+                if message == FIT_RECORD:
+                    layout = {"size": size, "big_endian": big_endian, "fields": {}, "offsets": [], "time_offsets": []}
+                    offset = 0
+                    for number, field_size in zip(fields[0::3], fields[1::3]):
+                        layout["fields"][number] = (offset, field_size)
+                        offset += field_size
+                    layouts.append(layout)
+                    local[header & 0x0F] = layout
+                else:
+                    local[header & 0x0F] = None
+            else:
+                layout = local.get(header & 0x0F)
+                if layout is not None:
+                    layout["offsets"].append(position + 1)
+                    layout["time_offsets"].append(-1)
+                elif header & 0x0F not in local:
+                    raise ValueError(f"FIT data message without definition at byte {position}")
+                position += 1 + sizes[header & 0x0F]
+        # Each file ends with a CRC, a chained FIT file may follow
+        position = end + 2
+    return layouts
+
+def decode_fit_records(buffer, layout):
+    """Decode the used fields of all data messages of one record definition as arrays at once."""
+    order = ">" if layout["big_endian"] else "<"
+    offsets = np.asarray(layout["offsets"], dtype=np.int64)
+    # One row of bytes per message, viewed as a structured array of the fields
+    rows = buffer[offsets[:, None] + np.arange(layout["size"])]
+    names, formats, positions = [], [], []
+    for number, (name, kind, _) in FIT_RECORD_FIELDS.items():
+        field = layout["fields"].get(number)
+        if field is not None and field[1] == np.dtype(kind).itemsize:
+            names.append(name)
+            formats.append(order + kind)
+            positions.append(field[0])
+    dtype = np.dtype({"names": names, "formats": formats, "offsets": positions, "itemsize": layout["size"]})
+    messages = rows.view(dtype).ravel() if len(offsets) else np.empty(0, dtype=dtype)
+
+    def column(name, scale=1.0, offset=0.0):
+        number = next(number for number, field in FIT_RECORD_FIELDS.items() if field[0] == name)
+        if name not in names:
+            return np.full(len(offsets), np.nan)
+        values = messages[name].astype(np.float64)
+        values[messages[name] == FIT_RECORD_FIELDS[number][2]] = np.nan
+        return values * scale + offset
+
+    semicircles = 180.0 / 2 ** 31
+    altitude = column("enhanced_altitude", 0.2, -500.0)
+    altitude = np.where(np.isnan(altitude), column("altitude", 0.2, -500.0), altitude)
+    return {
+        "offset": offsets,
+        "time_offset": np.asarray(layout["time_offsets"], dtype=np.int64),
+        "latitude": column("latitude", semicircles),
+        "longitude": column("longitude", semicircles),
+        "elevation": altitude,
+        "timestamp": column("timestamp"),
+    }
+
+def read_fit(source):
+    """Read the positions of the record messages of a FIT file (path or file object)."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            data = f.read()
+    else:
+        data = source.read()
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    parts = [decode_fit_records(buffer, layout) for layout in fit_record_layouts(data) if layout["offsets"]]
+    if not parts:
+        return Track(*(np.empty(0) for _ in range(4)), np.empty(0, dtype=np.int32))
+    # Records of several definitions are put back into file order
+    records = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+    order = np.argsort(records["offset"], kind="stable")
+    records = {name: values[order] for name, values in records.items()}
+
+    timestamp = records["timestamp"]
+    compressed = np.flatnonzero(records["time_offset"] >= 0)
+    if len(compressed):
+        # A compressed header holds the last 5 bits of the time, rolling over from the record before
+        last = np.nan
+        for i in range(len(timestamp)):
+            offset = records["time_offset"][i]
+            if offset >= 0 and np.isfinite(last):
+                base = int(last) & ~0x1F
+                timestamp[i] = base + offset + (0x20 if offset < (int(last) & 0x1F) else 0)
+            if np.isfinite(timestamp[i]):
+                last = timestamp[i]
+
+    # Records before the GPS fix have no position
+    valid = np.isfinite(records["latitude"]) & np.isfinite(records["longitude"])
+    elevation = np.nan_to_num(records["elevation"][valid], nan=0.0)
+    return Track(
+        records["latitude"][valid], records["longitude"][valid], elevation,
+        timestamp[valid] + FIT_EPOCH, np.zeros(int(valid.sum()), dtype=np.int32),
+    )
+
+def track_format(name):
+    """Extension of a track file name, looking through a .gz suffix."""
+    name = name.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    return os.path.splitext(name)[1]
+
+def read_track_stream(source, name, bbox=None, time_range=None, size_hint=None):
+    """Read a GPX, TCX or FIT track from a binary file object, name tells the format and compression."""
+    extension = track_format(name)
+    if name.lower().endswith(".gz"):
+        # Decompressed while parsing, nothing is written to disk
+        source = gzip.GzipFile(fileobj=source)
+        size_hint = None
+    if extension == ".gpx":
+        track = read_gpx(skip_leading_whitespace(source), size_hint)
+    elif extension == ".tcx":
+        track = read_tcx(skip_leading_whitespace(source))
+    elif extension == ".fit":
+        track = read_fit(source)
+    else:
+        raise ValueError(f"Not a GPX, TCX or FIT file: {name}")
+    return filter_track(track, bbox, time_range)
+
+def archive_members(path):
+    """Names of the GPX, TCX and FIT files (also gzipped) inside a .zip archive, in archive order."""
+    with zipfile.ZipFile(path) as archive:
+        return [
+            info.filename for info in archive.infolist()
+            if not info.is_dir() and track_format(info.filename) in STREAM_FORMATS
+        ]
+
+def read_archive_track(path, member, bbox=None, time_range=None):
+    """Read one track of a .zip archive, streamed out of it without extracting."""
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo(member)
+        with archive.open(info) as source:
+            return read_track_stream(source, member, bbox, time_range, size_hint=info.file_size)
+
+def parse_time_column(values):
+    """Convert a column of timestamps (ISO strings or epoch seconds) to UTC epoch seconds, NaN if unreadable."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=np.float64)
+    try:
+        moments = pd.to_datetime(values, utc=True, errors='coerce', format='ISO8601')
+    except (TypeError, ValueError):
+        # pandas < 2 has no ISO8601 format and infers it instead
+        moments = pd.to_datetime(values, utc=True, errors='coerce')
+    return (moments - pd.Timestamp(0, tz='UTC')).dt.total_seconds().to_numpy(dtype=np.float64)
+
+def filter_mask(latitude, longitude, time, bbox=None, time_range=None):
+    """Points inside bbox (min lon, min lat, max lon, max lat) and time_range (start, end in epoch seconds)."""
+    mask = np.ones(len(latitude), dtype=bool)
+    if bbox is not None:
+        min_lon, min_lat, max_lon, max_lat = bbox
+        mask &= (longitude >= min_lon) & (longitude <= max_lon) & (latitude >= min_lat) & (latitude <= max_lat)
+    if time_range is not None:
+        start, end = time_range
+        # Points without a time cannot be in the range
+        mask &= (time >= start) & (time <= end)
+    return mask
+
+def filter_track(track, bbox=None, time_range=None):
+    if bbox is None and time_range is None:
+        return track
+    mask = filter_mask(track.latitude, track.longitude, track.time, bbox, time_range)
+    return Track(*(column[mask] for column in track))
+
+def column_track(latitude, longitude, altitude, time):
+    """Track of one chunk of a table, tables have no segments."""
+    return Track(latitude, longitude, altitude, time, np.zeros(len(latitude), dtype=np.int32))
+
+def concatenate_tracks(chunks):
+    """One Track out of Track chunks."""
+    chunks = list(chunks)
+    if not chunks:
+        return Track(
+            np.empty(0), np.empty(0), np.empty(0, dtype=COLUMN_DTYPES['altitude']), np.empty(0), np.empty(0, dtype=np.int32),
+        )
+    return Track(*(np.concatenate(columns) for columns in zip(*chunks)))
+
+def read_csv_chunks(path, chunk_size=CSV_CHUNK_SIZE, bbox=None, time_range=None):
+    """Yield the latitude/longitude/altitude (and time if present) columns of a CSV as Track chunks.
+
+    Only the rows inside bbox and time_range are kept, chunk by chunk. Callers
+    projecting each chunk never hold the degrees of the whole file.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    time_column = next((column for column in header if column.lower() in CSV_TIME_COLUMNS), None)
+    columns = CSV_COLUMNS + ([time_column] if time_column else [])
+
+    for data in pd.read_csv(path, usecols=columns, dtype=COLUMN_DTYPES, chunksize=chunk_size):
+        times = parse_time_column(data[time_column]) if time_column else np.full(len(data), np.nan)
+        arrays = [data[column].to_numpy() for column in CSV_COLUMNS] + [times]
+        if bbox is not None or time_range is not None:
+            mask = filter_mask(arrays[0], arrays[1], times, bbox, time_range)
+            arrays = [array[mask] for array in arrays]
+        yield column_track(*arrays)
+
+def read_csv_track(path, chunk_size=CSV_CHUNK_SIZE, bbox=None, time_range=None):
+    return concatenate_tracks(read_csv_chunks(path, chunk_size, bbox, time_range))
+
+def arrow_time_column(column):
+    """Epoch seconds of an Arrow column of timestamps, numbers or ISO strings."""
+    import pyarrow as pa
+    if pa.types.is_timestamp(column.type):
+        # Nulls become NaN in to_numpy
+        nanoseconds = column.cast(pa.timestamp('ns', tz=column.type.tz)).cast(pa.int64())
+        return nanoseconds.to_numpy(zero_copy_only=False).astype(np.float64) / 1e9
+    return parse_time_column(column.to_pandas())
+
+def read_columnar_chunks(path, bbox=None, time_range=None, batch_size=CSV_CHUNK_SIZE):
+    """Yield the track columns of a Parquet or Feather file as Track chunks, one per record batch.
+
+    The bounding box (and a numeric time range) is pushed down to the scan, so
+    row groups outside of it are never decoded. Needs pyarrow.
+    """
+    try:
+        import pyarrow.dataset as ds
+        import pyarrow.types as pat
+    except ImportError:
+        raise ValueError("Reading Parquet and Feather files needs the pyarrow package") from None
+
+    file_format = COLUMNAR_FORMATS[os.path.splitext(path)[1].lower()]
+    dataset = ds.dataset(path, format='ipc' if file_format == 'feather' else file_format)
+    names = dataset.schema.names
+    time_column = next((name for name in names if name.lower() in CSV_TIME_COLUMNS), None)
+    columns = CSV_COLUMNS + ([time_column] if time_column else [])
+
+    expression = None
+    if bbox is not None:
+        min_lon, min_lat, max_lon, max_lat = bbox
+        expression = (
+            (ds.field('longitude') >= min_lon) & (ds.field('longitude') <= max_lon)
+            & (ds.field('latitude') >= min_lat) & (ds.field('latitude') <= max_lat)
+        )
+    time_type = dataset.schema.field(time_column).type if time_column else None
+    if time_range is not None and time_type is not None and (pat.is_floating(time_type) or pat.is_integer(time_type)):
+        in_range = (ds.field(time_column) >= time_range[0]) & (ds.field(time_column) <= time_range[1])
+        expression = in_range if expression is None else expression & in_range
+
+    for batch in dataset.to_batches(columns=columns, filter=expression, batch_size=batch_size):
+        latitude, longitude, altitude = (
+            batch.column(name).to_numpy(zero_copy_only=False).astype(COLUMN_DTYPES[name], copy=False)
+            for name in CSV_COLUMNS
+        )
+        times = arrow_time_column(batch.column(time_column)) if time_column else np.full(batch.num_rows, np.nan)
+        arrays = [latitude, longitude, altitude, times]
+        if time_range is not None:
+            mask = filter_mask(latitude, longitude, times, None, time_range)
+            arrays = [array[mask] for array in arrays]
+        yield column_track(*arrays)
+
+def read_columnar_track(path, bbox=None, time_range=None, batch_size=CSV_CHUNK_SIZE):
+    return concatenate_tracks(read_columnar_chunks(path, bbox, time_range, batch_size))
+
+def read_track_chunks(path, bbox=None, time_range=None):
+    """Read a GPX, TCX, FIT, CSV, Parquet or Feather track by its extension as Track chunks.
+
+    Only the points in the filters are kept. Tables come in chunks as they are read,
+    the other formats as one chunk. GPX, TCX, FIT and CSV files may be gzipped.
+    """
+    extension = track_format(path)
+    if extension in STREAM_FORMATS:
+        size_hint = None if path.lower().endswith(".gz") else os.path.getsize(path)
+        with open(path, "rb") as source:
+            return [read_track_stream(source, path, bbox, time_range, size_hint)]
+    if extension in COLUMNAR_FORMATS:
+        return read_columnar_chunks(path, bbox, time_range)
+    return read_csv_chunks(path, bbox=bbox, time_range=time_range)
+
+def read_track(path, bbox=None, time_range=None):
+    """Read a whole track by its extension, see read_track_chunks."""
+    return concatenate_tracks(read_track_chunks(path, bbox, time_range))
+
+def track_duration(times):
+    """Return seconds between the first and the last timestamp, None if the track has no times."""
+    valid = times[np.isfinite(times)]
+    if len(valid) == 0:
+        return None
+    return float(valid[-1] - valid[0])
@@ -0,0 +1,108 @@
+import heapq
+import numpy as np
+
+# Each level of detail keeps points this many times more significant than the level before
+LOD_FACTOR = 4
+
+def douglas_peucker_ranks(points):
+    """Significance of every point for Douglas-Peucker, in meters.
+
+    A point survives the simplification with tolerance t exactly when its rank is >= t,
+    so all levels of detail come from one pass over the track. All segments of one
+    recursion depth are split together in array operations.
+    """
+    count = len(points)
+    ranks = np.full(count, np.inf)
+    if count < 3:
+        return ranks
+    points = np.asarray(points, dtype=np.float64)
+    kept = np.zeros(count, dtype=bool)
+    kept[0] = kept[-1] = True
+
+    while not kept.all():
+        boundaries = np.flatnonzero(kept)
+        inner = np.flatnonzero(~kept)
+        segment = np.searchsorted(boundaries, inner) - 1
+        first = boundaries[segment]
+        last = boundaries[segment + 1]
+
+        # Distance of every remaining point to the chord of its segment
+        start = points[first]
+        chord = points[last] - start
+        offset = points[inner] - start
+        length = np.einsum('ij,ij->i', chord, chord)
+        along = np.divide(np.einsum('ij,ij->i', offset, chord), length, out=np.zeros(len(inner)), where=length > 0)
+        along = np.clip(along, 0, 1)
+        distances = np.linalg.norm(offset - along[:, None] * chord, axis=1)
+
+        # Farthest point of each segment splits it
+        order = np.lexsort((-distances, segment))
+        heads = order[np.r_[True, segment[order][1:] != segment[order][:-1]]]
+        split = inner[heads]
+
+        # A point is never more significant than the points bounding its segment
+        parent_rank = np.minimum(ranks[first[heads]], ranks[last[heads]])
+        ranks[split] = np.minimum(distances[heads], parent_rank)
+        kept[split] = True
+    return ranks
+
+def triangle_area(a, b, c):
+    ux, uy, uz = b[0] - a[0], b[1] - a[1], b[2] - a[2]
+    vx, vy, vz = c[0] - a[0], c[1] - a[1], c[2] - a[2]
+    cx, cy, cz = uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+    return 0.5 * (cx * cx + cy * cy + cz * cz) ** 0.5
+
+def visvalingam_ranks(points):
+    """Effective area of every point for Visvalingam-Whyatt, in square meters."""
+    count = len(points)
+    ranks = np.full(count, np.inf)
+    if count < 3:
+        return ranks
+    points = np.asarray(points, dtype=np.float64)
+
+    # Initial areas in one array operation, the updates below touch two points at a time
+    a, b, c = points[:-2], points[1:-1], points[2:]
+    areas = np.full(count, np.inf)
+    areas[1:-1] = 0.5 * np.linalg.norm(np.cross(b - a, c - a), axis=1)
+    areas = areas.tolist()
+    coordinates = points.tolist()
+    previous = list(range(-1, count - 1))
+    following = list(range(1, count + 1))
+    removed = [False] * count
+    heap = [(areas[i], i) for i in range(1, count - 1)]
+    heapq.heapify(heap)
+
+    largest = 0.0
+    while heap:
+        area, i = heapq.heappop(heap)
+        if removed[i] or area != areas[i]:
+            continue
+        # Effective areas never decrease, so removing a point keeps its neighbours' order
+        largest = max(largest, area)
+        ranks[i] = largest
+        removed[i] = True
+        before, after = previous[i], following[i]
+        following[before] = after
+        previous[after] = before
+        for j in (before, after):
+            if 0 < j < count - 1:
+                areas[j] = triangle_area(coordinates[previous[j]], coordinates[j], coordinates[following[j]])
+                heapq.heappush(heap, (areas[j], j))
+    return ranks
+
+def simplify_levels(points, tolerance, levels, method='DOUGLAS_PEUCKER'):
+    """Indices of the points kept at every level of detail, level 0 keeps the full track.
+
+    Level n > 0 simplifies with tolerance * LOD_FACTOR ** (n - 1) meters.
+    """
+    if method == 'VISVALINGAM':
+        ranks = visvalingam_ranks(points)
+        thresholds = [(tolerance * LOD_FACTOR ** (n - 1)) ** 2 for n in range(1, levels)]
+    else:
+        ranks = douglas_peucker_ranks(points)
+        thresholds = [tolerance * LOD_FACTOR ** (n - 1) for n in range(1, levels)]
+
+    indices = [np.arange(len(points))]
+    for threshold in thresholds:
+        indices.append(np.flatnonzero(ranks >= threshold))
+    return indices
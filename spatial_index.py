@@ -0,0 +1,115 @@
+import bpy
+import numpy as np
+from bpy.app.handlers import persistent
+from mathutils import kdtree
+from .builders import CITOGRAPHY_TAG
+
+# Photo locations per scene, kept up to date from depsgraph updates; the tree is rebuilt from them when needed
+_photo_indexes = {}
+# KD-trees per track object, dropped when the track moves or its geometry changes
+_track_indexes = {}
+
+def geo_photo_objects(scene):
+    return [obj for obj in scene.objects if obj.get(CITOGRAPHY_TAG) == "geo_image"]
+
+def build_kdtree(coordinates):
+    tree = kdtree.KDTree(len(coordinates))
+    for i, co in enumerate(coordinates):
+        tree.insert(co, i)
+    tree.balance()
+    return tree
+
+def photo_index(scene):
+    """KD-tree over the locations of the geo-image planes of a scene, with the objects it indexes.
+
+    The scene is only scanned when no index exists yet; afterwards moved photos are
+    updated one by one by index_update_handler and the tree is rebuilt from the stored locations.
+    """
+    index = _photo_indexes.get(scene.name)
+    if index is None:
+        index = {
+            "locations": {obj.name: tuple(obj.matrix_world.translation) for obj in geo_photo_objects(scene)},
+            "object_count": len(bpy.data.objects),
+            "tree": None,
+        }
+        _photo_indexes[scene.name] = index
+    if index["tree"] is None:
+        index["names"] = list(index["locations"])
+        index["tree"] = build_kdtree([index["locations"][name] for name in index["names"]])
+    return index["tree"], index["names"]
+
+def track_world_coordinates(obj):
+    mesh = obj.data
+    coordinates = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coordinates)
+    matrix = np.array(obj.matrix_world, dtype=np.float64)
+    return coordinates.reshape(-1, 3).astype(np.float64) @ matrix[:3, :3].T + matrix[:3, 3]
+
+def track_index(obj):
+    """KD-tree over the world space vertices of one track object."""
+    tree = _track_indexes.get(obj.name)
+    if tree is None:
+        tree = build_kdtree(track_world_coordinates(obj))
+        _track_indexes[obj.name] = tree
+    return tree
+
+def nearest_photo(scene, point):
+    """Name of the geo-image closest to a point and its distance, (None, None) if there are none."""
+    tree, names = photo_index(scene)
+    if not names:
+        return None, None
+    _, index, distance = tree.find(point)
+    return names[index], distance
+
+def photos_in_radius(scene, point, radius):
+    """Names of the geo-images within radius of a point."""
+    tree, names = photo_index(scene)
+    return [names[index] for _, index, _ in tree.find_range(point, radius)]
+
+def photos_near_track(scene, track, radius):
+    """Names of the geo-images within radius of any vertex of a track."""
+    tree = track_index(track)
+    photo_index(scene)
+    found = []
+    for name, location in _photo_indexes[scene.name]["locations"].items():
+        _, _, distance = tree.find(location)
+        if distance is not None and distance <= radius:
+            found.append(name)
+    return found
+
+def clear_indexes():
+    _photo_indexes.clear()
+    _track_indexes.clear()
+
+@persistent
+def index_update_handler(scene, depsgraph):
+    """Keep the indexes in step with the changes of the depsgraph instead of checking them on every query."""
+    index = _photo_indexes.get(scene.name)
+    for update in depsgraph.updates:
+        data = update.id
+        if isinstance(data, (bpy.types.Collection, bpy.types.Scene)):
+            # Objects were added, removed or (un)linked, which photos exist is read again on the next query
+            if index is not None and (
+                isinstance(data, bpy.types.Collection) or index["object_count"] != len(bpy.data.objects)
+            ):
+                del _photo_indexes[scene.name]
+                index = None
+            for name in [name for name in _track_indexes if name not in bpy.data.objects]:
+                del _track_indexes[name]
+        elif isinstance(data, bpy.types.Object):
+            obj = data.original
+            if index is not None and update.is_updated_transform and obj.get(CITOGRAPHY_TAG) == "geo_image":
+                if obj.name in index["locations"]:
+                    index["locations"][obj.name] = tuple(obj.matrix_world.translation)
+                    index["tree"] = None
+                else:
+                    # Renamed or newly tagged
+                    del _photo_indexes[scene.name]
+                    index = None
+            if obj.name in _track_indexes and (update.is_updated_transform or update.is_updated_geometry):
+                del _track_indexes[obj.name]
+
+@persistent
+def index_reset_handler(*args):
+    # Loading a file or undoing replaces the objects the indexes point to
+    clear_indexes()
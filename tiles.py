@@ -0,0 +1,320 @@
+import json
+import os
+import shutil
+import bpy
+import numpy as np
+from bpy.app.handlers import persistent
+from .builders import CITOGRAPHY_TAG, tag_citography
+from .utilities import set_mesh_vertices, set_point_attributes
+
+TILE_MANIFEST = "tiles.json"
+MAX_TILE_DEPTH = 16
+# Far tiles show every n-th point of the tile
+OVERVIEW_STEP = 16
+
+# Rows of the spill file split at once while tiling
+TILE_BLOCK_POINTS = 1 << 20
+
+# Camera, layers and settings the tiles were last chosen for
+_last_view = None
+# Names of the tiled layer objects, so the handlers do not walk the scene
+_tile_layers = set()
+
+def spill_chunks(chunks, path):
+    """Append the (positions, attributes) chunks as float32 rows [x, y, z, attributes...] to a raw file.
+
+    Returns the attribute names, the point count and the XY bounds (low, high).
+    """
+    names = None
+    count = 0
+    low = np.full(2, np.inf)
+    high = np.full(2, -np.inf)
+    with open(path, "wb") as f:
+        for positions, attributes in chunks:
+            if names is None:
+                names = list(attributes)
+            if len(positions) == 0:
+                continue
+            rows = np.empty((len(positions), 3 + len(names)), dtype=np.float32)
+            rows[:, :3] = positions
+            for column, name in enumerate(names, 3):
+                rows[:, column] = attributes[name]
+            rows.tofile(f)
+            count += len(rows)
+            low = np.minimum(low, rows[:, :2].min(axis=0))
+            high = np.maximum(high, rows[:, :2].max(axis=0))
+    return names or [], count, (low, high)
+
+def read_rows(path, width, block_points):
+    """Blocks of rows of a raw spill file, at most block_points rows at a time."""
+    with open(path, "rb") as f:
+        while True:
+            rows = np.fromfile(f, dtype=np.float32, count=block_points * width)
+            if rows.size == 0:
+                return
+            yield rows.reshape(-1, width)
+
+def split_tiles(chunks, tile_dir, max_points, max_depth, block_points):
+    """Spill the chunks and split them into tiles inside tile_dir, see write_tiles."""
+    root = os.path.join(tile_dir, "node.raw")
+    names, count, (low, high) = spill_chunks(chunks, root)
+    width = 3 + len(names)
+
+    tiles = []
+    stack = []
+    if count:
+        stack.append(("", low, float((high - low).max()), root, count))
+    else:
+        os.remove(root)
+    while stack:
+        path, corner, size, node_file, node_count = stack.pop()
+        if node_count <= max_points or len(path) >= max_depth:
+            rows = np.fromfile(node_file, dtype=np.float32).reshape(-1, width)
+            os.remove(node_file)
+            name = path or "root"
+            np.save(os.path.join(tile_dir, f"{name}.npy"), np.ascontiguousarray(rows[:, :3]))
+            for column, attribute in enumerate(names, 3):
+                np.save(os.path.join(tile_dir, f"{name}.{attribute}.npy"), np.ascontiguousarray(rows[:, column]))
+            tiles.append({
+                "name": name,
+                "count": len(rows),
+                "bounds": rows[:, :3].min(axis=0).tolist() + rows[:, :3].max(axis=0).tolist(),
+            })
+            continue
+
+        half = (size or 1.0) / 2
+        child_files = [os.path.join(tile_dir, f"node{path}{q}.raw") for q in range(4)]
+        child_counts = [0] * 4
+        outputs = [open(child, "wb") for child in child_files]
+        try:
+            for rows in read_rows(node_file, width, block_points):
+                quadrant = (rows[:, 0] >= corner[0] + half).astype(np.int8)
+                quadrant += 2 * (rows[:, 1] >= corner[1] + half)
+                for q in range(4):
+                    part = rows[quadrant == q]
+                    if len(part):
+                        part.tofile(outputs[q])
+                        child_counts[q] += len(part)
+        finally:
+            for output in outputs:
+                output.close()
+        os.remove(node_file)
+        for q in range(4):
+            if child_counts[q]:
+                stack.append((path + str(q), corner + half * np.array([q & 1, q >> 1]), half, child_files[q], child_counts[q]))
+            else:
+                os.remove(child_files[q])
+
+    tiles.sort(key=lambda tile: tile["name"])
+    manifest = {"attributes": names, "overview_step": OVERVIEW_STEP, "tiles": tiles}
+    with open(os.path.join(tile_dir, TILE_MANIFEST), "w") as f:
+        json.dump(manifest, f)
+    return manifest
+
+def write_tiles(chunks, tile_dir, max_points, max_depth=MAX_TILE_DEPTH, block_points=TILE_BLOCK_POINTS):
+    """Split streamed (positions, attributes) chunks by XY into quadtree tiles of at most max_points on disk.
+
+    The points are spilled to a raw file, every node holding too many points is then split
+    into its 4 quadrants block by block. Only one block and one leaf are ever in memory.
+    Points keep their recorded order inside a tile. Returns the manifest.
+    """
+    os.makedirs(tile_dir, exist_ok=True)
+    try:
+        return split_tiles(chunks, tile_dir, max_points, max_depth, block_points)
+    except BaseException:
+        # A failed or cancelled write leaves no half-written folder behind
+        shutil.rmtree(tile_dir, ignore_errors=True)
+        raise
+
+def build_tiled_layer(name, chunks, collection, tile_dir, max_points):
+    """Write streamed (positions, attributes) chunks to tiles on disk and create the layer for them."""
+    return create_tiled_layer(name, write_tiles(chunks, tile_dir, max_points), collection, tile_dir)
+
+def create_tiled_layer(name, manifest, collection, tile_dir):
+    """Create one empty mesh object per tile of a written manifest under a layer empty."""
+    layer = bpy.data.objects.new(name, None)
+    layer.empty_display_type = 'PLAIN_AXES'
+    layer["citography_tiles"] = tile_dir
+    tag_citography(layer, "tile_layer")
+    collection.objects.link(layer)
+    _tile_layers.add(layer.name)
+
+    for tile in manifest["tiles"]:
+        mesh = bpy.data.meshes.new(f"{name}_{tile['name']}")
+        obj = bpy.data.objects.new(f"{name}_{tile['name']}", mesh)
+        obj.parent = layer
+        obj["citography_tile"] = tile["name"]
+        obj["citography_tile_count"] = tile["count"]
+        obj["citography_tile_bounds"] = tile["bounds"]
+        obj["citography_tile_level"] = ""
+        tag_citography(obj, "tile")
+        collection.objects.link(obj)
+    return layer
+
+def register_tile_layers():
+    """Rebuild the registry of tiled layers from the objects of the open file."""
+    _tile_layers.clear()
+    for obj in bpy.data.objects:
+        if obj.get(CITOGRAPHY_TAG) == "tile_layer":
+            _tile_layers.add(obj.name)
+
+def tile_layers(scene):
+    """The registered tiled layers in a scene, removed layers are dropped from the registry."""
+    layers = []
+    for name in list(_tile_layers):
+        layer = bpy.data.objects.get(name)
+        if layer is None or layer.get(CITOGRAPHY_TAG) != "tile_layer":
+            _tile_layers.discard(name)
+        elif name in scene.objects:
+            layers.append(layer)
+    return layers
+
+def remove_unused_tile_dirs(tiles_dir):
+    """Delete the tile folders in tiles_dir no layer of the open file uses, returns how many were removed.
+
+    Only called on request, a deleted layer can come back with undo or from another .blend.
+    """
+    used = {
+        os.path.normpath(obj["citography_tiles"]) for obj in bpy.data.objects
+        if obj.get(CITOGRAPHY_TAG) == "tile_layer" and obj.get("citography_tiles")
+    }
+    removed = 0
+    for entry in os.scandir(tiles_dir):
+        # Only folders written by write_tiles are removed
+        if entry.is_dir() and os.path.normpath(entry.path) not in used and os.path.isfile(os.path.join(entry.path, TILE_MANIFEST)):
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed += 1
+    return removed
+
+def load_tile(obj, tile_dir, attributes, level):
+    """Fill the mesh of a tile with its 'FULL' or 'OVERVIEW' points, or empty it for ''."""
+    mesh = obj.data
+    mesh.clear_geometry()
+    if level:
+        step = OVERVIEW_STEP if level == 'OVERVIEW' else 1
+        name = obj["citography_tile"]
+        positions = np.load(os.path.join(tile_dir, f"{name}.npy"), mmap_mode='r')[::step]
+        set_mesh_vertices(mesh, positions)
+        set_point_attributes(mesh, {
+            attribute: np.load(os.path.join(tile_dir, f"{name}.{attribute}.npy"), mmap_mode='r')[::step]
+            for attribute in attributes
+        })
+    obj["citography_tile_level"] = level
+
+def tile_visibility(corners, camera, scene, depsgraph):
+    """Which tiles have a bounding box (corners of shape (T, 8, 3), world space) in the camera view."""
+    render = scene.render
+    projection = np.array(camera.calc_matrix_camera(
+        depsgraph, x=render.resolution_x, y=render.resolution_y,
+        scale_x=render.pixel_aspect_x, scale_y=render.pixel_aspect_y,
+    ))
+    view = np.array(camera.matrix_world.inverted())
+    homogeneous = np.concatenate([corners, np.ones(corners.shape[:2] + (1,))], axis=2)
+    clip = homogeneous @ (projection @ view).T
+    in_front = clip[..., 3] > 1e-6
+    ndc = clip[..., :2] / np.where(in_front, clip[..., 3], 1.0)[..., None]
+    overlaps = (ndc.min(axis=1) <= 1).all(axis=1) & (ndc.max(axis=1) >= -1).all(axis=1)
+    # A box reaching behind the camera is only partly projectable, it counts as seen when part of it is in front
+    return np.where(in_front.all(axis=1), overlaps, in_front.any(axis=1))
+
+def choose_tile_levels(distances, visible, counts, tile_distance, budget):
+    """Nearest visible tiles first: full points up close, an overview further away, within the point budget."""
+    levels = [''] * len(distances)
+    remaining = budget
+    for i in np.argsort(distances):
+        if not visible[i] or distances[i] > tile_distance * 4:
+            continue
+        full = counts[i]
+        overview = (counts[i] + OVERVIEW_STEP - 1) // OVERVIEW_STEP
+        if distances[i] <= tile_distance and full <= remaining:
+            levels[i] = 'FULL'
+            remaining -= full
+        elif overview <= remaining:
+            levels[i] = 'OVERVIEW'
+            remaining -= overview
+    return levels
+
+def read_tile_attributes(tile_dir):
+    """Attribute names of a tile folder, None when the folder or its manifest is gone."""
+    try:
+        with open(os.path.join(tile_dir, TILE_MANIFEST)) as f:
+            return json.load(f)["attributes"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+def update_tiles(scene, depsgraph=None, force=False):
+    """Load the tiles the active camera sees and unload the others, one point budget shared by every tiled layer."""
+    global _last_view
+    camera = scene.camera
+    if not _tile_layers:
+        return
+    layers = []
+    for layer in tile_layers(scene):
+        tiles = [child for child in layer.children if child.get(CITOGRAPHY_TAG) == "tile"]
+        if tiles:
+            layers.append((layer, tiles, np.array(layer.matrix_world)))
+    if not layers:
+        return
+
+    view = (
+        tuple(tuple(row) for row in camera.matrix_world) if camera else None,
+        tuple((layer.name, tuple(map(tuple, matrix))) for layer, _, matrix in layers),
+        scene.tile_distance, scene.tile_budget,
+    )
+    # Loading tiles updates the depsgraph again, with the same view there is nothing to do
+    if not force and _last_view == view:
+        return
+    _last_view = view
+
+    # Layers whose tile folder was deleted or moved keep their tiles unloaded
+    attributes = {}
+    for layer, _, _ in layers:
+        attributes[layer.name] = read_tile_attributes(layer.get("citography_tiles", ""))
+        if attributes[layer.name] is None:
+            print(f"Tiles of {layer.name} not found in {layer.get('citography_tiles')}")
+    layers = [entry for entry in layers if attributes[entry[0].name] is not None]
+    if not layers:
+        return
+
+    # The 8 corners of every tile box of every layer, in world space
+    select = np.array([[i & 1, (i >> 1) & 1, (i >> 2) & 1] for i in range(8)])
+    corners = []
+    for _, tiles, matrix in layers:
+        bounds = np.array([tile["citography_tile_bounds"] for tile in tiles], dtype=np.float64).reshape(-1, 2, 3)
+        box = np.where(select[None, :, :], bounds[:, None, 1, :], bounds[:, None, 0, :])
+        corners.append(box @ matrix[:3, :3].T + matrix[:3, 3])
+    corners = np.concatenate(corners)
+    low, high = corners.min(axis=1), corners.max(axis=1)
+    tiles = [(layer, tile) for layer, layer_tiles, _ in layers for tile in layer_tiles]
+    counts = np.array([tile["citography_tile_count"] for _, tile in tiles])
+
+    if camera is not None:
+        eye = np.array(camera.matrix_world.translation)
+        distances = np.linalg.norm(np.clip(eye, low, high) - eye, axis=1)
+        if depsgraph is None:
+            depsgraph = bpy.context.evaluated_depsgraph_get()
+        visible = tile_visibility(corners, camera, scene, depsgraph)
+    else:
+        # Without a camera every tile shows its overview, as far as the budget goes
+        distances = np.full(len(tiles), scene.tile_distance * 2)
+        visible = np.ones(len(tiles), dtype=bool)
+
+    levels = choose_tile_levels(distances, visible, counts, scene.tile_distance, scene.tile_budget)
+    for (layer, tile), level in zip(tiles, levels):
+        if tile.get("citography_tile_level", "") == level:
+            continue
+        try:
+            load_tile(tile, layer["citography_tiles"], attributes[layer.name], level)
+        except OSError as e:
+            print(f"Error loading tile {tile.name}: {e}")
+
+@persistent
+def tile_update_handler(scene, depsgraph=None):
+    update_tiles(scene, depsgraph)
+
+@persistent
+def tile_load_handler(*args):
+    """Tiled layers of the opened file or the undo step, the view is chosen again."""
+    global _last_view
+    _last_view = None
+    register_tile_layers()
@@ -0,0 +1,186 @@
+import hashlib
+import os
+import shutil
+import uuid
+from collections import namedtuple
+import numpy as np
+from .folder_sync import content_hash
+from .profiling import stage
+from .readers import Track
+from .tracks import TrackAttributes
+
+# Bump when the stored arrays change, old entries are then never hit again
+CACHE_VERSION = 2
+MAX_CACHE_BYTES = 4 * 2 ** 30
+# Points per slice when a cached track is streamed
+TRACK_CHUNK_SIZE = 250000
+# Arrays every cache entry holds next to its attribute_* arrays
+REQUIRED_ARRAYS = ("positions", "time", "segment")
+
+# A parsed and projected track, arrays may be memory-mapped from the cache
+ProjectedTrack = namedtuple("ProjectedTrack", ["positions", "time", "segment", "attributes"])
+
+def track_cache_key(path, origin, *options):
+    """Key of a source file projected to a scene origin, options are the reader settings (filters, units)."""
+    st = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((
+        CACHE_VERSION, os.path.abspath(path), st.st_size, st.st_mtime_ns,
+        content_hash(path), origin.key(), options,
+    )).encode("utf-8"))
+    return digest.hexdigest()
+
+class TrackCache:
+    """Folder of projected tracks, one sub folder of .npy files per key."""
+
+    def __init__(self, cache_dir, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def load(self, key):
+        """The cached track memory-mapped from disk, None on a miss."""
+        entry = os.path.join(self.cache_dir, key)
+        if not os.path.isdir(entry):
+            return None
+        try:
+            arrays = {
+                os.path.splitext(name)[0]: np.load(os.path.join(entry, name), mmap_mode='r')
+                for name in os.listdir(entry) if name.endswith(".npy")
+            }
+            # Entries are used in the order they were last read, the oldest go first
+            os.utime(entry)
+        except (OSError, ValueError):
+            return None
+        # An entry missing one of the track arrays is broken, it is read and stored again
+        if not all(name in arrays for name in REQUIRED_ARRAYS):
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+        attributes = {name[len("attribute_"):]: array for name, array in arrays.items() if name.startswith("attribute_")}
+        return ProjectedTrack(arrays["positions"], arrays["time"], arrays["segment"], attributes)
+
+    def store(self, key, track):
+        """Write a track under key; written to a temporary folder first, so readers never see half of it."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        partial = os.path.join(self.cache_dir, f".{key}.{uuid.uuid4().hex}")
+        os.makedirs(partial)
+        arrays = dict(zip(REQUIRED_ARRAYS, (track.positions, track.time, track.segment)))
+        arrays.update({f"attribute_{name}": values for name, values in track.attributes.items()})
+        for name, values in arrays.items():
+            np.save(os.path.join(partial, name + ".npy"), np.ascontiguousarray(values))
+        try:
+            os.replace(partial, os.path.join(self.cache_dir, key))
+        except OSError:
+            # Stored by someone else in the meantime
+            shutil.rmtree(partial, ignore_errors=True)
+        self.prune()
+
+    def entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+        return [
+            os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+            if not name.startswith(".") and os.path.isdir(os.path.join(self.cache_dir, name))
+        ]
+
+    def prune(self):
+        """Remove the least recently used tracks until the cache fits into max_bytes."""
+        sizes = []
+        for entry in self.entries():
+            size = sum(entry_file.stat().st_size for entry_file in os.scandir(entry))
+            sizes.append((os.stat(entry).st_mtime, entry, size))
+        total = sum(size for _, _, size in sizes)
+        for _, entry, size in sorted(sizes):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        for entry in self.entries():
+            shutil.rmtree(entry, ignore_errors=True)
+
+def first_point(chunk):
+    """(latitude, longitude, time, segment) of the first point of a Track chunk, None when it is empty."""
+    if chunk is None or len(chunk.latitude) == 0:
+        return None
+    return chunk.latitude[0], chunk.longitude[0], chunk.time[0], chunk.segment[0]
+
+def project_track_chunks(chunks, origin, altitude_scale=1.0, keep=False):
+    """Project Track chunks one by one, yields (positions, time, segment, attributes) per chunk.
+
+    The degrees of a chunk are dropped once it is projected. One chunk is read ahead,
+    the attributes of a chunk depend on the first point of the next one.
+    """
+    if isinstance(chunks, Track):
+        chunks = [chunks]
+    attributes = TrackAttributes(keep=keep)
+    chunks = iter(chunks)
+    chunk = next(chunks, None)
+    while chunk is not None:
+        following = next(chunks, None)
+        with stage("project"):
+            positions = origin.project(chunk.longitude, chunk.latitude, chunk.elevation * altitude_scale)
+            chunk_attributes = attributes.add(
+                positions, chunk.time, chunk.latitude, chunk.longitude, chunk.segment, first_point(following),
+            )
+        yield positions, chunk.time, chunk.segment, chunk_attributes
+        chunk = following
+
+def cached_track_chunks(track, chunk_size=TRACK_CHUNK_SIZE):
+    """Slices of a (memory-mapped) ProjectedTrack in the form project_track_chunks yields."""
+    for start in range(0, len(track.positions), chunk_size):
+        end = start + chunk_size
+        yield (
+            track.positions[start:end], track.time[start:end], track.segment[start:end],
+            {name: values[start:end] for name, values in track.attributes.items()},
+        )
+
+def load_projected_track(path, origin, read, altitude_scale=1.0, cache=None, options=()):
+    """Parse and project a track, or map it from the cache when this file was projected to this origin before.
+
+    read(path) returns a readers.Track or an iterable of Track chunks, options must describe
+    everything read depends on. Chunks are projected one by one and their degrees dropped,
+    only the float32 positions and the times of the whole track are held.
+    """
+    key = None
+    if cache is not None:
+        key = track_cache_key(path, origin, altitude_scale, options)
+        with stage("track cache"):
+            cached = cache.load(key)
+        if cached is not None:
+            return cached
+
+    with stage("parse"):
+        chunks = read(path)
+    parts = list(zip(*project_track_chunks(chunks, origin, altitude_scale)))
+    if parts:
+        positions, times, segments, attributes = parts
+        projected = ProjectedTrack(
+            np.concatenate(positions), np.concatenate(times), np.concatenate(segments),
+            {name: np.concatenate([chunk[name] for chunk in attributes]) for name in attributes[0]},
+        )
+    else:
+        projected = ProjectedTrack(
+            np.empty((0, 3), dtype=np.float32), np.empty(0), np.empty(0, dtype=np.int32),
+            TrackAttributes().result(),
+        )
+
+    if cache is not None:
+        with stage("track cache"):
+            cache.store(key, projected)
+    return projected
+
+def stream_projected_track(path, origin, read, altitude_scale=1.0, cache=None, options=()):
+    """Chunks of a projected track as project_track_chunks yields them, never holding the whole track.
+
+    A track in the cache is sliced from its memory map, otherwise the chunks of read(path)
+    are projected as they come. Streamed tracks are not stored in the cache.
+    """
+    if cache is not None:
+        with stage("track cache"):
+            cached = cache.load(track_cache_key(path, origin, altitude_scale, options))
+        if cached is not None:
+            return cached_track_chunks(cached)
+    with stage("parse"):
+        chunks = read(path)
+    return project_track_chunks(chunks, origin, altitude_scale)
@@ -0,0 +1,133 @@
+import numpy as np
+from pyproj import Geod #CHECK IF INSTALLED
+
+# Step lengths are measured on the ellipsoid, projected units are stretched by latitude in Web Mercator
+GEOD = Geod(ellps="WGS84")
+
+def step_lengths(latitude, longitude):
+    """Geodesic length in meters of the step from each point to the next one."""
+    if len(latitude) < 2:
+        return np.zeros(0, dtype=np.float64)
+    latitude = np.asarray(latitude, dtype=np.float64)
+    longitude = np.asarray(longitude, dtype=np.float64)
+    _, _, lengths = GEOD.inv(longitude[:-1], latitude[:-1], longitude[1:], latitude[1:])
+    return np.asarray(lengths, dtype=np.float64)
+
+class TrackAttributes:
+    """Per-point attributes of a track computed chunk by chunk, carrying the last point over to the next chunk.
+
+    Speed and distance are measured on the ellipsoid, the distance restarts with every segment.
+    With keep=False the chunks are only returned by add(), nothing is held for result().
+    """
+
+    def __init__(self, keep=True):
+        self.keep = keep
+        # Latitude, longitude, time, segment and distance of the last point added
+        self.previous = None
+        self.start_time = np.nan
+        self.parts = {"altitude": [], "time": [], "speed": [], "distance": []}
+
+    def add(self, coordinates, times, latitude, longitude, segment=None, following=None):
+        """Attributes of one chunk. following is the (latitude, longitude, time, segment) of the
+        first point of the next chunk, the speed of a segment starting at the end of this chunk needs it."""
+        count = len(coordinates)
+        if count == 0:
+            return {name: np.zeros(0, dtype=np.float32) for name in self.parts}
+        latitude = np.asarray(latitude, dtype=np.float64)
+        longitude = np.asarray(longitude, dtype=np.float64)
+        times = np.asarray(times, dtype=np.float64)
+        segment = np.zeros(count, dtype=np.int32) if segment is None else np.asarray(segment)
+
+        # Step from the point before each point, the first one reaches back into the previous chunk
+        if self.previous is None:
+            steps = np.concatenate([[0.0], step_lengths(latitude, longitude)])
+            elapsed = np.concatenate([[np.nan], np.diff(times)])
+            starts = np.concatenate([[True], segment[1:] != segment[:-1]])
+            carried = 0.0
+        else:
+            last_latitude, last_longitude, last_time, last_segment, carried = self.previous
+            steps = step_lengths(np.concatenate([[last_latitude], latitude]), np.concatenate([[last_longitude], longitude]))
+            elapsed = np.diff(np.concatenate([[last_time], times]))
+            starts = segment != np.concatenate([[last_segment], segment[:-1]])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            speed = np.where(elapsed > 0, steps / elapsed, 0)
+        speed = np.nan_to_num(speed, nan=0.0, posinf=0.0, neginf=0.0).astype(np.float32)
+
+        # The step into a new segment is a gap, the distance starts again from 0
+        travelled = np.where(starts, 0.0, steps)
+        total = np.cumsum(travelled)
+        start_indices = np.flatnonzero(starts)
+        segment_index = np.cumsum(starts) - 1
+        # Points before the first start of this chunk continue the distance of the previous chunk
+        base = np.full(count, -carried)
+        inside = segment_index >= 0
+        base[inside] = total[start_indices][segment_index[inside]]
+        distance = total - base
+
+        # The first point of every segment gets the speed of the point after it
+        speed[start_indices] = speed[np.minimum(start_indices + 1, count - 1)]
+        if starts[-1] and following is not None and following[3] == segment[-1]:
+            step = step_lengths([latitude[-1], following[0]], [longitude[-1], following[1]])[0]
+            elapsed_next = following[2] - times[-1]
+            speed[-1] = step / elapsed_next if elapsed_next > 0 else 0.0
+
+        if np.isnan(self.start_time):
+            valid = np.isfinite(times)
+            if valid.any():
+                self.start_time = times[valid][0]
+        relative = np.where(np.isfinite(times), times - self.start_time, 0)
+
+        attributes = {
+            "altitude": np.asarray(coordinates[:, 2], dtype=np.float32),
+            "time": np.nan_to_num(relative).astype(np.float32),
+            "speed": speed,
+            "distance": distance.astype(np.float32),
+        }
+        if self.keep:
+            for name, values in attributes.items():
+                self.parts[name].append(values)
+        self.previous = (latitude[-1], longitude[-1], times[-1], segment[-1], distance[-1])
+        return attributes
+
+    def result(self):
+        return {
+            name: np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+            for name, parts in self.parts.items()
+        }
+
+def track_attributes(coordinates, times, latitude, longitude, segment=None):
+    """All per-point attributes stored on imported tracks, speed and distance measured on the ellipsoid."""
+    attributes = TrackAttributes()
+    attributes.add(coordinates, times, latitude, longitude, segment)
+    return attributes.result()
+
+def track_edges(count, segment=None):
+    """Edges joining consecutive points in recorded order, not crossing segment breaks."""
+    starts = np.arange(max(count - 1, 0), dtype=np.int32)
+    if segment is not None:
+        starts = starts[segment[1:] == segment[:-1]]
+    return np.column_stack((starts, starts + 1))
+
+def merge_tracks(positions, segments, attributes, with_edges=False):
+    """Concatenate many tracks into one point set with a track_id attribute.
+
+    Takes one positions / segment / attributes dict per track. Returns the merged
+    positions, attributes and, with_edges, the edges of every track shifted to its points.
+    """
+    counts = [len(points) for points in positions]
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int32)
+    merged = {
+        name: np.concatenate([np.asarray(track[name], dtype=np.float32) for track in attributes])
+        for name in (attributes[0] if attributes else {})
+    }
+    merged["track_id"] = np.repeat(np.arange(len(counts), dtype=np.float32), counts)
+
+    edges = None
+    if with_edges:
+        edges = np.concatenate(
+            [track_edges(count, segment) + offset for count, segment, offset in zip(counts, segments, offsets)]
+            or [np.empty((0, 2), dtype=np.int32)]
+        )
+    coordinates = np.concatenate(positions) if positions else np.empty((0, 3), dtype=np.float32)
+    return coordinates, merged, edges
@@ -1,6 +1,10 @@
 import addon_utils #to activate a check function
 import os
 import bpy
+import numpy as np
+from .builders import build_image_planes
+from .proxies import make_proxies, proxy_size_for_budget
+from .profiling import stage
 
 VALID_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.gif', '.hdr')
 
@@ -16,12 +20,8 @@ def import_images_as_plane(image_path, location=(0, 0, 0)):
     """Import an image from the path as a plane in Blender."""
     if os.path.exists(image_path):
         try:
-            bpy.ops.import_image.to_plane(
-                files=[{"name": os.path.basename(image_path)}],
-                directory=os.path.dirname(image_path)
-            )
-            # Set the location of the imported image plane
-            bpy.context.active_object.location = location
+            obj = build_image_planes([image_path], [location], bpy.context.collection)[0]
+            bpy.context.view_layer.objects.active = obj
             return True
         except Exception as e:
             print(f"Error importing image: {e}")
@@ -38,8 +38,20 @@ def get_all_images(path):
             all_images.append(os.path.join(path, file))
     return all_images
 
+def get_cache_dir(name=""):
+    """Return the Citography cache folder inside Blender's user data, creating it if needed."""
+    return bpy.utils.user_resource('DATAFILES', path=os.path.join("citography", name), create=True)
+
+def get_texture_paths(scene, img_paths):
+    """Return the proxy textures of the images when proxies are enabled, the originals otherwise."""
+    if not scene.use_proxies:
+        return img_paths
+    max_size = proxy_size_for_budget(len(img_paths), scene.texture_budget, scene.proxy_size)
+    with stage("proxies"):
+        return make_proxies(img_paths, get_cache_dir("proxies"), max_size)
+
 def format_duration(duration):
-    hours, remainder = divmod(duration.seconds, 3600)
+    hours, remainder = divmod(int(duration.total_seconds()), 3600)
     minutes, seconds = divmod(remainder, 60)
     
     formatted_duration = ""
@@ -51,3 +63,33 @@ def format_duration(duration):
         formatted_duration += f"{seconds}sec"
 
     return formatted_duration.strip()
+
+def set_mesh_vertices(mesh, coordinates, edges=None):
+    """Fill an empty mesh with an (N, 3) array of vertices (and optional (E, 2) edges) through bulk foreach_set."""
+    mesh.vertices.add(len(coordinates))
+    mesh.vertices.foreach_set("co", np.ascontiguousarray(coordinates, dtype=np.float32).ravel())
+    if edges is not None and len(edges):
+        mesh.edges.add(len(edges))
+        mesh.edges.foreach_set("vertices", np.ascontiguousarray(edges, dtype=np.int32).ravel())
+    mesh.update()
+
+def selected_world_coordinates(obj):
+    """World coordinates of the selected vertices of a mesh object, in vertex (recorded) order."""
+    if obj.mode == 'EDIT':
+        obj.update_from_editmode()
+    mesh = obj.data
+    count = len(mesh.vertices)
+    coordinates = np.empty(count * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coordinates)
+    selected = np.empty(count, dtype=bool)
+    mesh.vertices.foreach_get("select", selected)
+
+    matrix = np.array(obj.matrix_world, dtype=np.float64)
+    coordinates = coordinates.reshape(-1, 3)[selected].astype(np.float64)
+    return coordinates @ matrix[:3, :3].T + matrix[:3, 3]
+
+def set_point_attributes(mesh, attributes):
+    """Store per-point float arrays as mesh attributes, one bulk foreach_set each."""
+    for name, values in attributes.items():
+        attribute = mesh.attributes.get(name) or mesh.attributes.new(name=name, type='FLOAT', domain='POINT')
+        attribute.data.foreach_set("value", np.ascontiguousarray(values, dtype=np.float32))